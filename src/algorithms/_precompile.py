@@ -0,0 +1,77 @@
+import numpy as np
+
+from src.algorithms import ga, grasp_numba, ihc_numba, nn, sa_numba, tabu_cuda, tabu_full_path, tabu_move
+
+# WSTĘPNA KOMPILACJA KERNELI NUMBA
+# --------------------------------
+# Wszystkie kernele mają cache=True, więc skompilowany kod trafia na dysk
+# (__pycache__) i kolejne procesy jedynie go wczytują. Kompilacja następuje
+# jednak dopiero przy pierwszym wywołaniu z daną kombinacją typów —
+# przy krótkich uruchomieniach (np. IHC dla małych n) to ona dominuje czas.
+#
+# Ten moduł wywołuje każdy solver na małej instancji dla obu typów macierzy
+# używanych w praktyce (float64 oraz int32 po compact_distance_matrix),
+# dzięki czemu cache jest wypełniony przed właściwymi eksperymentami:
+#
+#   python -m src.algorithms._precompile
+#
+# tabu_cuda jest uruchamiany z device="host": pętla hosta wariantu GPU
+# (losowanie ruchów, filtr tabu, wykonanie ruchu) przechodzi wtedy
+# z oceną kandydatów na CPU także na maszynie bez CUDA.
+#
+# Numba AOT (numba.pycc) nie obsługuje kerneli z parallel=True
+# (ihc_parallel, sa_ensemble, produce_generation), a sam moduł pycc jest
+# przestarzały — dlatego korzystamy z cache JIT.
+# ------------------------------------------------------------
+
+
+def _warmup_matrices(n=8):
+    """
+    Dwie małe macierze: ułamkowa (zostaje float64) oraz całkowita
+    (compact_distance_matrix zamienia ją na int32).
+    """
+    pts = np.random.random((n, 2)) * 100.0
+    D_float = np.sqrt(((pts[:, None] - pts[None]) ** 2).sum(-1))
+    D_int = np.round(D_float)
+    return D_float, D_int
+
+
+def precompile_kernels():
+    """
+    Kompiluje (lub wczytuje z cache) kernele wszystkich solverów dla
+    typów macierzy float64 i int32, wariantów delta / pełnych oraz
+    każdego operatora sąsiedztwa (kernele są specjalizowane pod operator).
+    """
+    for D in _warmup_matrices():
+        nn.solve_tsp(D, {"start_city": 0})
+
+        for nt in ("swap", "two_opt", "insert"):
+            for use_delta in (True, False):
+                common = {"neighborhood_type": nt, "use_delta": use_delta}
+                ihc_numba.solve_tsp(D, {"n_starts": 2, "max_iter": 10, **common})
+                sa_numba.solve_tsp(D, {"max_iter": 10, **common})
+                grasp_numba.solve_tsp(D, {"iterations": 1, "ihc_max_iter": 10, **common})
+
+            ga.solve_tsp(D, {"population_size": 4, "generations": 1, "mutation_type": nt})
+            for tabu in (tabu_move, tabu_full_path):
+                for n_paths in (1, 2):
+                    tabu.solve_tsp(
+                        D,
+                        {"max_iter": 2, "n_neighbors": 2, "neighborhood_type": nt, "n_paths": n_paths},
+                    )
+            for candidate_k in (0, 2):
+                tabu_cuda.solve_tsp(
+                    D,
+                    {
+                        "max_iter": 2,
+                        "n_neighbors": 2,
+                        "neighborhood_type": nt,
+                        "candidate_k": candidate_k,
+                        "device": "host",
+                    },
+                )
+
+
+if __name__ == "__main__":
+    precompile_kernels()
+    print("Kernele Numba skompilowane (cache zapisany).")
@@ -1,8 +1,13 @@
 import numpy as np
 import time
-import random
-from src.utils.distance import route_length_fast
-from src.utils.neighborhoods_numba import get_neighbor_function
+from numba import literally, njit, prange
+from src.utils.distance import compact_distance_matrix, route_length_batch, route_length_fast
+from src.utils.neighborhoods_numba_delta import (
+    apply_move_inplace,
+    nearest_candidates,
+    propose_move_delta,
+)
+from src.utils.rng import seed_rng
 
 # ALGORYTM GENETYCZNY (GA)
 # ------------------------------------------------------
@@ -23,45 +28,78 @@ from src.utils.neighborhoods_numba import get_neighbor_function
 
 
 # SELEKCJA
-def selection_tournament(population, costs, k=3):
+# Każda selekcja losuje od razu m rodziców dla całego pokolenia i zwraca
+# ich indeksy w populacji. Dzięki temu wszystkie obliczenia zależne tylko
+# od kosztów (wagi, ranking) wykonujemy raz na pokolenie, a nie przy
+# każdym losowaniu rodzica. Selekcje są kompilowane przez Numba, bo
+# wywołuje je skompilowana pętla pokoleń (evolve).
+@njit(cache=True)
+def selection_tournament(costs, m, k=3):
     """
     TURNIEJOWA (Tournament selection)
     ---------------------------------
     - losujemy k osobników
     - wybieramy najlepszego (najmniejszy koszt)
-    """
-    n = len(population)
-    idx = np.random.choice(n, k, replace=False)
-    best_idx = idx[np.argmin(costs[idx])]
-    return population[best_idx]
-
+    - m turniejów rozgrywamy w jednej pętli
 
-def selection_roulette(population, costs):
+    Uczestników losujemy ze zwracaniem — przy k=3 powtórzenia w jednym
+    turnieju są rzadkie i nie zmieniają istotnie presji selekcyjnej.
+    """
+    pop_size = len(costs)
+    out = np.empty(m, dtype=np.int64)
+    for t in range(m):
+        best = np.random.randint(0, pop_size)
+        for _ in range(k - 1):
+            c = np.random.randint(0, pop_size)
+            if costs[c] < costs[best]:
+                best = c
+        out[t] = best
+    return out
+
+
+@njit(cache=True)
+def selection_roulette(costs, m):
     """
     RULETKA (Roulette wheel selection)
     ----------------------------------
     - każdy osobnik ma wagę 1/cost
     - im lepszy, tym większa szansa wyboru
+    - wagi liczymy raz na pokolenie, m rodziców losujemy jednym wywołaniem
+    - losowanie: dystrybuanta (cumsum) + np.searchsorted
+    """
+    cum = np.cumsum(1.0 / (costs + 1e-9))
+    cum /= cum[-1]
+    return np.searchsorted(cum, np.random.random(m), side="right")
+
+
+@njit(cache=True)
+def _ranking_cum(pop_size):
     """
-    fitness = 1.0 / (costs + 1e-9)
-    probs = fitness / fitness.sum()
-    idx = np.random.choice(len(population), p=probs)
-    return population[idx]
+    Dystrybuanta selekcji rankingowej zależy wyłącznie od rozmiaru
+    populacji, więc evolve liczy ją raz na cały przebieg algorytmu.
+    """
+    # Odwracamy rangi: najlepszy (pierwszy w order) dostaje N, najgorszy 1.
+    ranks = np.arange(pop_size, 0, -1).astype(np.float64)
+    cum = np.cumsum(ranks / ranks.sum())
+    cum /= cum[-1]
+    return cum
+
+
+@njit(cache=True)
+def _ranking_pick(costs, m, cum):
+    order = np.argsort(costs)
+    return order[np.searchsorted(cum, np.random.random(m), side="right")]
 
 
-def selection_ranking(population, costs):
+@njit(cache=True)
+def selection_ranking(costs, m):
     """
     RANKINGOWA (Ranking selection)
     ------------------------------
-    - sortujemy osobniki wg kosztu
+    - sortujemy osobniki wg kosztu (raz na pokolenie)
     - im wyższa pozycja w rankingu, tym większa szansa na wybór
     """
-    order = np.argsort(costs)
-    # Odwracamy rangi: najlepszy (pierwszy w order) dostaje N, najgorszy 1.
-    ranks = np.arange(len(population), 0, -1)
-    probs = ranks / ranks.sum()
-    idx = np.random.choice(len(population), p=probs)
-    return population[order[idx]]
+    return _ranking_pick(costs, m, _ranking_cum(len(costs)))
 
 
 SELECTION_MAP = {
@@ -72,7 +110,61 @@ SELECTION_MAP = {
 
 
 # KRZYŻOWANIA
-def crossover_OX(p1, p2):
+# Operatory krzyżowania są kompilowane przez Numba — operują wyłącznie
+# na wierszach macierzy populacji (int16 / int32), a pusty gen oznaczamy przez -1.
+# Potomek zapisywany jest bezpośrednio do przekazanego wiersza (child),
+# czyli do bufora nowego pokolenia — bez alokacji tablicy na każdego potomka.
+@njit(cache=True)
+def _draw_cuts(m, n):
+    """
+    Losuje naraz m par różnych punktów przecięcia i < j (po jednej parze
+    na potomka) — odpowiednik m wywołań sorted(random.sample(range(n), 2)).
+    """
+    cuts = np.empty((m, 2), dtype=np.int64)
+    for t in range(m):
+        i = np.random.randint(0, n)
+        j = np.random.randint(0, n - 1)
+        if j >= i:
+            j += 1
+        if i > j:
+            i, j = j, i
+        cuts[t, 0] = i
+        cuts[t, 1] = j
+    return cuts
+
+
+@njit(cache=True)
+def _fill_inverse(route, pos):
+    """
+    Wypełnia pos odwrotną permutacją trasy: pos[c] = pozycja miasta c w route
+    (odpowiednik route.index(c) dla wszystkich miast naraz, O(n)).
+    """
+    for k in range(len(route)):
+        pos[route[k]] = k
+
+
+@njit(cache=True)
+def _inverse_permutation(route):
+    """
+    Jak _fill_inverse, ale alokuje nową tablicę pos.
+    """
+    pos = np.empty(len(route), dtype=np.int32)
+    _fill_inverse(route, pos)
+    return pos
+
+
+@njit(parallel=True, cache=True)
+def _inverse_rows(population, inv):
+    """
+    Wypełnia inv[r] odwrotną permutacją wiersza population[r]
+    (dla całej populacji, równolegle).
+    """
+    for r in prange(population.shape[0]):
+        _fill_inverse(population[r], inv[r])
+
+
+@njit(cache=True)
+def crossover_OX(p1, p2, i, j, child):
     """
     OX - ORDER CROSSOVER (Krzyżowanie uporządkowane)
     ================================================
@@ -85,26 +177,34 @@ def crossover_OX(p1, p2):
        od pozycji po drugim punkcie przecięcia (cyklicznie). Pomijamy te miasta,
        które już znalazły się w potomku (z segmentu P1).
 
+    Punkty przecięcia i < j są losowane wcześniej, dla całego pokolenia naraz.
+
     CEL: Zachowanie podciągów z P1 oraz względnej kolejności pozostałych miast z P2.
     """
     n = len(p1)
-    i, j = sorted(random.sample(range(n), 2))
 
-    child = [None] * n
+    child[:] = -1
     child[i:j] = p1[i:j]
 
+    # present[c] = True jeśli miasto c jest już w potomku (test O(1) zamiast "in")
+    present = np.zeros(n, dtype=np.bool_)
+    for k in range(i, j):
+        present[p1[k]] = True
+
     pos = j
     for city in p2:
-        if city not in child:
+        if not present[city]:
             if pos == n:
                 pos = 0
             child[pos] = city
+            present[city] = True
             pos += 1
 
     return child
 
 
-def crossover_PMX(p1, p2):
+@njit(cache=True)
+def crossover_PMX(p1, p2, i, j, p2_pos, child):
     """
     PMX - PARTIALLY MATCHED CROSSOVER (Częściowe dopasowanie)
     =========================================================
@@ -120,29 +220,38 @@ def crossover_PMX(p1, p2):
        gdzie trafiłby element, który je "wypchnął".
 
     CEL: Dziedziczenie absolutnych pozycji miast z możliwością "przesunięcia" w ramach mapowania.
+
+    Punkty przecięcia i < j są losowane wcześniej, dla całego pokolenia naraz.
     """
     n = len(p1)
-    i, j = sorted(random.sample(range(n), 2))
 
-    child = [None] * n
+    child[:] = -1
     child[i:j] = p1[i:j]
 
+    # present[c] - czy miasto c jest już w potomku
+    # p2_pos[c]  - pozycja miasta c w P2 (odwrotna permutacja, zamiast p2.index)
+    present = np.zeros(n, dtype=np.bool_)
     for k in range(i, j):
-        if p2[k] not in child:
+        present[p1[k]] = True
+
+    for k in range(i, j):
+        if not present[p2[k]]:
             val = p2[k]
             pos = k
-            while child[pos] is not None:
-                pos = p2.index(p1[pos])
+            while child[pos] != -1:
+                pos = p2_pos[p1[pos]]
             child[pos] = val
+            present[val] = True
 
     for k in range(n):
-        if child[k] is None:
+        if child[k] == -1:
             child[k] = p2[k]
 
     return child
 
 
-def crossover_CX(p1, p2):
+@njit(cache=True)
+def crossover_CX(p1, p2, p1_pos, child):
     """
     CX - CYCLE CROSSOVER (Krzyżowanie cykliczne)
     ============================================
@@ -159,18 +268,17 @@ def crossover_CX(p1, p2):
     Potomek składa się z "puzzli" wyjętych wprost z rodziców bez przesuwania.
     """
     n = len(p1)
-    child = [None] * n
 
-    cycle = []
+    # p1_pos[c] - pozycja miasta c w P1 (odwrotna permutacja, zamiast p1.index)
+    # in_cycle[k] - czy pozycja k należy do pierwszego cyklu
+    in_cycle = np.zeros(n, dtype=np.bool_)
     idx = 0
-    while True:
-        cycle.append(idx)
-        idx = p1.index(p2[idx])
-        if idx in cycle:
-            break
+    while not in_cycle[idx]:
+        in_cycle[idx] = True
+        idx = p1_pos[p2[idx]]
 
     for i in range(n):
-        if i in cycle:
+        if in_cycle[i]:
             child[i] = p1[i]
         else:
             child[i] = p2[i]
@@ -187,24 +295,237 @@ CROSSOVER_MAP = {
 
 # MUTACJE
 # Mutacja = wykonanie JEDNEGO ruchu sąsiedztwa
-# korzystamy z gotowych operatorów:
+# korzystamy z gotowych operatorów z liczeniem przyrostowym (delta):
+#
+# propose_move_delta(D, route, fn_id, cand, pos) - losuje ruch i liczy deltę
+# apply_move_inplace(route, i, j, fn_id, pos)    - wykonuje ruch na potomku
+# (fn_id: 0 - swap, 1 - two_opt, 2 - insert)
 #
-# get_neighbor_function("swap")    - neighbor_swap(route)
-# get_neighbor_function("insert")  - neighbor_insert(route)
-# get_neighbor_function("two_opt") - neighbor_two_opt(route)
+# Przy niepustej liście kandydatów (cand) drugi koniec ruchu wybierany
+# jest spośród k najbliższych sąsiadów miasta, zamiast z całej trasy.
 #
 # Ruch wykorzystywany jako mutacja to dokładnie to samo,
 # co "generowanie sąsiada" w SA / TS / IHC.
-
-
-def apply_mutation(route_list, mutation_type):
+#
+# Operator zwraca deltę kosztu (zmiana kilku krawędzi), więc koszt
+# zmutowanej trasy to koszt sprzed mutacji + delta — po mutacji nie
+# trzeba przeliczać całej trasy od nowa.
+
+
+# NUMBA — generowanie potomstwa całego pokolenia
+@njit(parallel=True, cache=True)
+def produce_generation(
+    distance_matrix,
+    population,
+    inv,
+    parents,
+    new_pop,
+    new_inv,
+    new_costs,
+    cuts,
+    mutate,
+    mut_seeds,
+    crossover_id,
+    mutation_id,
+    cand,
+):
     """
-    Odpowiada za wykonanie mutacji używając Twoich gotowych operatorów.
+    Tworzy wszystkich potomków pokolenia (pozycje 1..pop_size-1, pozycja 0
+    to elita). Każdy potomek powstaje niezależnie od pozostałych, więc pętla
+    jest rozdzielana na wątki przez numba.prange.
+
+    Parametry:
+        distance_matrix : np.ndarray (n x n)
+        population : np.ndarray (pop_size x n) - bieżące pokolenie
+        inv : np.ndarray int32 (pop_size x n) - odwrotne permutacje wierszy population
+              (używane tylko przez PMX / CX; dla OX pusta tablica (pop_size x 0))
+        parents : np.ndarray (2 * (pop_size - 1)) - indeksy wylosowanych rodziców
+        new_pop : np.ndarray (pop_size x n) - bufor na nowe pokolenie
+        new_inv : np.ndarray int32 - bufor na odwrotne permutacje nowego pokolenia
+        new_costs : np.ndarray (pop_size) - bufor na koszty nowego pokolenia
+        cuts : np.ndarray (pop_size - 1 x 2) - punkty przecięcia i < j dla potomków
+        mutate : np.ndarray bool (pop_size - 1) - czy dany potomek jest mutowany
+        mut_seeds : np.ndarray int64 (pop_size - 1) - ziarna generatora dla mutacji
+                    potomków (ustawiane w wątku, który mutuje, więc wynik nie
+                    zależy od liczby wątków)
+        crossover_id : int
+            0 - OX
+            1 - PMX
+            2 - CX
+        mutation_id : int
+            0 - swap
+            1 - two_opt
+            2 - insert
+        cand : np.ndarray int32 (n x k) - lista kandydatów dla mutacji
+               (pusta (n x 0) → ruch losowany z całej trasy)
+    """
+    pop_size = population.shape[0]
+
+    for k in prange(1, pop_size):
+        a = parents[2 * k - 2]
+        b = parents[2 * k - 1]
+        p1 = population[a]
+        p2 = population[b]
+        i = cuts[k - 1, 0]
+        j = cuts[k - 1, 1]
+
+        # potomek budowany bezpośrednio w wierszu bufora nowego pokolenia
+        child = new_pop[k]
+
+        # krzyżowanie (PMX / CX korzystają z gotowych odwrotnych permutacji rodziców)
+        if crossover_id == 0:
+            crossover_OX(p1, p2, i, j, child)
+        elif crossover_id == 1:
+            crossover_PMX(p1, p2, i, j, inv[b], child)
+        else:
+            crossover_CX(p1, p2, inv[a], child)
+
+        # pełny koszt liczymy tylko raz — dla świeżo skrzyżowanego potomka
+        cost = route_length_fast(distance_matrix, child)
+
+        # mutacja — koszt aktualizowany przyrostowo (delta)
+        # (ruch wykonujemy w miejscu, na wierszu new_pop[k])
+        if mutate[k - 1]:
+            np.random.seed(mut_seeds[k - 1])
+            if cand.shape[1] > 0:
+                pos = _inverse_permutation(child)
+            else:
+                pos = np.empty(0, dtype=np.int32)
+            i, j, delta = propose_move_delta(
+                distance_matrix, child, mutation_id, cand, pos
+            )
+            apply_move_inplace(child, i, j, mutation_id, pos)
+            cost += delta
+
+        new_costs[k] = cost
+
+        # odwrotną permutację liczymy raz na osobnika — rodzic wylosowany
+        # wielokrotnie w następnym pokoleniu korzysta z tej samej tablicy
+        if crossover_id != 0:
+            _fill_inverse(child, new_inv[k])
+
+
+# NUMBA — cała pętla pokoleń
+@njit(cache=True)
+def evolve(
+    distance_matrix,
+    population,
+    costs,
+    inv,
+    generations,
+    selection_id,
+    crossover_id,
+    mutation_id,
+    mutation_prob,
+    cand,
+):
+    """
+    Wykonuje wszystkie pokolenia GA w jednym wywołaniu skompilowanej
+    funkcji: selekcja, losowania, krzyżowanie + mutacja (produce_generation)
+    i elitaryzm. Operatory wybierane są przez identyfikatory liczbowe,
+    więc sygnatura jest stała, a w pętli nie ma wywołań Pythona.
+
+    Parametry:
+        distance_matrix : np.ndarray (n x n)
+        population : np.ndarray (pop_size x n) - populacja początkowa
+        costs : np.ndarray (pop_size) - koszty populacji początkowej
+        inv : np.ndarray int32 - odwrotne permutacje (pop_size x n lub pop_size x 0)
+        generations : int
+        selection_id : int
+            0 - tournament
+            1 - roulette
+            2 - ranking
+        crossover_id : int (0 - OX, 1 - PMX, 2 - CX)
+        mutation_id : int (0 - swap, 1 - two_opt, 2 - insert)
+        mutation_prob : float
+        cand : np.ndarray int32 (n x k) - lista kandydatów dla mutacji
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
     """
-    route_np = np.array(route_list)
-    mut_fn = get_neighbor_function(mutation_type)
-    new_route = mut_fn(route_np)  # operator Numbo-Python
-    return new_route.tolist()
+
+    # osobna (cache'owana) kompilacja dla każdego operatora mutacji —
+    # mutation_id jest wtedy stałą w produce_generation i operatorach ruchu
+    literally(mutation_id)
+
+    pop_size, n = population.shape
+    m = 2 * (pop_size - 1)
+
+    # dystrybuanta rankingu zależy tylko od pop_size — liczymy ją raz
+    rank_cum = _ranking_cum(pop_size)
+
+    best_idx = np.argmin(costs)
+    best_route = population[best_idx].copy()
+    best_cost = costs[best_idx]
+    best_inv = inv[best_idx].copy()
+
+    # drugi komplet buforów (podwójne buforowanie) — nowe pokolenie zapisujemy
+    # do bufora "new_*", a po pokoleniu zamieniamy referencje zamiast alokować
+    new_pop = np.empty_like(population)
+    new_costs = np.empty_like(costs)
+    new_inv = np.empty_like(inv)
+
+    for _ in range(generations):
+
+        # elita
+        new_pop[0] = best_route
+        new_costs[0] = best_cost
+        new_inv[0] = best_inv
+
+        # selekcja rodziców dla całego pokolenia (po 2 na potomka)
+        if selection_id == 0:
+            parents = selection_tournament(costs, m)
+        elif selection_id == 1:
+            parents = selection_roulette(costs, m)
+        else:
+            parents = _ranking_pick(costs, m, rank_cum)
+
+        # para z tym samym rodzicem dałaby kopię rodzica (puste krzyżowanie),
+        # więc drugiego rodzica przesuwamy na kolejny indeks w populacji
+        for t in range(0, m, 2):
+            if parents[t] == parents[t + 1]:
+                parents[t + 1] = (parents[t + 1] + 1) % pop_size
+
+        # losowania dla całego pokolenia: punkty przecięcia, maska mutacji
+        # i ziarna mutacji (ruch losują już wątki robocze prange); wątek
+        # wywołujący też wykonuje część iteracji prange i jest w nich
+        # przeziarniany, więc po pokoleniu wraca do ziarna next_seed
+        cuts = _draw_cuts(pop_size - 1, n)
+        mutate = np.random.random(pop_size - 1) < mutation_prob
+        mut_seeds = np.random.randint(0, 2**31 - 1, pop_size - 1)
+        next_seed = np.random.randint(0, 2**31 - 1)
+
+        # krzyżowanie + mutacja (równolegle)
+        produce_generation(
+            distance_matrix,
+            population,
+            inv,
+            parents,
+            new_pop,
+            new_inv,
+            new_costs,
+            cuts,
+            mutate,
+            mut_seeds,
+            crossover_id,
+            mutation_id,
+            cand,
+        )
+        np.random.seed(next_seed)
+
+        population, new_pop = new_pop, population
+        costs, new_costs = new_costs, costs
+        inv, new_inv = new_inv, inv
+
+        # aktualizacja najlepszego
+        idx = np.argmin(costs)
+        if costs[idx] < best_cost:
+            best_cost = costs[idx]
+            best_route[:] = population[idx]
+            best_inv[:] = inv[idx]
+
+    return best_route, best_cost
 
 
 # GŁÓWNA FUNKCJA GA
@@ -225,8 +546,14 @@ def solve_tsp(distance_matrix, params):
         meta       : parametry wykonania
     """
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.time()
 
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    distance_matrix = compact_distance_matrix(distance_matrix)
+
     n = distance_matrix.shape[0]
 
     # parametry
@@ -236,54 +563,54 @@ def solve_tsp(distance_matrix, params):
     crossover_name = params.get("crossover", "OX")
     mutation_type = params.get("mutation_type", "swap")
     mutation_prob = float(params.get("mutation_prob", 0.1))
+    candidate_k = int(params.get("candidate_k", 0))
 
-    select_fn = SELECTION_MAP[selection_name]
-    cross_fn = CROSSOVER_MAP[crossover_name]
+    # mapowanie nazw operatorów na liczby (kompatybilne z Numba) —
+    # wybór operatorów odbywa się raz, pętla pokoleń dostaje tylko id
+    selection_map = {"tournament": 0, "roulette": 1, "ranking": 2}
+    crossover_map = {"OX": 0, "PMX": 1, "CX": 2}
+    neighborhood_map = {"swap": 0, "two_opt": 1, "insert": 2}
+    selection_id = selection_map[selection_name]
+    crossover_id = crossover_map[crossover_name]
+    mutation_id = neighborhood_map[mutation_type]
+
+    # lista kandydatów dla mutacji (k najbliższych miast), liczona raz
+    cand = nearest_candidates(distance_matrix, candidate_k)
 
     # inicjalizacja populacji
-    # Algorytm tworzy listę pop_size losowych permutacji (tras),
-    population = [list(np.random.permutation(n)) for _ in range(pop_size)]
-    costs = np.array(
-        [route_length_fast(distance_matrix, np.array(r)) for r in population]
+    # Populacja to macierz (pop_size x n) — każdy wiersz jest losową permutacją (trasą).
+    # Wszystkie permutacje tworzymy naraz (rng.permuted po osi wierszy),
+    # a koszty całej populacji liczymy jednym wywołaniem route_length_batch.
+    # Trasy trzymamy w najmniejszym typie mieszczącym indeksy miast (int16
+    # dla n <= 32767), co zmniejsza macierz populacji o połowę względem int32.
+    # Koszty zostają w float64 — sumy długości tras porównujemy dokładnie.
+    route_dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+    rng = np.random.default_rng(params.get("seed"))
+    population = rng.permuted(
+        np.tile(np.arange(n, dtype=route_dtype), (pop_size, 1)), axis=1
     )
-
-    best_idx = np.argmin(costs)
-    best_route = population[best_idx].copy()
-    best_cost = float(costs[best_idx])
-
-    # PĘTLA GŁÓWNA GA
-    for _ in range(generations):
-
-        new_pop = []
-
-        # elita
-        new_pop.append(best_route.copy())
-
-        # generowanie potomstwa
-        while len(new_pop) < pop_size:
-            # selekcja rodziców
-            p1 = select_fn(population, costs)
-            p2 = select_fn(population, costs)
-
-            # krzyżowanie
-            child = cross_fn(p1, p2)
-
-            # mutacja
-            if random.random() < mutation_prob:
-                child = apply_mutation(child, mutation_type)
-
-            new_pop.append(child)
-
-        population = new_pop
-        costs = np.array(
-            [route_length_fast(distance_matrix, np.array(r)) for r in population]
-        )
-
-        # aktualizacja najlepszego
-        idx = np.argmin(costs)
-        if costs[idx] < best_cost:
-            best_cost = float(costs[idx])
-            best_route = population[idx].copy()
+    costs = route_length_batch(distance_matrix, population).astype(np.float64)
+
+    # odwrotne permutacje osobników (pozycja miasta w trasie) dla PMX / CX,
+    # przechowywane obok populacji i przeliczane tylko dla nowych potomków
+    inv = np.empty((pop_size, n if crossover_id != 0 else 0), dtype=np.int32)
+    if crossover_id != 0:
+        _inverse_rows(population, inv)
+
+    # PĘTLA GŁÓWNA GA (w całości w Numba)
+    best_route, best_cost = evolve(
+        distance_matrix,
+        population,
+        costs,
+        inv,
+        generations,
+        selection_id,
+        crossover_id,
+        mutation_id,
+        mutation_prob,
+        cand,
+    )
+    best_cost = float(best_cost)
 
     runtime = time.time() - start_time
 
@@ -294,6 +621,7 @@ def solve_tsp(distance_matrix, params):
         "crossover": crossover_name,
         "mutation_type": mutation_type,
         "mutation_prob": mutation_prob,
+        "candidate_k": candidate_k,
     }
 
     return best_route, best_cost, runtime, meta
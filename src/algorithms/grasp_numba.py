@@ -1,7 +1,11 @@
 import numpy as np
 import time
+from numba import njit
+from src.utils.distance import compact_distance_matrix
 
 from src.algorithms.ihc_numba import hill_climb_delta_numba, hill_climb_numba
+from src.utils.neighborhoods_numba_delta import nearest_candidates
+from src.utils.rng import seed_rng
 
 # ALGORYTM GRASP — GREEDY RANDOMIZED ADAPTIVE SEARCH PROCEDURE
 # ---------------------------------------------------------------
@@ -33,10 +37,13 @@ from src.algorithms.ihc_numba import hill_climb_delta_numba, hill_climb_numba
 # ---------------------------------------------------------------
 
 # FAZA KONSTRUKCJI GRASP
+@njit(cache=True)
 def grasp_construct(distance_matrix, alpha):
     """
-    Konstrukcja greedy-randomized używana w GRASP.
-    Nie jest w Numba ponieważ listy, sortowania itd. są niekompatybilne.
+    Konstrukcja greedy-randomized używana w GRASP (wersja Numba).
+    Nieodwiedzone miasta trzymamy w gęstej tablicy free[:m]; usunięcie
+    miasta to zamiana z ostatnim elementem (swap-remove, O(1)), a bufor
+    na kandydatów RCL alokujemy raz na całą konstrukcję.
 
     Parametry:
         distance_matrix : np.ndarray (n x n)
@@ -44,42 +51,67 @@ def grasp_construct(distance_matrix, alpha):
 
     Zwraca:
         route : np.ndarray - trasa startowa
+        cost : float - długość trasy, sumowana w trakcie konstrukcji
+                       (bez osobnego przejścia route_length_fast)
     """
 
     n = distance_matrix.shape[0]
     route = np.empty(n, dtype=np.int64)
 
-    # miasta nieodwiedzone
-    remaining = list(range(n))
+    # miasta nieodwiedzone: free[:m]
+    free = np.arange(n)
+    m = n
+
+    # bufor na kandydatów RCL (pozycje w free)
+    rcl = np.empty(n, dtype=np.int64)
 
     # start w losowym mieście
-    current = np.random.randint(0, n)
+    start = np.random.randint(0, n)
+    current = free[start]
+    free[start] = free[m - 1]
+    m -= 1
     route[0] = current
-    remaining.remove(current)
+
+    # długość trasy liczona na bieżąco z wybranych krawędzi
+    cost = 0.0
 
     # budowa trasy
     for idx in range(1, n):
 
-        # dystanse do kandydatów
-        dists = np.array([distance_matrix[current, c] for c in remaining])
+        # min / max dystansu do nieodwiedzonych kandydatów (jedno przejście)
+        min_d = np.inf
+        max_d = -np.inf
+        for t in range(m):
+            d = distance_matrix[current, free[t]]
+            if d < min_d:
+                min_d = d
+            if d > max_d:
+                max_d = d
 
-        min_d = dists.min()
-        max_d = dists.max()
         threshold = min_d + alpha * (max_d - min_d)
 
         # RCL – kandydaci <= próg
-        rcl_indices = np.where(dists <= threshold)[0]
-
-        # losowy wybór z RCL
-        chosen_idx = np.random.choice(rcl_indices)
-        chosen_city = remaining[chosen_idx]
+        rcl_size = 0
+        for t in range(m):
+            if distance_matrix[current, free[t]] <= threshold:
+                rcl[rcl_size] = t
+                rcl_size += 1
+
+        # losowy wybór z RCL i usunięcie miasta z free (swap-remove)
+        chosen_pos = rcl[np.random.randint(0, rcl_size)]
+        chosen_city = free[chosen_pos]
+        free[chosen_pos] = free[m - 1]
+        m -= 1
 
         route[idx] = chosen_city
-        remaining.pop(chosen_idx)
+        cost += distance_matrix[current, chosen_city]
 
         current = chosen_city
 
-    return route
+    # domknięcie cyklu
+    cost += distance_matrix[current, route[0]]
+
+    return route, cost
 
 def solve_tsp(distance_matrix, params):
     """
@@ -114,6 +146,13 @@ def solve_tsp(distance_matrix, params):
                 Jeśli True → hill_climb_delta_numba
                 Jeśli False → hill_climb_numba
 
+            'candidate_k' : int
+                Liczba najbliższych sąsiadów w liście kandydatów dla
+                local search (0 → ruchy losowane z całej trasy).
+
+            'seed' : int | None
+                Ziarno generatorów losowych (powtarzalny przebieg).
+
     Zwraca:
         best_route : np.ndarray
         best_cost : float
@@ -121,8 +160,14 @@ def solve_tsp(distance_matrix, params):
         meta : dict
     """
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.time()
 
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    distance_matrix = compact_distance_matrix(distance_matrix)
+
     # odczyt parametrów
     alpha = float(params.get("alpha", 0.3))
     iterations = int(params.get("iterations", 100))
@@ -130,13 +175,14 @@ def solve_tsp(distance_matrix, params):
     ihc_max_iter = int(params.get("ihc_max_iter", 300))
     ihc_stop_no_improve = int(params.get("ihc_stop_no_improve", 100))
     use_delta = params.get("use_delta", True)
+    candidate_k = int(params.get("candidate_k", 0))
 
     # mapowanie nazw ruchów na liczby (kompatybilne z Numba dla ihs)
     neighborhood_map = {"swap": 0, "two_opt": 1, "insert": 2}
     neighbor_fn_id = neighborhood_map.get(neighborhood_type, 0)
 
-    # wybór funkcji LS (delta / full), obcnie na sztywno ihs
-    hill_climb_fn = hill_climb_delta_numba if use_delta else hill_climb_numba
+    # lista kandydatów liczona raz dla instancji (pusta przy candidate_k = 0)
+    cand = nearest_candidates(distance_matrix, candidate_k)
 
     best_route = None
     best_cost = np.inf
@@ -145,16 +191,27 @@ def solve_tsp(distance_matrix, params):
     for _ in range(iterations):
 
         # (1) KONSTRUKCJA GREEDY + RANDOM
-        route0 = grasp_construct(distance_matrix, alpha)
-
-        # (2) LOCAL SEARCH – IHC-light
-        local_route, local_cost = hill_climb_fn(
-            distance_matrix,
-            route0,
-            ihc_max_iter,
-            ihc_stop_no_improve,
-            neighbor_fn_id
-        )
+        route0, cost0 = grasp_construct(distance_matrix, alpha)
+
+        # (2) LOCAL SEARCH – IHC-light (delta / full)
+        if use_delta:
+            local_route, local_cost = hill_climb_delta_numba(
+                distance_matrix,
+                route0,
+                cost0,
+                ihc_max_iter,
+                ihc_stop_no_improve,
+                neighbor_fn_id,
+                cand
+            )
+        else:
+            local_route, local_cost = hill_climb_numba(
+                distance_matrix,
+                route0,
+                ihc_max_iter,
+                ihc_stop_no_improve,
+                neighbor_fn_id
+            )
 
         # aktualizacja najlepszego wyniku
         if local_cost < best_cost:
@@ -172,6 +229,7 @@ def solve_tsp(distance_matrix, params):
         "ihc_max_iter": ihc_max_iter,
         "ihc_stop_no_improve": ihc_stop_no_improve,
         "use_delta": use_delta,
+        "candidate_k": candidate_k,
     }
 
     return best_route, best_cost, runtime, meta
\ No newline at end of file
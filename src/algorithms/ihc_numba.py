@@ -1,9 +1,14 @@
 import numpy as np
 import time
-from numba import njit
-from src.utils.distance import route_length_fast
-from src.utils.neighborhoods_numba import neighbor_cost_numba
-from src.utils.neighborhoods_numba_delta import neighbor_cost_delta_numba
+from numba import get_num_threads, literally, njit, prange
+from src.utils.distance import compact_distance_matrix, route_length_fast
+from src.utils.neighborhoods_numba import neighbor_cost_into
+from src.utils.neighborhoods_numba_delta import (
+    apply_move_inplace,
+    nearest_candidates,
+    propose_move_delta,
+)
+from src.utils.rng import kernel_seeds, seed_rng
 
 # ALGORYTM IHC — ITERATIVE HILL CLIMBING
 # ---------------------------------------
@@ -65,9 +70,36 @@ def hill_climb_numba(distance_matrix, route, max_iter, stop_no_improve, neighbor
             Koszt tej trasy.
     """
 
+    # osobna (cache'owana) kompilacja dla każdego operatora sąsiedztwa —
+    # neighbor_fn_id jest wtedy stałą i gałęzie po nim znikają z pętli
+    literally(neighbor_fn_id)
+
     # ustawienie bieżącego rozwiązania jako startowego
     best_route = route.copy()
+
+    # bufor na sąsiada — dwie tablice zamieniane miejscami przy akceptacji,
+    # więc w pętli nie alokujemy żadnej nowej trasy
+    candidate = np.empty_like(best_route)
+
+    best_cost = _hill_climb_into(
+        distance_matrix, best_route, candidate, max_iter, stop_no_improve, neighbor_fn_id
+    )
+
+    return best_route, best_cost
+
+
+@njit(cache=True)
+def _hill_climb_into(
+    distance_matrix, route, candidate, max_iter, stop_no_improve, neighbor_fn_id
+):
+    """
+    Rdzeń hill_climb_numba działający na buforach wywołującego:
+    route (trasa startowa, na końcu najlepsza trasa) oraz candidate
+    (bufor roboczy na sąsiada). Nic nie alokuje, zwraca koszt trasy.
+    """
+    best_route = route
     best_cost = route_length_fast(distance_matrix, best_route)
+    swapped = False
 
     # licznik iteracji bez poprawy
     no_improve = 0
@@ -77,14 +109,15 @@ def hill_climb_numba(distance_matrix, route, max_iter, stop_no_improve, neighbor
 
         # wygenerowanie sąsiada bieżącego rozwiązania
         # Jest to zależne od neighbor_fn_id, czyli metody jaka została wybrana do dobierania sąsiada
-        candidate, candidate_cost = neighbor_cost_numba(
-            distance_matrix, best_route, neighbor_fn_id
+        candidate_cost = neighbor_cost_into(
+            distance_matrix, best_route, candidate, neighbor_fn_id
         )
 
         # jeśli sąsiad jest lepszy to przechodzimy do niego
         if candidate_cost < best_cost:
             best_cost = candidate_cost
-            best_route = candidate
+            best_route, candidate = candidate, best_route
+            swapped = not swapped
             no_improve = 0
         else:
             # jeśli brak poprawy to zwiększamy licznik stagnacji
@@ -94,12 +127,16 @@ def hill_climb_numba(distance_matrix, route, max_iter, stop_no_improve, neighbor
         if no_improve >= stop_no_improve:
             break
 
-    return best_route, best_cost
+    # po nieparzystej liczbie zamian najlepsza trasa leży w buforze candidate
+    if swapped:
+        route[:] = best_route
+
+    return best_cost
 
 
 @njit(cache=True)
 def hill_climb_delta_numba(
-    distance_matrix, route, max_iter, stop_no_improve, neighbor_fn_id
+    distance_matrix, route, route_cost, max_iter, stop_no_improve, neighbor_fn_id, cand
 ):
     """
     Hill Climb (wersja przyspieszona przez Numba)
@@ -120,6 +157,11 @@ def hill_climb_delta_numba(
             Trasa startowa, będąca permutacją indeksów miast.
             Jest to punkt wyjścia dla lokalnego przeszukiwania.
 
+        route_cost : float
+            Długość trasy startowej (znana już z konstrukcji lub policzona
+            raz przez wywołującego) — dalej koszt utrzymujemy wyłącznie
+            przez delty.
+
         max_iter : int
             Maksymalna liczba iteracji algorytmu.
 
@@ -133,6 +175,10 @@ def hill_climb_delta_numba(
               1 - two-opt
               2 - insert
 
+        cand : np.ndarray int32 (n x k)
+            Lista k najbliższych sąsiadów każdego miasta (nearest_candidates).
+            Pusta (n x 0) oznacza losowanie ruchów z całej trasy.
+
     Zwraca:
         best_route : np.ndarray
             Najlepsza znaleziona trasa.
@@ -140,9 +186,44 @@ def hill_climb_delta_numba(
             Koszt tej trasy.
     """
 
+    # specjalizacja pod operator sąsiedztwa (jak w hill_climb_numba)
+    literally(neighbor_fn_id)
+
     # ustawienie bieżącego rozwiązania jako startowego
     best_route = route.copy()
-    best_cost = route_length_fast(distance_matrix, best_route)
+
+    # pozycje miast w trasie – potrzebne tylko przy liście kandydatów
+    n = len(best_route)
+    pos = np.empty(n if cand.shape[1] > 0 else 0, dtype=np.int32)
+
+    best_cost = _hill_climb_delta_into(
+        distance_matrix,
+        best_route,
+        route_cost,
+        max_iter,
+        stop_no_improve,
+        neighbor_fn_id,
+        cand,
+        pos,
+    )
+
+    return best_route, best_cost
+
+
+@njit(cache=True)
+def _hill_climb_delta_into(
+    distance_matrix, route, route_cost, max_iter, stop_no_improve, neighbor_fn_id, cand, pos
+):
+    """
+    Rdzeń hill_climb_delta_numba: ruchy wykonywane są w miejscu na route,
+    a pos to bufor wywołującego na odwrotną permutację (pusty, gdy nie
+    ma listy kandydatów). Nic nie alokuje, zwraca koszt końcowej trasy.
+    """
+    best_route = route
+    best_cost = route_cost
+
+    for k in range(pos.shape[0]):
+        pos[best_route[k]] = k
 
     # licznik iteracji bez poprawy
     no_improve = 0
@@ -150,16 +231,16 @@ def hill_climb_delta_numba(
     # główna pętla wspinaczki lokalnej
     for _ in range(max_iter):
 
-        # wygenerowanie sąsiada bieżącego rozwiązania
+        # wylosowanie ruchu i obliczenie samej delty kosztu (O(1))
         # Jest to zależne od neighbor_fn_id, czyli metody jaka została wybrana do dobierania sąsiada
-        candidate, candidate_cost = neighbor_cost_delta_numba(
-            distance_matrix, best_route, best_cost, neighbor_fn_id
+        i, j, delta = propose_move_delta(
+            distance_matrix, best_route, neighbor_fn_id, cand, pos
         )
 
-        # jeśli sąsiad jest lepszy to przechodzimy do niego
-        if candidate_cost < best_cost:
-            best_cost = candidate_cost
-            best_route = candidate
+        # jeśli sąsiad jest lepszy to wykonujemy ruch w miejscu (bez kopii trasy)
+        if delta < 0:
+            apply_move_inplace(best_route, i, j, neighbor_fn_id, pos)
+            best_cost += delta
             no_improve = 0
         else:
             # jeśli brak poprawy to zwiększamy licznik stagnacji
@@ -169,7 +250,90 @@ def hill_climb_delta_numba(
         if no_improve >= stop_no_improve:
             break
 
-    return best_route, best_cost
+    # koszt był aktualizowany przyrostowo (suma delt), więc na koniec
+    # przeliczamy go raz dokładnie, żeby nie kumulować błędów zaokrągleń
+    best_cost = route_length_fast(distance_matrix, best_route)
+
+    return best_cost
+
+
+
+# NUMBA — równoległe restarty IHC
+@njit(parallel=True, cache=True)
+def ihc_parallel(
+    distance_matrix,
+    starts,
+    max_iter,
+    stop_no_improve,
+    neighbor_fn_id,
+    use_delta,
+    cand,
+    n_threads,
+    seeds,
+):
+    """
+    Uruchamia wszystkie wspinaczki równolegle (numba.prange).
+    seeds[s] to ziarno generatora dla restartu s (rng.kernel_seeds) —
+    ustawiane przed restartem, więc wynik nie zależy od liczby wątków.
+    starts to macierz (n_starts x n) tras startowych. Restarty dzielimy
+    między n_threads wątków (numba.get_num_threads() po stronie Pythona —
+    wywołanie wewnątrz kernela blokuje cache=True); wątek t wykonuje
+    restarty t, t + n_threads, ..., a każdy
+    wątek ma jeden zestaw buforów roboczych (trasa, sąsiad, pozycje miast)
+    alokowany raz przed pętlą i używany we wszystkich jego restartach.
+    Wątek pamięta tylko swój najlepszy wynik, więc pamięć wyników to
+    O(n_threads · n) zamiast O(n_starts · n).
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
+    """
+    # specjalizacja pod operator sąsiedztwa (jak w hill_climb_numba)
+    literally(neighbor_fn_id)
+
+    n_starts, n = starts.shape
+    n_threads = max(1, min(n_threads, n_starts))
+
+    # bufory robocze wątków: [0] trasa, [1] sąsiad (wersja pełna),
+    # [2] pozycje miast (wersja delta z listą kandydatów)
+    scratch = np.empty((n_threads, 3, n), dtype=np.int64)
+    routes = np.empty((n_threads, n), dtype=np.int64)
+    costs = np.full(n_threads, np.inf)
+
+    for t in prange(n_threads):
+        buf_a = scratch[t, 0]
+        buf_b = scratch[t, 1]
+        pos = scratch[t, 2, : (n if cand.shape[1] > 0 else 0)]
+
+        for s in range(t, n_starts, n_threads):
+
+            # trasa startowa i ziarno bieżącego uruchomienia HC
+            buf_a[:] = starts[s]
+            np.random.seed(seeds[s])
+
+            # uruchomienie pojedynczej wspinaczki na buforach wątku
+            if use_delta:
+                local_cost = _hill_climb_delta_into(
+                    distance_matrix,
+                    buf_a,
+                    route_length_fast(distance_matrix, buf_a),
+                    max_iter,
+                    stop_no_improve,
+                    neighbor_fn_id,
+                    cand,
+                    pos,
+                )
+            else:
+                local_cost = _hill_climb_into(
+                    distance_matrix, buf_a, buf_b, max_iter, stop_no_improve, neighbor_fn_id
+                )
+
+            if local_cost < costs[t]:
+                costs[t] = local_cost
+                routes[t] = buf_a
+
+    best = np.argmin(costs)
+    return routes[best].copy(), costs[best]
 
 
 # GŁÓWNA FUNKCJA ROZWIĄZUJĄCA TSP
@@ -199,6 +363,14 @@ def solve_tsp(distance_matrix, params):
                   Po jego osiągnięciu aktualna wspinaczka jest kończona.
               'neighborhood_type' : typ operatora sąsiedztwa (str),
                   jeden z: "swap", "two_opt", "insert".
+              'use_delta' : czy używać wspinaczki z ewaluacją delta (bool,
+                  domyślnie True). False uruchamia wersję z pełnym
+                  przeliczaniem kosztu (hill_climb_numba).
+              'candidate_k' : liczba najbliższych sąsiadów w liście kandydatów
+                  (int, domyślnie 0 – ruchy losowane z całej trasy).
+                  Działa tylko z use_delta=True.
+              'seed' : ziarno generatorów losowych (int, domyślnie None –
+                  przebieg losowy).
 
     Zwraca:
         best_route : np.ndarray
@@ -211,7 +383,13 @@ def solve_tsp(distance_matrix, params):
             Słownik z przekazanymi parametrami wykonania.
     """
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.time()
+
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    distance_matrix = compact_distance_matrix(distance_matrix)
     n = distance_matrix.shape[0]
 
     # odczyt parametrów wejściowych oraz wartości domyślnych
@@ -219,7 +397,8 @@ def solve_tsp(distance_matrix, params):
     max_iter = int(params.get("max_iter", 500))
     stop_no_improve = int(params.get("stop_no_improve", 50))
     neighborhood_type = params.get("neighborhood_type", "swap")
-    use_delta = params.get("use_delta", False)
+    use_delta = params.get("use_delta", True)
+    candidate_k = int(params.get("candidate_k", 0))
 
     # zamiana nazwy operatora sąsiedztwa na kod liczbowy dla Numba
     # Numba:
@@ -229,26 +408,26 @@ def solve_tsp(distance_matrix, params):
     neighborhood_map = {"swap": 0, "two_opt": 1, "insert": 2}
     neighbor_fn_id = neighborhood_map.get(neighborhood_type, 0)
 
-    # najlepsze globalne rozwiązanie ze wszystkich restartów
-    best_route = None
-    best_cost = np.inf
-
-    # wielokrotne losowe restarty i uruchomienia HC
-    hill_climb_fn = hill_climb_delta_numba if use_delta is True else hill_climb_numba
-    for _ in range(n_starts):
-
-        # losowa trasa startowa dla bieżącego uruchomienia HC
-        route = np.random.permutation(n)
-
-        # uruchomienie pojedynczej wspinaczki
-        local_route, local_cost = hill_climb_fn(
-            distance_matrix, route, max_iter, stop_no_improve, neighbor_fn_id
-        )
-
-        # aktualizacja najlepszego globalnego rozwiązania
-        if local_cost < best_cost:
-            best_cost = local_cost
-            best_route = local_route.copy()
+    # lista kandydatów liczona raz dla instancji (pusta przy candidate_k = 0)
+    cand = nearest_candidates(distance_matrix, candidate_k)
+
+    # losowe trasy startowe dla wszystkich restartów naraz
+    # (argsort losowej macierzy daje n_starts niezależnych permutacji)
+    starts = np.argsort(np.random.random((n_starts, n)), axis=1)
+
+    # wielokrotne restarty HC — równolegle, wewnątrz Numba
+    best_route, best_cost = ihc_parallel(
+        distance_matrix,
+        starts,
+        max_iter,
+        stop_no_improve,
+        neighbor_fn_id,
+        use_delta is True,
+        cand,
+        get_num_threads(),
+        kernel_seeds(n_starts),
+    )
+    best_cost = float(best_cost)
 
     # obliczenie łącznego czasu działania
     runtime = time.time() - start_time
@@ -259,6 +438,8 @@ def solve_tsp(distance_matrix, params):
         "max_iter": max_iter,
         "stop_no_improve": stop_no_improve,
         "neighborhood_type": neighborhood_type,
+        "use_delta": use_delta,
+        "candidate_k": candidate_k,
     }
 
     return best_route, best_cost, runtime, meta
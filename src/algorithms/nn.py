@@ -1,6 +1,8 @@
 import numpy as np
 import time
-from src.utils.distance import route_length_fast
+from numba import njit
+from src.utils.distance import compact_distance_matrix
+from src.utils.neighborhoods_numba_delta import nearest_candidates
 
 
 # ALGORYTM NAJBLIŻSZEGO SĄSIADA (NEAREST NEIGHBOR - NN)
@@ -12,9 +14,96 @@ from src.utils.distance import route_length_fast
 # powrót do miasta początkowego. Metoda jest szybka i prosta,
 # ale nie gwarantuje znalezienia rozwiązania optymalnego.
 #
-# Złożoność obliczeniowa: O(n²)
+# Złożoność obliczeniowa: O(n²), z listą kandydatów (k najbliższych
+# miast) oczekiwanie O(n·k) na trasę.
 # ------------------------------------------------------
 
+# macierz po compact_distance_matrix i lista kandydatów dla ostatnio
+# używanej macierzy — NN uruchamiany jest wielokrotnie (dla każdego miasta
+# startowego) na tej samej instancji, więc konwersja typu i lista
+# kandydatów liczone są raz, a nie przy każdym wywołaniu
+_CANDIDATES_CACHE = {}
+
+
+def _cached_candidates(distance_matrix, k):
+    key = (id(distance_matrix), k)
+    entry = _CANDIDATES_CACHE.get(key)
+    if entry is None or entry[0] is not distance_matrix:
+        _CANDIDATES_CACHE.clear()
+        compact = compact_distance_matrix(distance_matrix)
+        entry = (distance_matrix, compact, nearest_candidates(compact, k))
+        _CANDIDATES_CACHE[key] = entry
+    return entry[1], entry[2]
+
+
+# NUMBA — budowa trasy NN
+@njit(cache=True)
+def nn_tour(distance_matrix, start_city, cand):
+    """
+    Buduje trasę Najbliższego Sąsiada od miasta start_city.
+    W każdym kroku jednym przejściem po wierszu macierzy szukamy
+    najbliższego nieodwiedzonego miasta (bez kopiowania wiersza
+    i maskowania odwiedzonych wartością np.inf).
+
+    Jeśli lista kandydatów cand (n x k, posortowana rosnąco po odległości)
+    jest niepusta, najpierw przeglądamy k najbliższych miast — pierwsze
+    nieodwiedzone jest najbliższym nieodwiedzonym. Pełne przejście po
+    wierszu wykonujemy tylko, gdy wszyscy kandydaci są już odwiedzeni.
+
+    Cała budowa trasy razem z liczeniem kosztu odbywa się w tym kernelu,
+    solve_tsp jedynie odczytuje parametry i składa wynik.
+
+    Zwraca:
+        route : np.ndarray (n) - kolejność odwiedzanych miast
+        cost : float - długość trasy z powrotem do miasta startowego
+    """
+    n = distance_matrix.shape[0]
+
+    # tablica oznaczająca odwiedzone miasta
+    visited = np.zeros(n, dtype=np.bool_)
+
+    # trasa rozpoczyna się w mieście startowym
+    route = np.empty(n, dtype=np.int64)
+    route[0] = start_city
+    visited[start_city] = True
+    current = start_city
+    cost = 0.0
+
+    # główna pętla budowania trasy
+    for step in range(1, n):
+
+        # najpierw lista kandydatów bieżącego miasta
+        best_j = -1
+        for t in range(cand.shape[1]):
+            c = cand[current, t]
+            if not visited[c]:
+                best_j = c
+                break
+
+        # wybór najbliższego nieodwiedzonego miasta (pełne przejście)
+        # Pętla bez skoków zależnych od danych: odwiedzone miasta dostają
+        # odległość inf, a minimum aktualizujemy przez wybór (select),
+        # co LLVM kompiluje do instrukcji cmov zamiast trudnych do
+        # przewidzenia rozgałęzień.
+        if best_j == -1:
+            best_d = np.inf
+            for j in range(n):
+                d = np.inf if visited[j] else float(distance_matrix[current, j])
+                take = d < best_d
+                best_d = d if take else best_d
+                best_j = j if take else best_j
+
+        # aktualizacja trasy i oznaczenie odwiedzin
+        route[step] = best_j
+        visited[best_j] = True
+        cost += distance_matrix[current, best_j]
+        current = best_j
+
+    # powrót do miasta startowego
+    cost += distance_matrix[current, start_city]
+
+    return route, cost
+
 
 def solve_tsp(distance_matrix: np.ndarray, params: dict):
     """
@@ -35,9 +124,11 @@ def solve_tsp(distance_matrix: np.ndarray, params: dict):
             Zestaw parametrów sterujących:
               'start_city' : indeks miasta początkowego (int).
                   Określa, w którym mieście algorytm zaczyna budowę trasy.
+              'candidate_k' : długość listy kandydatów (int, domyślnie 20;
+                  0 oznacza pełne przeszukiwanie wiersza w każdym kroku).
 
     Zwraca:
-        route : list[int]
+        route : np.ndarray
             Kolejność odwiedzanych miast w trakcie przeszukiwania.
         cost : float
             Całkowity koszt trasy, łącznie z powrotem do miasta startowego.
@@ -55,35 +146,14 @@ def solve_tsp(distance_matrix: np.ndarray, params: dict):
 
     # odczyt parametru miasta startowego
     start_city = int(params.get("start_city", 0))
+    candidate_k = int(params.get("candidate_k", 20))
 
-    # tablica oznaczająca odwiedzone miasta
-    visited = np.zeros(n, dtype=bool)
-
-    # trasa rozpoczyna się w mieście startowym
-    route = [start_city]
-    visited[start_city] = True
-    current = start_city
-
-    # główna pętla budowania trasy
-    for _ in range(n - 1):
-
-        # odległości od bieżącego miasta
-        dists = distance_matrix[current].copy()
-
-        # miasta już odwiedzone ustawiamy na nieskończony koszt,
-        # aby nie były ponownie wybierane
-        dists[visited] = np.inf
-
-        # wybór najbliższego nieodwiedzonego miasta
-        next_city = int(np.argmin(dists))
-
-        # aktualizacja trasy i oznaczenie odwiedzin
-        route.append(next_city)
-        visited[next_city] = True
-        current = next_city
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32 w układzie C (kernel
+    # czyta wiersze z krokiem 1) oraz lista kandydatów — z cache instancji
+    compact, cand = _cached_candidates(distance_matrix, candidate_k)
 
-    # obliczenie całkowitego kosztu trasy łącznie z powrotem
-    cost = route_length_fast(distance_matrix, np.array(route))
+    # budowa trasy i koszt (Numba)
+    route, cost = nn_tour(compact, start_city, cand)
 
     # pomiar czasu wykonania
     runtime = time.time() - start_time
@@ -91,6 +161,7 @@ def solve_tsp(distance_matrix: np.ndarray, params: dict):
     # dane informacyjne
     meta = {
         "start_city": start_city,
+        "candidate_k": candidate_k,
         "n_cities": n,
         "method": "nearest_neighbor"
     }
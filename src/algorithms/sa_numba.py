@@ -1,9 +1,12 @@
+import math
 import numpy as np
 import time
-from numba import njit
-from src.utils.distance import route_length_fast
-from src.utils.neighborhoods_numba import neighbor_cost_numba
-from src.utils.neighborhoods_numba_delta import neighbor_cost_delta_numba
+from numba import literally, njit, prange
+from src.algorithms.ihc_numba import hill_climb_delta_numba, hill_climb_numba
+from src.utils.distance import compact_distance_matrix, route_length_fast
+from src.utils.neighborhoods_numba import neighbor_cost_into
+from src.utils.neighborhoods_numba_delta import apply_move_inplace, propose_move_delta
+from src.utils.rng import kernel_seeds, seed_rng
 
 
 # ALGORYTM SYMULOWANEGO WYŻARZANIA (SIMULATED ANNEALING - SA)
@@ -29,6 +32,55 @@ from src.utils.neighborhoods_numba_delta import neighbor_cost_delta_numba
 # ------------------------------------------------------------
 
 
+# NUMBA — lekki generator liczb losowych dla reguły akceptacji
+# ------------------------------------------------------------
+# Test akceptacji wykonuje się w każdej iteracji, w której ruch nie jest
+# poprawą, więc zamiast np.random.random() (Mersenne Twister z globalnym
+# stanem wątku) używamy xoroshiro128+ ze stanem w dwóch słowach uint64.
+# Stan inicjalizuje SplitMix64 z ziarna losowanego przez np.random wewnątrz
+# kernela (generator Numby danego wątku), więc każdy łańcuch dostaje inny stan.
+# ------------------------------------------------------------
+_SM_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SM_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_SM_MUL2 = np.uint64(0x94D049BB133111EB)
+_U01_SCALE = 1.0 / 9007199254740992.0  # 2^-53
+
+
+@njit(inline="always", cache=True)
+def _rotl(x, k):
+    return (x << np.uint64(k)) | (x >> np.uint64(64 - k))
+
+
+@njit(cache=True)
+def _rng_init():
+    """
+    Stan xoroshiro128+ (uint64[2]) z dwóch kroków SplitMix64.
+    """
+    state = np.empty(2, dtype=np.uint64)
+    x = np.uint64(np.random.randint(0, 2**62))
+    for w in range(2):
+        x = x + _SM_GAMMA
+        z = x
+        z = (z ^ (z >> np.uint64(30))) * _SM_MUL1
+        z = (z ^ (z >> np.uint64(27))) * _SM_MUL2
+        state[w] = z ^ (z >> np.uint64(31))
+    return state
+
+
+@njit(inline="always", cache=True)
+def _next_u01(state):
+    """
+    Liczba z [0, 1) z generatora xoroshiro128+ (stan modyfikowany w miejscu).
+    """
+    s0 = state[0]
+    s1 = state[1]
+    result = s0 + s1
+    s1 ^= s0
+    state[0] = _rotl(s0, 24) ^ s1 ^ (s1 << np.uint64(16))
+    state[1] = _rotl(s1, 37)
+    return (result >> np.uint64(11)) * _U01_SCALE
+
+
 # NUMBA — wewnętrzna pętla algorytmu SA
 @njit(cache=True)
 def simulated_annealing_numba(distance_matrix, route, T0, T_min, alpha, max_iter, neighbor_fn_id):
@@ -79,28 +131,45 @@ def simulated_annealing_numba(distance_matrix, route, T0, T_min, alpha, max_iter
     best_route = current_route.copy()
     best_cost = current_cost
 
+    # bufor na sąsiada — zamieniany z current_route przy akceptacji
+    new_route = np.empty_like(current_route)
+
+    # stan generatora dla testu akceptacji
+    rng_state = _rng_init()
+
     T = T0
+    inv_T = 1.0 / T0
     iter_count = 0
 
     # główna pętla SA
     while T > T_min and iter_count < max_iter:
 
-        # generowanie sąsiada
-        new_route, new_cost = neighbor_cost_numba(distance_matrix, current_route, neighbor_fn_id)
+        # generowanie sąsiada (zapis do bufora new_route)
+        new_cost = neighbor_cost_into(distance_matrix, current_route, new_route, neighbor_fn_id)
         delta = new_cost - current_cost
 
         # reguła akceptacji, akceptujemy poprawę lub gorsze rozwiązanie z pewnym prawdopodobieństwem
-        if delta < 0 or np.random.random() < np.exp(-delta / T):
-            current_route = new_route
+        # exp(-delta/T) liczymy tylko dla ruchów w górę; przy -delta/T <= -40
+        # prawdopodobieństwo (< 5e-18) jest poniżej rozdzielczości generatora,
+        # więc od razu odrzucamy ruch bez wywołania exp i losowania
+        if delta < 0:
+            accept = True
+        else:
+            x = -delta * inv_T
+            accept = x > -40.0 and _next_u01(rng_state) < np.exp(x)
+
+        if accept:
+            current_route, new_route = new_route, current_route
             current_cost = new_cost
 
-            # aktualizacja najlepszego rozwiązania
+            # aktualizacja najlepszego rozwiązania (kopia tylko przy nowym minimum)
             if new_cost < best_cost:
                 best_cost = new_cost
-                best_route = new_route
+                best_route[:] = current_route
 
         # obniżenie temperatury i przejście do kolejnego kroku
         T *= alpha
+        inv_T /= alpha
         iter_count += 1
 
     return best_route, best_cost
@@ -154,35 +223,94 @@ def simulated_annealing_delta_numba(distance_matrix, route, T0, T_min, alpha, ma
     best_route = current_route.copy()
     best_cost = current_cost
 
+    # brak listy kandydatów — ruchy losowane z całej trasy
+    cand = np.empty((0, 0), dtype=np.int32)
+    pos = np.empty(0, dtype=np.int32)
+
+    # stan generatora dla testu akceptacji
+    rng_state = _rng_init()
+
     T = T0
+    inv_T = 1.0 / T0
     iter_count = 0
 
     # główna pętla SA
     while T > T_min and iter_count < max_iter:
 
-        # szybkie liczenie kosztu z użyciem DELTA
-        new_route, new_cost = neighbor_cost_delta_numba(
-            distance_matrix, current_route, current_cost, neighbor_fn_id
+        # szybkie liczenie kosztu z użyciem DELTA (bez kopiowania trasy)
+        i, j, delta = propose_move_delta(
+            distance_matrix, current_route, neighbor_fn_id, cand, pos
         )
-        delta = new_cost - current_cost
 
         # reguła akceptacji, akceptujemy poprawę lub gorsze rozwiązanie z pewnym prawdopodobieństwem
-        if delta < 0 or np.random.random() < np.exp(-delta / T):
-            current_route = new_route
-            current_cost = new_cost
-
-            # aktualizacja najlepszego rozwiązania
-            if new_cost < best_cost:
-                best_cost = new_cost
-                best_route = new_route
+        # exp(-delta/T) liczymy tylko dla ruchów w górę; przy -delta/T <= -40
+        # prawdopodobieństwo (< 5e-18) jest poniżej rozdzielczości generatora,
+        # więc od razu odrzucamy ruch bez wywołania exp i losowania
+        if delta < 0:
+            accept = True
+        else:
+            x = -delta * inv_T
+            accept = x > -40.0 and _next_u01(rng_state) < np.exp(x)
+
+        if accept:
+            apply_move_inplace(current_route, i, j, neighbor_fn_id, pos)
+            current_cost += delta
+
+            # aktualizacja najlepszego rozwiązania (kopia tylko przy nowym minimum)
+            if current_cost < best_cost:
+                best_cost = current_cost
+                best_route[:] = current_route
 
         # obniżenie temperatury i przejście do kolejnego kroku
         T *= alpha
+        inv_T /= alpha
         iter_count += 1
 
+    # koszt był sumą delt — przeliczamy go raz dokładnie
+    best_cost = route_length_fast(distance_matrix, best_route)
+
     return best_route, best_cost
 
 
+# NUMBA — równoległe, niezależne łańcuchy SA
+@njit(parallel=True, cache=True)
+def sa_ensemble(distance_matrix, starts, T0, T_min, alpha, max_iter, neighbor_fn_id, use_delta, seeds):
+    """
+    Uruchamia niezależne łańcuchy SA równolegle (numba.prange).
+    Łańcuch c startuje z trasy starts[c] i ziarna seeds[c] (rng.kernel_seeds)
+    i zapisuje wynik do własnego wiersza bufora; zwracany jest najlepszy
+    wynik ze wszystkich łańcuchów.
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
+    """
+    # osobna (cache'owana) kompilacja dla każdego operatora sąsiedztwa —
+    # neighbor_fn_id jest wtedy stałą w obu kernelach SA i w operatorach ruchu
+    literally(neighbor_fn_id)
+
+    n_chains, n = starts.shape
+
+    routes = np.empty((n_chains, n), dtype=np.int64)
+    costs = np.empty(n_chains)
+
+    for c in prange(n_chains):
+        np.random.seed(seeds[c])
+        if use_delta:
+            route, cost = simulated_annealing_delta_numba(
+                distance_matrix, starts[c], T0, T_min, alpha, max_iter, neighbor_fn_id
+            )
+        else:
+            route, cost = simulated_annealing_numba(
+                distance_matrix, starts[c], T0, T_min, alpha, max_iter, neighbor_fn_id
+            )
+        routes[c] = route
+        costs[c] = cost
+
+    best = np.argmin(costs)
+    return routes[best].copy(), costs[best]
+
+
 # GŁÓWNA FUNKCJA ROZWIĄZUJĄCA TSP METODĄ SA
 def solve_tsp(distance_matrix, params):
     """
@@ -203,6 +331,16 @@ def solve_tsp(distance_matrix, params):
               'alpha' : współczynnik chłodzenia (float)
               'max_iter' : limit iteracji (int)
               'neighborhood_type' : rodzaj sąsiedztwa ("swap", "two_opt", "insert")
+              'use_delta' : czy liczyć koszt sąsiada przyrostowo (bool,
+                  domyślnie True — delta w O(1) zamiast pełnej długości
+                  trasy w O(n); False zostaje jako wariant porównawczy)
+              'n_chains' : liczba niezależnych łańcuchów SA uruchamianych
+                  równolegle (int, domyślnie 1 — pojedynczy łańcuch)
+              'greedy_tail' : liczba iteracji wspinaczki lokalnej wykonywanej
+                  na najlepszej trasie po zakończeniu chłodzenia (int,
+                  domyślnie 0 — brak)
+              'tail_stop_no_improve' : limit stagnacji tej wspinaczki (int)
+              'seed' : ziarno generatorów losowych (int, domyślnie None)
 
     Zwraca:
         best_route : np.ndarray
@@ -215,7 +353,13 @@ def solve_tsp(distance_matrix, params):
             Dane pomocnicze użyte przy konfiguracji uruchomienia.
     """
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.time()
+
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    distance_matrix = compact_distance_matrix(distance_matrix)
     n = distance_matrix.shape[0]
 
     # odczyt parametrów wejściowych
@@ -224,21 +368,60 @@ def solve_tsp(distance_matrix, params):
     alpha = float(params.get("alpha", 0.99))
     max_iter = int(params.get("max_iter", 5000))
     neighborhood_type = params.get("neighborhood_type", "swap")
-    use_delta = params.get("use_delta", False)
+    use_delta = params.get("use_delta", True)
+    n_chains = int(params.get("n_chains", 1))
+    greedy_tail = int(params.get("greedy_tail", 0))
+    tail_stop_no_improve = int(params.get("tail_stop_no_improve", 50))
+
+    # liczba kroków, po których T = T0 · alpha^k spada do T_min — pętla SA
+    # i tak się wtedy kończy, więc limit iteracji obcinamy od razu do tej
+    # wartości (czytelny w meta jako "effective_iter")
+    effective_iter = max_iter
+    if T0 <= T_min:
+        effective_iter = 0
+    elif 0.0 < alpha < 1.0:
+        n_cool = int(math.log(T_min / T0) / math.log(alpha)) + 1
+        effective_iter = min(max_iter, n_cool)
 
     # przypisanie operatora sąsiedztwa
     neighborhood_map = {"swap": 0, "two_opt": 1, "insert": 2}
     neighbor_fn_id = neighborhood_map.get(neighborhood_type, 0)
 
-    # losowa trasa startowa
-    route = np.random.permutation(n)
+    # losowe trasy startowe (po jednej na łańcuch)
+    starts = np.argsort(np.random.random((n_chains, n)), axis=1)
 
     # uruchomienie algorytmu SA
-    simulated_annealing_fn = simulated_annealing_delta_numba if use_delta is True else simulated_annealing_numba
-    best_route, best_cost = simulated_annealing_fn(
-        distance_matrix, route, T0, T_min, alpha, max_iter, neighbor_fn_id
+    best_route, best_cost = sa_ensemble(
+        distance_matrix,
+        starts,
+        T0,
+        T_min,
+        alpha,
+        effective_iter,
+        neighbor_fn_id,
+        use_delta is True,
+        kernel_seeds(n_chains),
     )
 
+    # opcjonalny zachłanny "ogon": przy T bliskim zera SA przyjmuje już
+    # tylko poprawy, więc dokańczamy trasę zwykłą wspinaczką lokalną
+    if greedy_tail > 0:
+        if use_delta is True:
+            best_route, best_cost = hill_climb_delta_numba(
+                distance_matrix,
+                best_route,
+                best_cost,
+                greedy_tail,
+                tail_stop_no_improve,
+                neighbor_fn_id,
+                np.empty((n, 0), dtype=np.int32),
+            )
+        else:
+            best_route, best_cost = hill_climb_numba(
+                distance_matrix, best_route, greedy_tail, tail_stop_no_improve, neighbor_fn_id
+            )
+    best_cost = float(best_cost)
+
     # pomiar czasu wykonania
     runtime = time.time() - start_time
 
@@ -248,7 +431,10 @@ def solve_tsp(distance_matrix, params):
         "T_min": T_min,
         "alpha": alpha,
         "max_iter": max_iter,
+        "effective_iter": effective_iter,
         "neighborhood_type": neighborhood_type,
+        "n_chains": n_chains,
+        "greedy_tail": greedy_tail,
     }
 
     return best_route, best_cost, runtime, meta
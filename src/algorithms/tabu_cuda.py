@@ -0,0 +1,474 @@
+import numpy as np
+import time
+from numba import cuda, float64, int64, njit
+from src.algorithms import tabu_move
+from src.algorithms.tabu_numba import draw_moves
+from src.utils.distance import compact_distance_matrix, route_length_fast
+from src.utils.neighborhoods_numba_delta import (
+    apply_move_inplace,
+    delta_insert,
+    delta_swap,
+    delta_two_opt,
+    nearest_candidates,
+)
+from src.utils.rng import seed_rng
+
+# TABU SEARCH — OCENA KANDYDATÓW NA GPU (Numba CUDA)
+# ------------------------------------------------------------
+# Wariant tabu_move (tabu na ruchach (i, j)) dla dużych instancji:
+# w każdej iteracji wszystkie n_neighbors kandydatów jest oceniane
+# jednym uruchomieniem kernela CUDA (jeden wątek = jeden kandydat,
+# delta kosztu w O(1) z tych samych funkcji delta_* co na CPU).
+# Host wykonuje resztę iteracji: losowanie ruchów, filtr tabu
+# z aspiracją, wybór najlepszego ruchu, wykonanie go na trasie
+# i aktualizację listy tabu (bufor cykliczny + tabu_cache).
+#
+# GPU opłaca się dopiero przy dużym n i dużej liczbie kandydatów —
+# poniżej progów (cuda_min_n, cuda_min_neighbors) lub bez dostępnego
+# GPU solve_tsp uruchamia zwykły kernel CPU z tabu_move.
+#
+# Pętla hosta (tabu_search_host) przyjmuje funkcję oceny kandydatów:
+# cuda_evaluator (GPU) albo cpu_evaluator. Parametr
+# device="host" uruchamia ją z oceną na CPU, więc losowanie ruchów,
+# filtr tabu i wykonanie ruchu są sprawdzane także bez GPU
+# (src/algorithms/_precompile.py).
+# ------------------------------------------------------------
+
+# te same funkcje delta co w Numba na CPU, skompilowane jako funkcje urządzenia
+_delta_swap_device = cuda.jit(device=True)(delta_swap.py_func)
+_delta_two_opt_device = cuda.jit(device=True)(delta_two_opt.py_func)
+_delta_insert_device = cuda.jit(device=True)(delta_insert.py_func)
+
+
+@cuda.jit
+def evaluate_candidates_kernel(distance_matrix, route, neighbor_fn_id, cand_i, cand_j, deltas_out):
+    """
+    Jeden wątek liczy deltę kosztu jednego kandydata (i, j).
+    Dla two-opt para musi być już uporządkowana (i < j).
+    """
+    k = cuda.grid(1)
+    if k < cand_i.shape[0]:
+        i = cand_i[k]
+        j = cand_j[k]
+        if neighbor_fn_id == 0:
+            deltas_out[k] = _delta_swap_device(distance_matrix, route, i, j)
+        elif neighbor_fn_id == 1:
+            deltas_out[k] = _delta_two_opt_device(distance_matrix, route, i, j)
+        else:
+            deltas_out[k] = _delta_insert_device(distance_matrix, route, i, j)
+
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def evaluate_candidates_cpu(distance_matrix, route, neighbor_fn_id, cand_i, cand_j, deltas_out):
+    """Odpowiednik evaluate_candidates_kernel na CPU (te same delta_*)."""
+    for k in range(cand_i.shape[0]):
+        i = cand_i[k]
+        j = cand_j[k]
+        if neighbor_fn_id == 0:
+            deltas_out[k] = delta_swap(distance_matrix, route, i, j)
+        elif neighbor_fn_id == 1:
+            deltas_out[k] = delta_two_opt(distance_matrix, route, i, j)
+        else:
+            deltas_out[k] = delta_insert(distance_matrix, route, i, j)
+
+
+def cpu_evaluator(distance_matrix):
+    """Ocena kandydatów na CPU dla tabu_search_host (evaluate_candidates_cpu)."""
+
+    def evaluate(route, neighbor_fn_id, cand_i, cand_j, deltas_out):
+        evaluate_candidates_cpu(distance_matrix, route, neighbor_fn_id, cand_i, cand_j, deltas_out)
+
+    return evaluate
+
+
+def cuda_evaluator(distance_matrix, n_neighbors, threads_per_block=128):
+    """
+    Ocena kandydatów na GPU dla tabu_search_host: macierz i bufory
+    urządzenia są alokowane raz, w każdym wywołaniu kopiowane są trasa
+    (O(n) bajtów) oraz pary (i, j), a wracają delty.
+    """
+    d_matrix = cuda.to_device(distance_matrix)
+    d_route = cuda.device_array(distance_matrix.shape[0], dtype=np.int64)
+    d_cand_i = cuda.device_array(n_neighbors, dtype=np.int64)
+    d_cand_j = cuda.device_array(n_neighbors, dtype=np.int64)
+    d_deltas = cuda.device_array(n_neighbors, dtype=np.float64)
+    blocks = (n_neighbors + threads_per_block - 1) // threads_per_block
+
+    def evaluate(route, neighbor_fn_id, cand_i, cand_j, deltas_out):
+        d_route.copy_to_device(route)
+        d_cand_i.copy_to_device(cand_i)
+        d_cand_j.copy_to_device(cand_j)
+        evaluate_candidates_kernel[blocks, threads_per_block](
+            d_matrix, d_route, neighbor_fn_id, d_cand_i, d_cand_j, d_deltas
+        )
+        d_deltas.copy_to_host(deltas_out)
+
+    return evaluate
+
+
+def tabu_search_host(distance_matrix, init_route, max_iter, stop_no_improve,
+                     tabu_tenure, neighbor_fn_id, n_neighbors, evaluate, cand=None):
+    """
+    Pętla Tabu Search wykonywana na hoście (tabu na ruchach (i, j)):
+    losowanie ruchów (draw_moves), ocena wszystkich kandydatów jednym
+    wywołaniem evaluate, filtr tabu z aspiracją, wykonanie ruchu
+    i aktualizacja listy tabu.
+
+    Parametry jak w tabu_move.tabu_search (w tym lista kandydatów cand,
+    None = brak listy) oraz:
+        neighbor_fn_id : 0 - swap, 1 - two-opt, 2 - insert
+        evaluate : evaluate(route, neighbor_fn_id, cand_i, cand_j, deltas_out)
+            — zapisuje delty kosztu kandydatów do deltas_out
+            (cuda_evaluator na GPU, cpu_evaluator bez GPU)
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
+    """
+    n = len(init_route)
+    tenure = max(tabu_tenure, 0)
+    if cand is None:
+        cand = np.empty((n, 0), dtype=np.int32)
+
+    current_route = np.asarray(init_route, dtype=np.int64).copy()
+    current_cost = route_length_fast(distance_matrix, current_route)
+
+    best_route = current_route.copy()
+    best_cost = current_cost
+
+    # lista tabu: bufor cykliczny ruchów + macierz liczników (jak w tabu_numba)
+    tabu_i = np.full(tenure, -1, dtype=np.int32)
+    tabu_j = np.full(tenure, -1, dtype=np.int32)
+    tabu_cache = np.zeros((n, n), dtype=np.int32)
+    tabu_idx = 0
+
+    # bufory kandydatów (alokowane raz)
+    cand_i = np.empty(n_neighbors, dtype=np.int64)
+    cand_j = np.empty(n_neighbors, dtype=np.int64)
+    deltas = np.empty(n_neighbors, dtype=np.float64)
+
+    # odwrotna permutacja trasy (pos[miasto] = pozycja) — tylko z listą
+    # kandydatów; apply_move_inplace aktualizuje ją przy każdym ruchu
+    pos = np.empty(n if cand.shape[1] > 0 else 0, dtype=np.int32)
+    if pos.shape[0] > 0:
+        pos[current_route] = np.arange(n, dtype=np.int32)
+    no_improve = 0
+
+    # główna pętla TS
+    for _ in range(max_iter):
+
+        # losowanie ruchów (dla two-opt para uporządkowana jak w move_delta)
+        draw_moves(n, cand_i, cand_j, current_route, cand, pos)
+        if neighbor_fn_id == 1:
+            lo = np.minimum(cand_i, cand_j)
+            np.maximum(cand_i, cand_j, out=cand_j)
+            cand_i[:] = lo
+
+        # ocena wszystkich kandydatów jednym wywołaniem
+        evaluate(current_route, neighbor_fn_id, cand_i, cand_j, deltas)
+
+        # filtr tabu z aspiracją (poprawa globalnego optimum ignoruje tabu)
+        is_tabu = (tabu_cache[cand_i, cand_j] > 0) | (tabu_cache[cand_j, cand_i] > 0)
+        blocked = is_tabu & (current_cost + deltas >= best_cost)
+        allowed = np.flatnonzero(~blocked)
+
+        # brak dobrego kandydata, stagnacja
+        if allowed.size == 0:
+            no_improve += 1
+            if no_improve >= stop_no_improve:
+                break
+            continue
+
+        k = allowed[np.argmin(deltas[allowed])]
+        best_i = int(cand_i[k])
+        best_j = int(cand_j[k])
+
+        # aktualizacja rozwiązania
+        apply_move_inplace(current_route, best_i, best_j, neighbor_fn_id, pos)
+        current_cost += deltas[k]
+
+        # dodanie ruchu do tabu (najstarszy wypada z bufora i z macierzy)
+        if tenure > 0:
+            if tabu_i[tabu_idx] >= 0:
+                tabu_cache[tabu_i[tabu_idx], tabu_j[tabu_idx]] -= 1
+            tabu_i[tabu_idx] = best_i
+            tabu_j[tabu_idx] = best_j
+            tabu_cache[best_i, best_j] += 1
+            tabu_idx = (tabu_idx + 1) % tenure
+
+        # aktualizacja najlepszego globalnego rozwiązania
+        if current_cost < best_cost:
+            best_cost = current_cost
+            best_route[:] = current_route
+            no_improve = 0
+        else:
+            no_improve += 1
+
+        if no_improve >= stop_no_improve:
+            break
+
+    # koszt był sumą delt — przeliczamy go raz dokładnie
+    return best_route, float(route_length_fast(distance_matrix, best_route))
+
+
+def tabu_search_cuda(distance_matrix, init_route, max_iter, stop_no_improve,
+                     tabu_tenure, neighbor_fn_id, n_neighbors=256, threads_per_block=128,
+                     cand=None):
+    """
+    Tabu Search z oceną kandydatów na GPU: tabu_search_host z cuda_evaluator.
+    Parametry i wynik jak w tabu_search_host.
+    """
+    evaluate = cuda_evaluator(distance_matrix, n_neighbors, threads_per_block)
+    return tabu_search_host(
+        distance_matrix, init_route, max_iter, stop_no_improve,
+        tabu_tenure, neighbor_fn_id, n_neighbors, evaluate, cand,
+    )
+
+
+# ------------------------------------------------------------
+# PEŁNY PRZEGLĄD SĄSIEDZTWA TWO-OPT NA GPU
+# ------------------------------------------------------------
+# two_opt_scan_cuda() ocenia wszystkie n(n-1)/2 ruchów two-opt (i < j)
+# zamiast losowej próbki kandydatów. Kernel ma stałą siatkę
+# SCAN_BLOCKS × SCAN_THREADS wątków przechodzących pętlą (grid-stride)
+# po indeksach k = i*n + j; każdy wątek pamięta swój najlepszy ruch,
+# blok redukuje je w pamięci współdzielonej i zapisuje jeden wynik.
+# Host wybiera minimum z SCAN_BLOCKS wyników blokowych (kopia rzędu
+# kilku KB, niezależna od n), więc nie są potrzebne 64-bitowe atomiki
+# z upakowaną deltą i indeksami. Remisy rozstrzyga zawsze mniejsze k
+# (w wątku, w bloku i na hoście), więc wybrany ruch jest ten sam co
+# w two_opt_scan_cpu. Kolejność bloków nie jest kolejnością k: gdy
+# n*n > SCAN_BLOCKS*SCAN_THREADS, każdy blok obsługuje też dalsze zakresy
+# k. Macierz kopiujemy na GPU raz, trasę (O(n) bajtów) w każdej iteracji.
+# ------------------------------------------------------------
+
+SCAN_THREADS = 256
+SCAN_BLOCKS = 256
+
+
+@cuda.jit
+def two_opt_scan_kernel(distance_matrix, route, block_delta, block_k):
+    """
+    Najlepszy ruch two-opt w obrębie bloku (delta, k = i*n + j).
+    Bloki bez żadnego ruchu i < j zwracają k = -1.
+    """
+    sh_delta = cuda.shared.array(SCAN_THREADS, float64)
+    sh_k = cuda.shared.array(SCAN_THREADS, int64)
+
+    n = route.shape[0]
+    tid = cuda.threadIdx.x
+    best_delta = 0.0
+    best_k = -1
+
+    k = cuda.grid(1)
+    stride = cuda.gridsize(1)
+    while k < n * n:
+        i = k // n
+        j = k - i * n
+        if i < j:
+            d = _delta_two_opt_device(distance_matrix, route, i, j)
+            if best_k < 0 or d < best_delta:
+                best_delta = d
+                best_k = k
+        k += stride
+
+    sh_delta[tid] = best_delta
+    sh_k[tid] = best_k
+    cuda.syncthreads()
+
+    # redukcja drzewiasta w bloku (przy remisie wygrywa mniejsze k)
+    s = SCAN_THREADS // 2
+    while s > 0:
+        if tid < s:
+            other_k = sh_k[tid + s]
+            if other_k >= 0:
+                mine_k = sh_k[tid]
+                other_delta = sh_delta[tid + s]
+                if (
+                    mine_k < 0
+                    or other_delta < sh_delta[tid]
+                    or (other_delta == sh_delta[tid] and other_k < mine_k)
+                ):
+                    sh_delta[tid] = other_delta
+                    sh_k[tid] = other_k
+        cuda.syncthreads()
+        s //= 2
+
+    if tid == 0:
+        block_delta[cuda.blockIdx.x] = sh_delta[0]
+        block_k[cuda.blockIdx.x] = sh_k[0]
+
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def two_opt_scan_cpu(distance_matrix, route):
+    """Wariant CPU two_opt_scan_cuda: pełny przegląd par i < j, zwraca (i, j, delta)."""
+    n = len(route)
+    best_i = 0
+    best_j = 0
+    best_delta = 0.0
+    found = False
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            d = delta_two_opt(distance_matrix, route, i, j)
+            if not found or d < best_delta:
+                best_delta = d
+                best_i = i
+                best_j = j
+                found = True
+    return best_i, best_j, best_delta
+
+
+def two_opt_scan_cuda(distance_matrix, route, d_matrix=None):
+    """
+    Najlepszy ruch two-opt (odwrócenie route[i:j]) w całym sąsiedztwie.
+
+    Parametry:
+        distance_matrix : np.ndarray
+        route : np.ndarray
+        d_matrix : macierz już skopiowana na GPU (cuda.to_device) — przy
+            wielu wywołaniach kopiujemy ją raz; None = kopia przy wywołaniu
+
+    Bez dostępnego GPU używany jest two_opt_scan_cpu.
+
+    Zwraca:
+        (i, j, delta) : najlepszy ruch (i < j) i zmiana kosztu;
+            (0, 0, 0.0), gdy trasa ma mniej niż 2 miasta (brak ruchów)
+    """
+    n = len(route)
+    if n < 2:
+        return 0, 0, 0.0
+
+    if not cuda.is_available():
+        i, j, delta = two_opt_scan_cpu(distance_matrix, np.asarray(route, dtype=np.int64))
+        return int(i), int(j), float(delta)
+
+    if d_matrix is None:
+        d_matrix = cuda.to_device(distance_matrix)
+    d_route = cuda.to_device(np.asarray(route, dtype=np.int64))
+    d_block_delta = cuda.device_array(SCAN_BLOCKS, dtype=np.float64)
+    d_block_k = cuda.device_array(SCAN_BLOCKS, dtype=np.int64)
+
+    two_opt_scan_kernel[SCAN_BLOCKS, SCAN_THREADS](d_matrix, d_route, d_block_delta, d_block_k)
+
+    block_delta = d_block_delta.copy_to_host()
+    block_k = d_block_k.copy_to_host()
+    valid = block_k >= 0
+    # minimum delty, a przy remisie najmniejsze k (jak w two_opt_scan_cpu);
+    # kolejność bloków nie jest kolejnością k (grid-stride)
+    dmin = block_delta[valid].min()
+    k = int(block_k[valid][block_delta[valid] == dmin].min())
+    return k // n, k % n, float(dmin)
+
+
+def two_opt_descent_cuda(distance_matrix, route, max_iter=1000):
+    """
+    Lokalne przeszukiwanie two-opt (best improvement) z pełnym przeglądem
+    sąsiedztwa w każdej iteracji (two_opt_scan_cuda); kończy, gdy żaden
+    ruch nie poprawia trasy albo po max_iter iteracjach.
+
+    Zwraca:
+        route : np.ndarray (nowa tablica)
+        cost : float
+    """
+    route = np.asarray(route, dtype=np.int64).copy()
+    d_matrix = cuda.to_device(distance_matrix) if cuda.is_available() else None
+    pos = np.empty(0, dtype=np.int32)
+
+    for _ in range(max_iter):
+        i, j, delta = two_opt_scan_cuda(distance_matrix, route, d_matrix)
+        if delta >= 0:
+            break
+        apply_move_inplace(route, i, j, 1, pos)
+
+    return route, float(route_length_fast(distance_matrix, route))
+
+
+def solve_tsp(distance_matrix, params):
+    """
+    Tabu Search (TS) z oceną kandydatów na GPU
+    ------------------------------------------
+    Parametry jak w tabu_move.solve_tsp oraz:
+        'cuda_min_n' : minimalna liczba miast, od której używamy GPU (int)
+        'cuda_min_neighbors' : minimalna liczba kandydatów w iteracji (int)
+        'threads_per_block' : rozmiar bloku CUDA (int)
+        'device' : "auto" (domyślnie) albo "host" — pętla hosta
+            (tabu_search_host) z oceną kandydatów na CPU
+            (evaluate_candidates_cpu), niezależnie od GPU i progów;
+            pozwala uruchomić ścieżkę hosta bez CUDA (_precompile)
+
+    Gdy GPU jest niedostępne albo instancja jest poniżej progów,
+    uruchamiany jest wariant CPU (tabu_move.solve_tsp).
+
+    Zwraca:
+        best_route, best_cost, runtime, meta
+        (meta['device'] = "cuda" / "host" / "cpu")
+    """
+    n = distance_matrix.shape[0]
+    n_neighbors = int(params.get("n_neighbors", 256))
+    cuda_min_n = int(params.get("cuda_min_n", 500))
+    cuda_min_neighbors = int(params.get("cuda_min_neighbors", 256))
+    device = params.get("device", "auto")
+
+    use_gpu = cuda.is_available() and n >= cuda_min_n and n_neighbors >= cuda_min_neighbors
+    if device != "host" and not use_gpu:
+        best_route, best_cost, runtime, meta = tabu_move.solve_tsp(
+            distance_matrix, {**params, "n_neighbors": n_neighbors}
+        )
+        meta["device"] = "cpu"
+        return best_route, best_cost, runtime, meta
+
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
+    start_time = time.perf_counter()
+
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych do przesłania
+    distance_matrix = compact_distance_matrix(distance_matrix)
+
+    max_iter = int(params.get("max_iter", 2000))
+    stop_no_improve = int(params.get("stop_no_improve", 200))
+    tabu_tenure = int(params.get("tabu_tenure", 10))
+    neighborhood_type = params.get("neighborhood_type", "two_opt")
+    threads_per_block = int(params.get("threads_per_block", 128))
+    candidate_k = int(params.get("candidate_k", 0))
+
+    # lista kandydatów liczona raz dla instancji (pusta przy candidate_k = 0)
+    cand = nearest_candidates(distance_matrix, candidate_k)
+
+    neighborhood_map = {"swap": 0, "two_opt": 1, "insert": 2}
+    neighbor_fn_id = neighborhood_map.get(neighborhood_type, 1)
+
+    # losowa trasa startowa
+    init_route = np.random.permutation(n)
+
+    if device == "host":
+        evaluate = cpu_evaluator(distance_matrix)
+    else:
+        device = "cuda"
+        evaluate = cuda_evaluator(distance_matrix, n_neighbors, threads_per_block)
+
+    best_route, best_cost = tabu_search_host(
+        distance_matrix,
+        init_route,
+        max_iter,
+        stop_no_improve,
+        tabu_tenure,
+        neighbor_fn_id,
+        n_neighbors,
+        evaluate,
+        cand,
+    )
+
+    runtime = time.perf_counter() - start_time
+
+    meta = {
+        "max_iter": max_iter,
+        "stop_no_improve": stop_no_improve,
+        "tabu_tenure": tabu_tenure,
+        "neighborhood_type": neighborhood_type,
+        "n_neighbors": n_neighbors,
+        "candidate_k": candidate_k,
+        "device": device,
+    }
+
+    return best_route, best_cost, runtime, meta
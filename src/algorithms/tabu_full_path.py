@@ -1,8 +1,10 @@
 import numpy as np
 import time
-from collections import deque
-from src.utils.distance import route_length_fast
+from src.algorithms.tabu_numba import NEIGHBOR_FN_IDS, TABU_PATH, tabu_multi_path, tabu_search_numba
+from src.utils.distance import compact_distance_matrix
 from src.utils.neighborhoods_numba import get_neighbor_function
+from src.utils.neighborhoods_numba_delta import nearest_candidates
+from src.utils.rng import kernel_seeds, seed_rng
 
 # ALGORYTM TABU SEARCH (TS)
 # ------------------------------------------------------------
@@ -32,10 +34,12 @@ from src.utils.neighborhoods_numba import get_neighbor_function
 
 
 def tabu_search(distance_matrix, init_route, max_iter, stop_no_improve,
-                tabu_tenure, neighbor_fn, n_neighbors=30):
+                tabu_tenure, neighbor_fn, n_neighbors=30, cand=None):
     """
     Właściwa pętla algorytmu Tabu Search wykonująca iteracyjne
-    przeszukiwanie lokalne z wykorzystaniem listy tabu.
+    przeszukiwanie lokalne z wykorzystaniem listy tabu. Wykonuje się
+    we wspólnym kernelu tabu_search_numba (tabu_mode = TABU_PATH),
+    gdzie tabu są odciski ostatnio odwiedzonych tras.
 
     Parametry:
         distance_matrix : np.ndarray (n x n)
@@ -62,6 +66,10 @@ def tabu_search(distance_matrix, init_route, max_iter, stop_no_improve,
         n_neighbors : int
             Liczba kandydatów (losowych sąsiadów) generowanych w każdej iteracji.
 
+        cand : np.ndarray int32 (n x k) lub None
+            Lista kandydatów (nearest_candidates); None = ruchy losowane
+            z całej trasy.
+
     Zwraca:
         best_route : np.ndarray
             Najlepsze rozwiązanie odnalezione podczas przeszukiwania.
@@ -69,64 +77,21 @@ def tabu_search(distance_matrix, init_route, max_iter, stop_no_improve,
         best_cost : float
             Koszt tej trasy.
     """
+    distance_matrix = np.ascontiguousarray(distance_matrix)
+    if cand is None:
+        cand = np.empty((distance_matrix.shape[0], 0), dtype=np.int32)
 
-    n = len(init_route)
-    current_route = init_route.copy()
-    current_cost = route_length_fast(distance_matrix, current_route)
-
-    best_route = current_route.copy()
-    best_cost = current_cost
-
-    # lista tabu, która przechowuje ostatnie ruchy, aby unikać cykli
-    tabu_list = deque(maxlen=tabu_tenure)
-
-    no_improve = 0
-
-    # główna pętla TS
-    for _ in range(max_iter):
-
-        best_candidate = None
-        best_candidate_cost = np.inf
-
-        # eksploracja wielu sąsiadów
-        for _ in range(n_neighbors):
-            candidate = neighbor_fn(current_route)
-            move_key = tuple(candidate)
-            candidate_cost = route_length_fast(distance_matrix, candidate)
-
-            # warunek tabu z aspiracją (jeśli poprawiamy globalne optimum to ignorujemy tabu)
-            if move_key in tabu_list and candidate_cost >= best_cost:
-                continue
-
-            if candidate_cost < best_candidate_cost:
-                best_candidate = candidate
-                best_candidate_cost = candidate_cost
-
-        # brak dobrego kandydata, stagnacja
-        if best_candidate is None:
-            no_improve += 1
-            if no_improve >= stop_no_improve:
-                break
-            continue
-
-        # aktualizacja rozwiązania
-        current_route = best_candidate
-        current_cost = best_candidate_cost
-        tabu_list.append(tuple(best_candidate))
-
-        # aktualizacja najlepszego globalnego rozwiązania
-        if current_cost < best_cost:
-            best_cost = current_cost
-            best_route = best_candidate.copy()
-            no_improve = 0
-        else:
-            no_improve += 1
-
-        # zatrzymanie przy długiej stagnacji
-        if no_improve >= stop_no_improve:
-            break
-
-    return best_route, best_cost
+    return tabu_search_numba(
+        distance_matrix,
+        np.asarray(init_route, dtype=np.int64),
+        max_iter,
+        stop_no_improve,
+        tabu_tenure,
+        NEIGHBOR_FN_IDS[neighbor_fn],
+        n_neighbors,
+        cand,
+        TABU_PATH,
+    )
 
 
 def solve_tsp(distance_matrix, params):
@@ -149,6 +114,12 @@ def solve_tsp(distance_matrix, params):
               'neighborhood_type' : typ operatora sąsiedztwa (str)
                     dopuszczalne wartości: "swap", "insert", "two_opt"
               'n_neighbors' : liczba sąsiadów generowanych w iteracji (int)
+              'n_paths' : liczba równoległych ścieżek TS (int, domyślnie 1)
+              'sync_every' : co ile iteracji ścieżki odczytują wspólny
+                    najlepszy koszt (int)
+              'candidate_k' : liczba najbliższych sąsiadów w liście kandydatów
+                    (int, domyślnie 0 – ruchy losowane z całej trasy)
+              'seed' : ziarno generatorów losowych (int, domyślnie None)
 
     Zwraca:
         best_route : np.ndarray
@@ -161,30 +132,63 @@ def solve_tsp(distance_matrix, params):
             Parametry uruchomienia, przydatne w analizie wyników.
     """
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.perf_counter()
 
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    # (w pozostałych przypadkach tylko układ C-contiguous)
+    distance_matrix = compact_distance_matrix(distance_matrix)
+
     n = distance_matrix.shape[0]
     max_iter = int(params.get("max_iter", 2000))
     stop_no_improve = int(params.get("stop_no_improve", 200))
     tabu_tenure = int(params.get("tabu_tenure", 10))
     neighborhood_type = params.get("neighborhood_type", "two_opt")
     n_neighbors = int(params.get("n_neighbors", 30))
+    n_paths = int(params.get("n_paths", 1))
+    sync_every = int(params.get("sync_every", 50))
+    candidate_k = int(params.get("candidate_k", 0))
 
     neighbor_fn = get_neighbor_function(neighborhood_type)
 
-    # losowa trasa startowa
-    init_route = np.random.permutation(n)
+    # lista kandydatów liczona raz dla instancji (pusta przy candidate_k = 0)
+    cand = nearest_candidates(distance_matrix, candidate_k)
 
     # uruchomienie algorytmu TS
-    best_route, best_cost = tabu_search(
-        distance_matrix,
-        init_route,
-        max_iter,
-        stop_no_improve,
-        tabu_tenure,
-        neighbor_fn,
-        n_neighbors
-    )
+    if n_paths > 1:
+        # kilka ścieżek TS równolegle, każda z własnej losowej trasy i z
+        # budżetem max_iter // n_paths; ścieżki dzielą najlepszy koszt
+        starts = np.argsort(np.random.random((n_paths, n)), axis=1)
+        best_route, best_cost = tabu_multi_path(
+            distance_matrix,
+            starts,
+            max(1, max_iter // n_paths),
+            stop_no_improve,
+            tabu_tenure,
+            NEIGHBOR_FN_IDS[neighbor_fn],
+            n_neighbors,
+            cand,
+            TABU_PATH,
+            sync_every,
+            kernel_seeds(n_paths),
+        )
+    else:
+        # losowa trasa startowa
+        init_route = np.random.permutation(n)
+
+        best_route, best_cost = tabu_search(
+            distance_matrix,
+            init_route,
+            max_iter,
+            stop_no_improve,
+            tabu_tenure,
+            neighbor_fn,
+            n_neighbors,
+            cand,
+        )
+    best_cost = float(best_cost)
 
     runtime = time.perf_counter() - start_time
 
@@ -194,6 +198,8 @@ def solve_tsp(distance_matrix, params):
         "tabu_tenure": tabu_tenure,
         "neighborhood_type": neighborhood_type,
         "n_neighbors": n_neighbors,
+        "n_paths": n_paths,
+        "candidate_k": candidate_k,
     }
 
     return best_route, best_cost, runtime, meta
@@ -1,8 +1,10 @@
 import numpy as np
 import time
-from collections import deque
-from src.utils.distance import route_length_fast
+from src.algorithms.tabu_numba import NEIGHBOR_FN_IDS, TABU_MOVE, tabu_multi_path, tabu_search_numba
+from src.utils.distance import compact_distance_matrix
 from src.utils.neighborhoods_numba import get_neighbor_function
+from src.utils.neighborhoods_numba_delta import nearest_candidates
+from src.utils.rng import kernel_seeds, seed_rng
 
 
 # WYKRYWANIE RUCHU ZMIAN W TRASIE
@@ -23,14 +25,14 @@ def detect_move(old_route, new_route):
            - dla insert: i = usunięty element, j = miejsce wstawienia
            - dla two-opt: i, j to końce segmentu odwróconego
     """
-    diffs = [k for k in range(len(old_route)) if old_route[k] != new_route[k]]
+    # porównanie całych tablic w NumPy zamiast pętli po elementach
+    diffs = np.flatnonzero(np.asarray(old_route) != np.asarray(new_route))
 
-    if len(diffs) == 0:
+    if diffs.size == 0:
         return None  # brak ruchu
-    if len(diffs) == 1:
-        return (diffs[0], diffs[0])  # minimalna zmiana (raczej się nie zdarza)
 
-    return (diffs[0], diffs[-1])
+    # przy jednej różnicy diffs[0] == diffs[-1] (raczej się nie zdarza)
+    return (int(diffs[0]), int(diffs[-1]))
 # =====================================================
 
 
@@ -38,102 +40,91 @@ def detect_move(old_route, new_route):
 # ALGORYTM TABU SEARCH (TS)
 # ------------------------------------------------------------
 def tabu_search(distance_matrix, init_route, max_iter, stop_no_improve,
-                tabu_tenure, neighbor_fn, n_neighbors=30):
-
-    n = len(init_route)
-    current_route = init_route.copy()
-    current_cost = route_length_fast(distance_matrix, current_route)
-
-    best_route = current_route.copy()
-    best_cost = current_cost
-
-    # LISTA TABU przechowuje ruchy typu (i, j)
-    tabu_list = deque(maxlen=tabu_tenure)
-
-    no_improve = 0
-
-    # GŁÓWNA PĘTLA TS
-    for _ in range(max_iter):
-
-        best_candidate = None
-        best_candidate_cost = np.inf
-        best_candidate_move = None
-
-        # GENEROWANIE WIELU SĄSIADÓW
-        for _ in range(n_neighbors):
-            candidate = neighbor_fn(current_route)
-            candidate_cost = route_length_fast(distance_matrix, candidate)
-
-            # wykrycie faktycznego ruchu
-            move = detect_move(current_route, candidate)
-
-            # warunek tabu (blokujemy ruch)
-            if move in tabu_list and candidate_cost >= best_cost:
-                continue
-
-            # wybieramy najlepszego kandydata
-            if candidate_cost < best_candidate_cost:
-                best_candidate = candidate
-                best_candidate_cost = candidate_cost
-                best_candidate_move = move
-
-        # brak poprawnych kandydatów
-        if best_candidate is None:
-            no_improve += 1
-            if no_improve >= stop_no_improve:
-                break
-            continue
-
-        # AKTUALIZACJA ROZWIĄZANIA
-        current_route = best_candidate
-        current_cost = best_candidate_cost
-
-        # DODAJEMY RUCH DO TABU
-        if best_candidate_move is not None:
-            tabu_list.append(best_candidate_move)
-
-        # aktualizacja najlepszego wyniku globalnego
-        if current_cost < best_cost:
-            best_cost = current_cost
-            best_route = best_candidate.copy()
-            no_improve = 0
-        else:
-            no_improve += 1
-
-        if no_improve >= stop_no_improve:
-            break
+                tabu_tenure, neighbor_fn, n_neighbors=30, cand=None):
+    """
+    Tabu Search z listą tabu na ruchach (i, j).
+    Cała pętla wykonuje się we wspólnym kernelu tabu_search_numba
+    (tabu_mode = TABU_MOVE): ruch (i, j) pochodzi wprost z operatora,
+    a sprawdzenie tabu to jeden odczyt macierzy tabu_cache.
+    """
+    distance_matrix = np.ascontiguousarray(distance_matrix)
+    if cand is None:
+        cand = np.empty((distance_matrix.shape[0], 0), dtype=np.int32)
 
-    return best_route, best_cost
+    return tabu_search_numba(
+        distance_matrix,
+        np.asarray(init_route, dtype=np.int64),
+        max_iter,
+        stop_no_improve,
+        tabu_tenure,
+        NEIGHBOR_FN_IDS[neighbor_fn],
+        n_neighbors,
+        cand,
+        TABU_MOVE,
+    )
 
 
 
 # FUNKCJA GŁÓWNA
 def solve_tsp(distance_matrix, params):
 
+    # ziarno generatorów losowych (powtarzalny przebieg); brak -> losowo
+    seed_rng(params.get("seed"))
+
     start_time = time.perf_counter()
 
+    # całkowitoliczbowa macierz (np. TSPLIB) → int32, mniej danych w kernelach
+    # (w pozostałych przypadkach tylko układ C-contiguous)
+    distance_matrix = compact_distance_matrix(distance_matrix)
+
     n = distance_matrix.shape[0]
     max_iter = int(params.get("max_iter", 2000))
     stop_no_improve = int(params.get("stop_no_improve", 200))
     tabu_tenure = int(params.get("tabu_tenure", 10))
     neighborhood_type = params.get("neighborhood_type", "two_opt")
     n_neighbors = int(params.get("n_neighbors", 30))
+    n_paths = int(params.get("n_paths", 1))
+    sync_every = int(params.get("sync_every", 50))
+    candidate_k = int(params.get("candidate_k", 0))
 
     neighbor_fn = get_neighbor_function(neighborhood_type)
 
-    # LOSOWA TRASA STARTOWA
-    init_route = np.random.permutation(n)
+    # lista kandydatów liczona raz dla instancji (pusta przy candidate_k = 0)
+    cand = nearest_candidates(distance_matrix, candidate_k)
 
     # GŁÓWNY ALGORYTM
-    best_route, best_cost = tabu_search(
-        distance_matrix,
-        init_route,
-        max_iter,
-        stop_no_improve,
-        tabu_tenure,
-        neighbor_fn,
-        n_neighbors
-    )
+    if n_paths > 1:
+        # kilka ścieżek TS równolegle, każda z własnej losowej trasy i z
+        # budżetem max_iter // n_paths; ścieżki dzielą najlepszy koszt
+        starts = np.argsort(np.random.random((n_paths, n)), axis=1)
+        best_route, best_cost = tabu_multi_path(
+            distance_matrix,
+            starts,
+            max(1, max_iter // n_paths),
+            stop_no_improve,
+            tabu_tenure,
+            NEIGHBOR_FN_IDS[neighbor_fn],
+            n_neighbors,
+            cand,
+            TABU_MOVE,
+            sync_every,
+            kernel_seeds(n_paths),
+        )
+    else:
+        # LOSOWA TRASA STARTOWA
+        init_route = np.random.permutation(n)
+
+        best_route, best_cost = tabu_search(
+            distance_matrix,
+            init_route,
+            max_iter,
+            stop_no_improve,
+            tabu_tenure,
+            neighbor_fn,
+            n_neighbors,
+            cand,
+        )
+    best_cost = float(best_cost)
 
     runtime = time.perf_counter() - start_time
 
@@ -143,6 +134,8 @@ def solve_tsp(distance_matrix, params):
         "tabu_tenure": tabu_tenure,
         "neighborhood_type": neighborhood_type,
         "n_neighbors": n_neighbors,
+        "n_paths": n_paths,
+        "candidate_k": candidate_k,
     }
 
     return best_route, best_cost, runtime, meta
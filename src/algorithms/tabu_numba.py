@@ -0,0 +1,444 @@
+import numpy as np
+from numba import literally, njit, prange
+from src.utils.distance import route_length_fast
+from src.utils.neighborhoods_numba import neighbor_insert, neighbor_swap, neighbor_two_opt
+from src.utils.neighborhoods_numba_delta import apply_move_inplace, move_delta
+
+# TABU SEARCH — WSPÓLNY KERNEL NUMBA
+# ------------------------------------------------------------
+# Jedna skompilowana pętla Tabu Search używana przez oba warianty:
+#   • tabu_move.py      – tabu są ostatnio wykonane ruchy (i, j)
+#                         (tabu_mode = TABU_MOVE)
+#   • tabu_full_path.py – tabu są ostatnio odwiedzone trasy, pamiętane
+#                         jako 64-bitowe odciski (tabu_mode = TABU_PATH)
+#
+# Pliki wariantów zostają cienkimi wrapperami w Pythonie (to samo API
+# tabu_search / solve_tsp), a cała pętla max_iter · n_neighbors wykonuje
+# się wewnątrz Numba, bez narzutu interpretera.
+#
+# Kandydat to ruch (i, j) z deltą kosztu liczoną w O(1) (move_delta);
+# pozycje wszystkich kandydatów iteracji losowane są jedną paczką przed
+# fazą oceny (draw_moves), więc sama ocena nie korzysta z generatora;
+# trasa zmieniana jest w miejscu dopiero dla ruchu wybranego w iteracji.
+# Z listą kandydatów (cand, k najbliższych miast — nearest_candidates)
+# j nie jest losowane z całej trasy, tylko jako pozycja jednego
+# z k najbliższych sąsiadów miasta route[i] (odwrotna permutacja pos
+# aktualizowana przy każdym wykonanym ruchu), jak w IHC / SA.
+# Wariant TABU_PATH musi jeszcze zbudować trasę kandydata, żeby policzyć
+# jej odcisk, ale koszt również bierze z delty.
+#
+# Iteracja ma dwie fazy: ocena n_neighbors kandydatów do tablic
+# cand_i / cand_j / cand_delta / cand_key, potem seryjny wybór najlepszego
+# z filtrem tabu. W TABU_PATH ocena kandydata to O(n) (budowa trasy +
+# odcisk), więc faza oceny może iść przez prange; w TABU_MOVE kandydat
+# kosztuje O(1) i uruchamianie wątków w każdej iteracji byłoby droższe
+# niż sama praca — tam pętla zostaje seryjna.
+#
+# tabu_multi_path uruchamia kilka niezależnych ścieżek TS równolegle
+# (prange po ścieżkach). Ścieżki co sync_every iteracji odczytują wspólny
+# najlepszy koszt i używają go w kryterium aspiracji. Wewnątrz ścieżek
+# ocena kandydatów jest wtedy seryjna (bez zagnieżdżonego prange).
+# ------------------------------------------------------------
+
+TABU_MOVE = 0
+TABU_PATH = 1
+
+# operator sąsiedztwa (funkcja z neighborhoods_numba) -> id dla Numba
+NEIGHBOR_FN_IDS = {neighbor_swap: 0, neighbor_two_opt: 1, neighbor_insert: 2}
+
+
+@njit(cache=True)
+def route_fingerprint(route):
+    """
+    64-bitowy odcisk trasy (hash wielomianowy po kolejnych miastach).
+    Na liście tabu wariantu TABU_PATH trzymamy odciski zamiast całych tras.
+    """
+    h = np.uint64(1469598103934665603)
+    mul = np.uint64(1099511628211)
+    for k in range(route.shape[0]):
+        h = (h ^ np.uint64(route[k])) * mul
+    return h
+
+
+@njit(cache=True)
+def draw_moves(n, cand_i, cand_j, route, cand, pos):
+    """
+    Paczka losowań pozycji dla wszystkich kandydatów iteracji:
+    i jednostajnie z [0, n), j jednostajnie z pozostałych n - 1 pozycji
+    (losujemy r z [0, n - 1) i przesuwamy r >= i o jeden — bez pętli
+    odrzucania i == j).
+
+    Jeśli lista kandydatów cand (n x k) jest niepusta, j to pozycja
+    (z pos) losowego spośród k najbliższych miast miasta route[i] —
+    nigdy samego route[i], więc także j != i.
+
+    Pozycje i są posortowane rosnąco (j losowane niezależnie, więc rozkład
+    par się nie zmienia): kandydaci z tym samym punktem cięcia stoją obok
+    siebie i w fazie oceny czytają te same route[i - 1], route[i] oraz
+    wiersz D[route[i - 1]], który jest jeszcze w L1.
+    """
+    m = cand_i.shape[0]
+    k_cand = cand.shape[1]
+    ri = np.sort(np.random.randint(0, n, m))
+    if k_cand > 0:
+        rc = np.random.randint(0, k_cand, m)
+        for k in range(m):
+            i = ri[k]
+            cand_i[k] = i
+            cand_j[k] = pos[cand[route[i], rc[k]]]
+        return
+
+    rj = np.random.randint(0, n - 1, m)
+    for k in range(m):
+        i = ri[k]
+        j = rj[k]
+        if j >= i:
+            j += 1
+        cand_i[k] = i
+        cand_j[k] = j
+
+
+@njit(cache=True)
+def _eval_candidates(
+    distance_matrix, current_route, neighbor_fn_id, tabu_mode,
+    cand_i, cand_j, cand_delta, cand_key, scratches,
+):
+    """
+    Faza oceny (seryjna): dla wylosowanych ruchów (cand_i, cand_j) liczy
+    deltę kosztu oraz — w TABU_PATH — odcisk trasy po ruchu.
+    """
+    pos = np.empty(0, dtype=np.int32)
+    for k in range(cand_i.shape[0]):
+        i, j, delta = move_delta(
+            distance_matrix, current_route, neighbor_fn_id, cand_i[k], cand_j[k]
+        )
+        cand_i[k] = i
+        cand_j[k] = j
+        cand_delta[k] = delta
+        if tabu_mode == TABU_PATH:
+            buf = scratches[k]
+            buf[:] = current_route
+            apply_move_inplace(buf, i, j, neighbor_fn_id, pos)
+            cand_key[k] = route_fingerprint(buf)
+
+
+@njit(parallel=True, cache=True)
+def _eval_path_candidates_parallel(
+    distance_matrix, current_route, neighbor_fn_id,
+    cand_i, cand_j, cand_delta, cand_key, scratches,
+):
+    """
+    Faza oceny dla TABU_PATH rozłożona na wątki (prange po kandydatach).
+    Każdy kandydat ma własny wiersz scratches i własne wpisy wyników;
+    pozycje są już wylosowane, więc wątki nie korzystają z generatora.
+    """
+    pos = np.empty(0, dtype=np.int32)
+    for k in prange(cand_i.shape[0]):
+        i, j, delta = move_delta(
+            distance_matrix, current_route, neighbor_fn_id, cand_i[k], cand_j[k]
+        )
+        buf = scratches[k]
+        buf[:] = current_route
+        apply_move_inplace(buf, i, j, neighbor_fn_id, pos)
+        cand_i[k] = i
+        cand_j[k] = j
+        cand_delta[k] = delta
+        cand_key[k] = route_fingerprint(buf)
+
+
+@njit(fastmath=True, cache=True)
+def _tabu_search_core(
+    distance_matrix,
+    init_route,
+    max_iter,
+    stop_no_improve,
+    tabu_tenure,
+    neighbor_fn_id,
+    n_neighbors,
+    cand,
+    tabu_mode,
+    parallel_eval,
+    shared_best,
+    sync_every,
+):
+    """
+    Pętla Tabu Search wspólna dla tabu_search_numba i tabu_multi_path.
+    cand to lista kandydatów (n x k); pusta (n x 0) = ruchy z całej trasy.
+    parallel_eval włącza równoległą fazę oceny (tylko TABU_PATH).
+    shared_best to jednoelementowa tablica z najlepszym kosztem wszystkich
+    ścieżek — odczytywana co sync_every iteracji do kryterium aspiracji
+    i aktualizowana przy każdej poprawie własnego wyniku.
+    """
+    n = init_route.shape[0]
+    tenure = max(tabu_tenure, 0)
+
+    current_route = init_route.copy()
+    current_cost = route_length_fast(distance_matrix, current_route)
+
+    best_route = current_route.copy()
+    best_cost = current_cost
+
+    # próg aspiracji: najlepszy koszt tej ścieżki lub (po synchronizacji)
+    # wszystkich ścieżek
+    aspiration = min(best_cost, shared_best[0])
+
+    # odwrotna permutacja trasy (pos[miasto] = pozycja) — tylko z listą
+    # kandydatów; apply_move_inplace aktualizuje ją przy każdym ruchu
+    pos = np.empty(n if cand.shape[1] > 0 else 0, dtype=np.int32)
+    for k in range(pos.shape[0]):
+        pos[current_route[k]] = k
+
+    # wyniki fazy oceny (jeden wpis na kandydata, bez wyścigów między wątkami)
+    cand_i = np.empty(n_neighbors, dtype=np.int64)
+    cand_j = np.empty(n_neighbors, dtype=np.int64)
+    cand_delta = np.empty(n_neighbors)
+    cand_key = np.zeros(n_neighbors, dtype=np.uint64)
+
+    # TABU_PATH: osobny bufor trasy dla każdego kandydata (do liczenia odcisku)
+    scratches = np.empty(
+        (n_neighbors if tabu_mode == TABU_PATH else 0, n), dtype=current_route.dtype
+    )
+
+    # TABU_MOVE: bufor cykliczny ruchów (dwie ciągłe tablice int32 zamiast
+    # macierzy (tenure x 2)) + macierz liczników (tabu cache)
+    move_tenure = tenure if tabu_mode == TABU_MOVE else 0
+    tabu_i = np.full(move_tenure, -1, dtype=np.int32)
+    tabu_j = np.full(move_tenure, -1, dtype=np.int32)
+    tabu_cache = np.zeros(
+        (n if tabu_mode == TABU_MOVE else 0, n if tabu_mode == TABU_MOVE else 0),
+        dtype=np.int32,
+    )
+
+    # TABU_PATH: bufor cykliczny odcisków tras (przeglądany liniowo —
+    # tenure jest małe, a ciągła tablica uint64 mieści się w jednej linii cache)
+    tabu_keys = np.zeros(tenure if tabu_mode == TABU_PATH else 0, dtype=np.uint64)
+    tabu_size = 0
+
+    tabu_idx = 0
+    no_improve = 0
+
+    # główna pętla TS
+    for it in range(max_iter):
+
+        # wymiana informacji między ścieżkami (wspólny najlepszy koszt)
+        if sync_every > 0 and it % sync_every == 0:
+            aspiration = min(best_cost, shared_best[0])
+
+        found = False
+        best_candidate_delta = 0.0
+        best_i = -1
+        best_j = -1
+        best_key = np.uint64(0)
+
+        # (1) losowanie pozycji i ocena kandydatów — sam ruch (i, j) i delta kosztu
+        draw_moves(n, cand_i, cand_j, current_route, cand, pos)
+        if parallel_eval and tabu_mode == TABU_PATH:
+            _eval_path_candidates_parallel(
+                distance_matrix, current_route, neighbor_fn_id,
+                cand_i, cand_j, cand_delta, cand_key, scratches,
+            )
+        else:
+            _eval_candidates(
+                distance_matrix, current_route, neighbor_fn_id, tabu_mode,
+                cand_i, cand_j, cand_delta, cand_key, scratches,
+            )
+
+        # (2) wybór najlepszego kandydata z filtrem tabu
+        for k in range(n_neighbors):
+            i = cand_i[k]
+            j = cand_j[k]
+            delta = cand_delta[k]
+            key = cand_key[k]
+
+            # warunek tabu
+            is_tabu = False
+            if tabu_mode == TABU_MOVE:
+                is_tabu = tabu_cache[i, j] > 0 or tabu_cache[j, i] > 0
+            else:
+                for t in range(tabu_size):
+                    if tabu_keys[t] == key:
+                        is_tabu = True
+                        break
+
+            # aspiracja — poprawa najlepszego znanego wyniku ignoruje tabu
+            if is_tabu and current_cost + delta >= aspiration:
+                continue
+
+            # (bez np.inf jako wartości startowej — fastmath zakłada brak inf)
+            if not found or delta < best_candidate_delta:
+                best_candidate_delta = delta
+                best_i = i
+                best_j = j
+                best_key = key
+                found = True
+
+        # brak dobrego kandydata, stagnacja
+        if not found:
+            no_improve += 1
+            if no_improve >= stop_no_improve:
+                break
+            continue
+
+        # aktualizacja rozwiązania — wybrany ruch wykonujemy w miejscu
+        apply_move_inplace(current_route, best_i, best_j, neighbor_fn_id, pos)
+        current_cost += best_candidate_delta
+
+        # dodanie do tabu (najstarszy wpis wypada z bufora)
+        if tenure > 0:
+            if tabu_mode == TABU_MOVE:
+                old_i = tabu_i[tabu_idx]
+                if old_i >= 0:
+                    tabu_cache[old_i, tabu_j[tabu_idx]] -= 1
+                tabu_i[tabu_idx] = best_i
+                tabu_j[tabu_idx] = best_j
+                tabu_cache[best_i, best_j] += 1
+                tabu_idx = (tabu_idx + 1) % tenure
+            else:
+                tabu_keys[tabu_idx] = best_key
+                tabu_idx = (tabu_idx + 1) % tenure
+                if tabu_size < tenure:
+                    tabu_size += 1
+
+        # aktualizacja najlepszego wyniku ścieżki (i wspólnego slotu)
+        if current_cost < best_cost:
+            best_cost = current_cost
+            best_route[:] = current_route
+            no_improve = 0
+            if best_cost < aspiration:
+                aspiration = best_cost
+            if best_cost < shared_best[0]:
+                shared_best[0] = best_cost
+        else:
+            no_improve += 1
+
+        # zatrzymanie przy długiej stagnacji
+        if no_improve >= stop_no_improve:
+            break
+
+    # koszt był sumą delt — przeliczamy go raz dokładnie
+    best_cost = route_length_fast(distance_matrix, best_route)
+
+    return best_route, best_cost
+
+
+@njit(cache=True)
+def tabu_search_numba(
+    distance_matrix,
+    init_route,
+    max_iter,
+    stop_no_improve,
+    tabu_tenure,
+    neighbor_fn_id,
+    n_neighbors,
+    cand,
+    tabu_mode,
+):
+    """
+    Właściwa pętla algorytmu Tabu Search (wersja Numba, jedna ścieżka).
+
+    Parametry:
+        distance_matrix : np.ndarray (n x n), C-contiguous
+        init_route : np.ndarray (n) - trasa startowa
+        max_iter : int - maksymalna liczba iteracji
+        stop_no_improve : int - limit iteracji bez poprawy najlepszego wyniku
+        tabu_tenure : int - długość listy tabu
+        neighbor_fn_id : int
+            0 - swap
+            1 - two-opt
+            2 - insert
+        n_neighbors : int - liczba kandydatów w iteracji
+        cand : np.ndarray int32 (n x k) - lista kandydatów (k najbliższych
+            miast, nearest_candidates); pusta (n x 0) = ruchy z całej trasy
+        tabu_mode : int
+            TABU_MOVE - tabu na ruchach (i, j)
+            TABU_PATH - tabu na całych trasach (odciski)
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
+    """
+
+    # osobna (cache'owana) kompilacja dla każdego operatora sąsiedztwa
+    literally(neighbor_fn_id)
+
+    # pojedyncza ścieżka — wspólny slot to jej własny koszt startowy
+    shared_best = np.empty(1)
+    shared_best[0] = route_length_fast(distance_matrix, init_route)
+
+    return _tabu_search_core(
+        distance_matrix,
+        init_route,
+        max_iter,
+        stop_no_improve,
+        tabu_tenure,
+        neighbor_fn_id,
+        n_neighbors,
+        cand,
+        tabu_mode,
+        tabu_mode == TABU_PATH,
+        shared_best,
+        0,
+    )
+
+
+@njit(parallel=True, cache=True)
+def tabu_multi_path(
+    distance_matrix,
+    starts,
+    max_iter,
+    stop_no_improve,
+    tabu_tenure,
+    neighbor_fn_id,
+    n_neighbors,
+    cand,
+    tabu_mode,
+    sync_every,
+    seeds,
+):
+    """
+    Równoległe ścieżki Tabu Search (prange po wierszach starts).
+    Ścieżka p startuje z trasy starts[p] i ziarna seeds[p] (rng.kernel_seeds)
+    i zapisuje wynik do własnego
+    wiersza bufora; ścieżki dzielą jedynie slot shared_best z najlepszym
+    kosztem (zapis bez blokady — w najgorszym razie ścieżka odczyta
+    nieco starszą wartość, co wpływa tylko na próg aspiracji).
+
+    Zwraca:
+        best_route : np.ndarray
+        best_cost : float
+    """
+
+    # specjalizacja pod operator sąsiedztwa (jak w tabu_search_numba)
+    literally(neighbor_fn_id)
+
+    n_paths, n = starts.shape
+
+    shared_best = np.empty(1)
+    shared_best[0] = route_length_fast(distance_matrix, starts[0])
+    for p in range(1, n_paths):
+        shared_best[0] = min(shared_best[0], route_length_fast(distance_matrix, starts[p]))
+
+    routes = np.empty((n_paths, n), dtype=starts.dtype)
+    costs = np.empty(n_paths)
+
+    for p in prange(n_paths):
+        np.random.seed(seeds[p])
+        route, cost = _tabu_search_core(
+            distance_matrix,
+            starts[p],
+            max_iter,
+            stop_no_improve,
+            tabu_tenure,
+            neighbor_fn_id,
+            n_neighbors,
+            cand,
+            tabu_mode,
+            False,
+            shared_best,
+            sync_every,
+        )
+        routes[p] = route
+        costs[p] = cost
+
+    best = np.argmin(costs)
+    return routes[best].copy(), costs[best]
@@ -10,7 +10,7 @@ if __name__ == "__main__":
         sys.path.append(current_dir)
 
     from src.utils.tsp_loader import load_tsp_matrix
-    from src.utils.distance import route_length_fast
+    from src.utils.distance import route_length_batch
 
     # ## 1. Load New Results
 
@@ -47,49 +47,51 @@ if __name__ == "__main__":
 
         # Get subset of results for this instance
         df_inst = df_results[df_results["instance"] == instance]
+        n = matrix.shape[0]
 
-        # Check all or a sample. Let's check first 5 and last 5 to be sure.
-        sample_indices = list(range(min(5, len(df_inst))))
-        if len(df_inst) > 5:
-            sample_indices += list(range(len(df_inst) - 5, len(df_inst)))
+        # Parse all routes of this instance at once: one column per city
+        route_strs = df_inst["min_route"].astype(str)
+        parts = route_strs.str.split("-", expand=True).apply(pd.to_numeric, errors="coerce")
+        n_tokens = (route_strs.str.count("-") + 1).to_numpy()
+        n_parsed = parts.notna().sum(axis=1).to_numpy()
 
-        # Making sample unique just in case
-        sample_indices = sorted(list(set(sample_indices)))
+        parse_error = n_parsed != n_tokens
+        size_mismatch = ~parse_error & (n_tokens != n)
+        good = ~parse_error & ~size_mismatch
 
-        for i in sample_indices:
-            row = df_inst.iloc[i]
-            reported_cost = row["min_cost"]
-            route_str = row["min_route"]
-
-            try:
-                route = np.array([int(x) for x in route_str.split("-")], dtype=np.int32)
-            except ValueError:
-                print(f"{instance:<20} | Error parsing route: {route_str}")
-                continue
+        for route_str in route_strs[parse_error]:
+            print(f"{instance:<20} | Error parsing route: {route_str}")
+        for k in np.flatnonzero(size_mismatch):
+            print(
+                f"{instance:<20} | Size mismatch: Route {n_tokens[k]} vs Matrix {n}"
+            )
+        if not good.any():
+            continue
 
-            # Check if route indices match matrix size
-            if len(route) != matrix.shape[0]:
-                print(
-                    f"{instance:<20} | Size mismatch: Route {len(route)} vs Matrix {matrix.shape[0]}"
-                )
-                continue
+        # Batch cost evaluation: one gather-sum over the (R, n) route array
+        routes = parts.iloc[:, :n].to_numpy()[good].astype(np.int32)
+        reported = df_inst["min_cost"].to_numpy()[good]
+        calc = np.round(route_length_batch(matrix, routes), 3)
 
-            # calc_cost = route_length_fast(matrix, route)
-            calc_cost = round(route_length_fast(matrix, route), 3)
+        diff = np.abs(reported - calc)
+        # Relax tolerance to 1e-2 to account for CSV precision loss (2 decimal places)
+        is_valid = diff < 1e-2
 
-            diff = abs(reported_cost - calc_cost)
-            # Relax tolerance to 1e-2 to account for CSV precision loss (2 decimal places)
-            is_valid = diff < 1e-2
+        # All rows are checked; print the first 5, the last 5 and every failure
+        shown = np.zeros(len(routes), dtype=bool)
+        shown[:5] = True
+        shown[-5:] = True
+        shown |= ~is_valid
 
-            valid_str = "OK" if is_valid else "FAIL"
+        for k in np.flatnonzero(shown):
+            valid_str = "OK" if is_valid[k] else "FAIL"
             # Print diff with more precision to see the actual error
             print(
-                f"{instance:<20} | {reported_cost:<10.2f} | {calc_cost:<10.2f} | {diff:<10.5f} | {valid_str}"
+                f"{instance:<20} | {reported[k]:<10.2f} | {calc[k]:<10.2f} | {diff[k]:<10.5f} | {valid_str}"
             )
 
-            total_checked += 1
-            if is_valid:
-                valid_count += 1
+        total_checked += len(routes)
+        valid_count += int(is_valid.sum())
 
     print("-" * 70)
     print(f"Total Checked: {total_checked}")
@@ -0,0 +1,237 @@
+# WSPÓLNY PRZEBIEG EKSPERYMENTU NA SIATCE PARAMETRÓW
+# ---------------------------------------------
+# run_grid() wykonuje to, co wcześniej powtarzał każdy skrypt
+# run_experiment_*.py:
+#   - rozgrzanie kerneli (initializer każdego procesu puli; proces główny
+#     tylko przy nieaktualnym cache Numba, zob. main_warmup_needed)
+#   - lista kombinacji parametrów (iloczyn kartezjański PARAM_GRID)
+#   - jedna pula procesów "spawn" na cały eksperyment
+#   - ETAP 1: przesiew siatki na pierwszej instancji (screen_grid)
+#   - ETAP 2: powtórzenia adaptacyjne (run_repeats), macierz instancji
+#     w pamięci współdzielonej
+#   - zapis wierszy na bieżąco (IncrementalResultWriter), końcowy CSV
+#     (save_experiment_results) i raport najlepszych parametrów
+#   - postęp przez logger "tsp" (poziom: TSP_LOGLEVEL, zob. src/utils/log.py)
+#
+# Skrypty eksperymentów zawierają już tylko ustawienia i wywołanie
+# run_grid(), więc każda zmiana przebiegu trafia od razu do wszystkich.
+# ---------------------------------------------
+
+import itertools
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from src.utils.grid_screening import screen_grid
+from src.utils.log import flush_log, get_logger
+from src.utils.repeat_scheduler import run_repeats
+from src.utils.result_saver import IncrementalResultWriter, format_route, save_experiment_results
+from src.utils.run_single_repeat import get_solver, main_warmup_needed, warmup_worker
+from src.utils.shared_matrix import release_matrix, share_matrix
+from src.utils.tsp_loader import load_tsp_matrix_cached
+from src.utils.workers import N_WORKERS
+
+log = get_logger()
+
+
+def _result_row(tsp_file, param_names, combo, results_parallel):
+    """Wiersz wyników kombinacji: parametry + statystyki powtórzeń + najlepsza trasa."""
+    costs = [c for c, _, _ in results_parallel]
+    runtimes = [t for _, _, t in results_parallel]
+
+    # najlepsza trasa z powtórzeń
+    min_cost, best_route, _ = min(results_parallel, key=lambda r: r[0])
+
+    return {
+        "instance": tsp_file,
+        **dict(zip(param_names, combo)),
+        "repeats": len(costs),
+        "mean_cost": round(np.mean(costs), 3),
+        "min_cost": round(min_cost, 3),
+        "mean_runtime": np.mean(runtimes),
+        "min_route": format_route(best_route),
+    }
+
+
+def _warmup_variants(param_grid, warmup_params, fixed_params):
+    """
+    Parametry rozgrzewki: warmup_params dla każdej kombinacji wartości
+    nieliczbowych siatki (str / bool — operator sąsiedztwa, selekcja,
+    krzyżowanie, use_delta). Kernele są specjalizowane pod te wartości,
+    więc rozgrzewka jednego wariantu zostawiałaby kompilację (lub wczytanie
+    z cache) pozostałych pierwszym właściwym zadaniom. Parametry liczbowe
+    solvery i tak rzutują przez int() / float(), więc nie tworzą wariantów.
+    """
+    names = [name for name, values in param_grid.items() if any(isinstance(v, (str, bool)) for v in values)]
+    return [
+        {**fixed_params, **warmup_params, **dict(zip(names, combo))}
+        for combo in itertools.product(*(param_grid[name] for name in names))
+    ]
+
+
+def run_grid(
+    solver,
+    param_grid,
+    tsp_files,
+    subfolder,
+    filename="results.csv",
+    warmup_params=None,
+    fixed_params=None,
+    min_repeats=3,
+    max_repeats=10,
+    cv_tol=0.01,
+    screen_keep=0.5,
+    seed=0,
+    file_format="csv",
+):
+    """
+    Eksperyment na siatce parametrów dla jednego algorytmu.
+
+    Parametry:
+        solver : str
+            Klucz algorytmu z SOLVER_MODULES (run_single_repeat).
+        param_grid : dict[str, list]
+            Siatka parametrów; kolejność kluczy = kolejność kolumn wyników.
+        tsp_files : list[str]
+            Instancje (pierwsza służy do rozgrzewki i przesiewu).
+        subfolder : str
+            Podfolder results_new/ (np. "GA", "TS").
+        filename : str
+            Nazwa pliku CSV dla save_experiment_results().
+        warmup_params : dict | None
+            Parametry krótkiego przebiegu rozgrzewającego kernele
+            (uzupełniane o wartości nieliczbowe siatki, zob. _warmup_variants).
+        fixed_params : dict | None
+            Parametry stałe, dołączane do każdej kombinacji (bez kolumny w CSV).
+        min_repeats, max_repeats, cv_tol :
+            Powtórzenia adaptacyjne, zob. repeat_scheduler.run_repeats().
+        screen_keep : float | None
+            Część siatki zachowywana po przesiewie; None wyłącza przesiew.
+        seed : int | None
+            Ziarno eksperymentu — powtórzenia dostają ziarna wyznaczone
+            z (seed, combo_id, repeat_id), więc ponowne uruchomienie daje
+            te same przebiegi; None = przebiegi losowe.
+        file_format : str
+            Format końcowego pliku wyników: "csv" albo "parquet" (wymaga
+            pyarrow), zob. save_experiment_results(). Wiersze w trakcie
+            eksperymentu i tak trafiają na bieżąco do częściowego CSV.
+
+    Zwraca:
+        pd.DataFrame : wyniki wszystkich kombinacji i instancji
+    """
+    warmup_params = warmup_params or {}
+    fixed_params = fixed_params or {}
+
+    # ROZGRZANIE (KOMPILACJA JIT) — w procesie głównym tylko przy braku
+    # aktualnego cache Numba; procesy puli rozgrzewają się zawsze (warmup_worker)
+    D_warm = load_tsp_matrix_cached(tsp_files[0])
+    warmup_list = _warmup_variants(param_grid, warmup_params, fixed_params)
+    if main_warmup_needed(solver):
+        log.info("Rozgrzewanie (%s, wariantów: %d)...", solver, len(warmup_list))
+        for params in warmup_list:
+            _ = get_solver(solver)(D_warm, params)
+        log.info("Rozgrzewanie zakończone.\n")
+    else:
+        log.info("Cache Numba (%s) aktualny — rozgrzewanie tylko w procesach puli.\n", solver)
+
+
+    # LISTA KOMBINACJI PARAMETRÓW
+    param_names = list(param_grid)
+    all_combos = list(itertools.product(*param_grid.values()))
+
+    # parametry kolejnych kombinacji (niezależne od instancji)
+    combo_params = [{**fixed_params, **dict(zip(param_names, combo))} for combo in all_combos]
+
+    total = len(all_combos) * len(tsp_files)
+    counter = 0
+
+    start_total = time.perf_counter()
+
+
+    # ============================================
+    # GŁÓWNA PĘTLA
+    # ============================================
+
+    # jedna pula procesów na cały eksperyment (zamiast nowej puli dla
+    # każdej kombinacji) — procesy i skompilowane kernele są używane ponownie;
+    # każdy proces rozgrzewa kernele raz, zanim dostanie pierwsze zadanie.
+    # Procesy startują przez "spawn": fork procesu, który uruchamiał już
+    # kernele parallel=True (warstwa wątków TBB), potrafi się zawiesić.
+    with (
+        IncrementalResultWriter(filename=filename, subfolder=subfolder) as writer,
+        get_context("spawn").Pool(
+            processes=N_WORKERS,
+            initializer=warmup_worker,
+            initargs=(solver, D_warm, warmup_list),
+        ) as pool,
+    ):
+        # ETAP 1: przesiew siatki — jedno uruchomienie każdej kombinacji na
+        # pierwszej (najmniejszej) instancji; do pełnego eksperymentu przechodzą
+        # tylko kombinacje niezdominowane w (czas, koszt) i najlepsze wg kosztu
+        if screen_keep is not None and screen_keep < 1:
+            log.info("Przesiew siatki parametrów (1 powtórzenie, pierwsza instancja)...")
+            kept = screen_grid(pool, solver, D_warm, combo_params, screen_keep, seed=seed)
+            all_combos = [all_combos[i] for i in kept]
+            combo_params = [combo_params[i] for i in kept]
+            total = len(all_combos) * len(tsp_files)
+            log.info("Do pełnego eksperymentu przechodzi %d kombinacji.", len(all_combos))
+
+        # ETAP 2: pełny eksperyment (wszystkie instancje, powtórzenia adaptacyjne)
+        for tsp_file in tsp_files:
+            log.info("\nInstancja: %s", tsp_file)
+            D = load_tsp_matrix_cached(tsp_file)
+
+            # macierz instancji raz w pamięci współdzielonej — zadania niosą
+            # tylko uchwyt (nazwa, kształt, dtype), nie całą macierz
+            shm, D_handle = share_matrix(D)
+            try:
+                # powtórzenia wszystkich kombinacji instancji — kombinacja wraca
+                # (w kolejności repeat_id), gdy koszty się ustabilizowały albo
+                # osiągnęła max_repeats; jej wiersz od razu trafia do pliku wyników
+                for combo_id, results_parallel in run_repeats(
+                    pool, solver, D_handle, combo_params, min_repeats, max_repeats, cv_tol, seed=seed
+                ):
+                    counter += 1
+                    log.info(
+                        "[%d/%d] %s (powtórzeń: %d)",
+                        counter,
+                        total,
+                        ", ".join(f"{name}={value}" for name, value in combo_params[combo_id].items()),
+                        len(results_parallel),
+                    )
+
+                    writer.write(_result_row(tsp_file, param_names, all_combos[combo_id], results_parallel))
+            finally:
+                release_matrix(shm)
+
+
+    # PODSUMOWANIE I ZAPIS WYNIKÓW
+    end_total = time.perf_counter()
+    elapsed = end_total - start_total
+
+    flush_log()
+    print(f"\nŁączny czas eksperymentów: {elapsed/60:.2f} min ({elapsed:.2f} sek)\n")
+
+    df = writer.to_dataframe()
+    save_experiment_results(
+        df,
+        filename=filename,
+        time_seconds=int(elapsed),
+        subfolder=subfolder,
+        show_summary=True,
+        file_format=file_format,
+    )
+    writer.remove()
+
+
+    # RAPORT
+    print("\nNajlepsze parametry dla każdej instancji:")
+
+    for inst in df["instance"].unique():
+        sub = df[df["instance"] == inst]
+        best_row = sub.loc[sub["mean_cost"].idxmin()]
+        print(f"\n{inst}")
+        print(f"odległość {best_row['min_cost']} = {best_row.to_dict()}")
+
+    return df
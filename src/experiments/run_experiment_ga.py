@@ -9,21 +9,20 @@
 #
 # Każda kombinacja parametrów jest wykonywana wielokrotnie,
 # wyniki są zapisywane do CSV i podsumowywane.
+#
+# Przebieg eksperymentu: run_grid() z src/experiments/_driver.py.
+#
+# Liczba procesów puli: zmienna środowiskowa TSP_NWORKERS (domyślnie
+# liczba rdzeni fizycznych, zob. src/utils/workers.py).
+# Komunikaty o postępie: TSP_LOGLEVEL=INFO (zob. src/utils/log.py).
 
-import time
-import pandas as pd
-import numpy as np
-import itertools
-from multiprocessing import Pool, cpu_count
-
-from src.utils.tsp_loader import load_tsp_matrix
-from src.utils.result_saver import save_experiment_results
-from src.utils.run_single_repeat import run_single_repeat
-from src.algorithms.ga import solve_tsp
-from src.utils.distance import route_length_fast
+from src.experiments._driver import run_grid
 
 
 # USTAWIENIA EKSPERYMENTU
+# algorytm (klucz z SOLVER_MODULES w run_single_repeat)
+SOLVER = "ga"
+
 TSP_FILES = ["Dane_TSP_48.xlsx", "Dane_TSP_76.xlsx", "Dane_TSP_127.xlsx"]
 
 PARAM_GRID_GA = {
@@ -35,109 +34,34 @@ PARAM_GRID_GA = {
     "mutation_prob": [0.05, 0.1, 0.2, 0.3],
 }
 
-REPEATS = 5
-
+# powtórzenia adaptacyjne: co najmniej MIN_REPEATS; dopóki pstdev / mean
+# kosztu >= REPEATS_CV_TOL, kolejne powtórzenia aż do MAX_REPEATS
+# (REPEATS_CV_TOL = None -> zawsze dokładnie MIN_REPEATS powtórzeń)
+MIN_REPEATS = 3
+MAX_REPEATS = 10
+REPEATS_CV_TOL = 0.01
 
-if __name__ == "__main__":
-    results = []
+# część siatki zachowywana po przesiewie wg kosztu (+ front Pareto czas/koszt);
+# None wyłącza przesiew i uruchamia pełną siatkę
+SCREEN_KEEP = 0.5
 
+# ziarno eksperymentu (powtarzalne przebiegi); None = przebiegi losowe
+SEED = 0
 
-    # ROZGRZEWANIE NUMBA (JIT)
-    print("Rozgrzewanie (kompilacja JIT route_length_fast)...")
-    D_warm = load_tsp_matrix(TSP_FILES[0])
-    _ = route_length_fast(D_warm, np.random.permutation(D_warm.shape[0]))
-    _ = solve_tsp(D_warm, {})
-    print("Kompilacja zakończona.\n")
+# krótki przebieg rozgrzewający kernele (proces główny i każdy proces puli)
+WARMUP_PARAMS = {"population_size": 4, "generations": 1}
 
 
-    # GENEROWANIE KOMBINACJI
-    all_combos = list(
-        itertools.product(
-            PARAM_GRID_GA["population_size"],
-            PARAM_GRID_GA["generations"],
-            PARAM_GRID_GA["selection"],
-            PARAM_GRID_GA["crossover"],
-            PARAM_GRID_GA["mutation_type"],
-            PARAM_GRID_GA["mutation_prob"],
-        )
+if __name__ == "__main__":
+    run_grid(
+        SOLVER,
+        PARAM_GRID_GA,
+        TSP_FILES,
+        subfolder="GA",
+        warmup_params=WARMUP_PARAMS,
+        min_repeats=MIN_REPEATS,
+        max_repeats=MAX_REPEATS,
+        cv_tol=REPEATS_CV_TOL,
+        screen_keep=SCREEN_KEEP,
+        seed=SEED,
     )
-
-    total = len(all_combos) * len(TSP_FILES)
-    counter = 0
-
-
-    # GŁÓWNA PĘTLA EKSPERYMENTU
-    start_total = time.perf_counter()
-
-    for tsp_file in TSP_FILES:
-        print(f"\nInstancja: {tsp_file}")
-        D = load_tsp_matrix(tsp_file)
-
-        for pop_size, generations, selection, crossover, mut_type, mut_prob in all_combos:
-            counter += 1
-
-            print(
-                f"[{counter}/{total}] "
-                f"population={pop_size}, generations={generations}, "
-                f"selection={selection}, crossover={crossover}, "
-                f"mutation_type={mut_type}, mutation_prob={mut_prob}"
-            )
-
-            params = {
-                "population_size": pop_size,
-                "generations": generations,
-                "selection": selection,
-                "crossover": crossover,
-                "mutation_type": mut_type,
-                "mutation_prob": mut_prob,
-            }
-
-            # multiprocessing — równoległe powtórzenia
-            with Pool(processes=cpu_count()) as pool:
-                parallel_jobs = [(solve_tsp, D, params) for _ in range(REPEATS)]
-                results_parallel = pool.map(run_single_repeat, parallel_jobs)
-
-            costs = [c for c, _, _ in results_parallel]
-            routes = [r for _, r, _ in results_parallel]
-            runtimes = [t for _, _, t in results_parallel]
-
-            # najlepsza trasa z powtórzeń
-            min_cost = min(costs)
-            best_route = routes[costs.index(min_cost)]
-            route_str = "-".join(map(str, best_route))
-
-            # zapis wyniku
-            results.append(
-                {
-                    "instance": tsp_file,
-                    "population_size": pop_size,
-                    "generations": generations,
-                    "selection": selection,
-                    "crossover": crossover,
-                    "mutation_type": mut_type,
-                    "mutation_prob": mut_prob,
-                    "mean_cost": round(np.mean(costs), 3),
-                    "min_cost": round(min_cost, 3),
-                    "mean_runtime": np.mean(runtimes),
-                    "min_route": route_str,
-                }
-            )
-
-
-    # ZAPIS i PODSUMOWANIE
-    end_total = time.perf_counter()
-    elapsed = end_total - start_total
-
-    print(f"\nŁączny czas eksperymentów: {elapsed/60:.2f} min ({elapsed:.2f} sek)\n")
-
-    df = pd.DataFrame(results)
-    save_experiment_results(df, time_seconds=int(elapsed), subfolder="GA")
-
-    print("\nNajlepsze parametry dla każdej instancji:")
-    instances = df["instance"].unique()
-
-    for inst in instances:
-        sub = df[df["instance"] == inst]
-        best_row = sub.loc[sub["mean_cost"].idxmin()]
-        print(f"\n{inst}")
-        print(f"odległość {best_row['min_cost']} = {best_row.to_dict()}")
\ No newline at end of file
@@ -11,19 +11,19 @@
 #   - wyznaczanie średnich kosztów i czasów
 #   - zapisywanie najlepszej (minimalnej) trasy
 #   - zapis wyników przy użyciu save_experiment_results()
+# Wspólny przebieg: run_grid() z src/experiments/_driver.py.
+#
+# Liczba procesów puli: zmienna środowiskowa TSP_NWORKERS (domyślnie
+# liczba rdzeni fizycznych, zob. src/utils/workers.py).
+# Komunikaty o postępie: TSP_LOGLEVEL=INFO (zob. src/utils/log.py).
 
-import time
-import pandas as pd
-import numpy as np
-import itertools
-from multiprocessing import Pool, cpu_count
+from src.experiments._driver import run_grid
 
-from src.utils.tsp_loader import load_tsp_matrix
-from src.algorithms.ihc_numba import solve_tsp
-from src.utils.result_saver import save_experiment_results
-from src.utils.run_single_repeat import run_single_repeat
 
 # USTAWIENIA
+# algorytm (klucz z SOLVER_MODULES w run_single_repeat)
+SOLVER = "ihc"
+
 TSP_FILES = ["Dane_TSP_48.xlsx", "Dane_TSP_76.xlsx", "Dane_TSP_127.xlsx"]
 
 PARAM_GRID = {
@@ -33,107 +33,36 @@ PARAM_GRID = {
     "neighborhood_type": ["swap", "insert", "two_opt"],
 }
 
-REPEATS = 5   # liczba powtórzeń dla każdej kombinacji parametrów
-
-if __name__ == "__main__":
-    results = []  # tablica na wyniki
-
-
-    # ROZGRZANIE NUMBA (KOMPILACJA JIT)
-    print("Rozgrzewanie Numba (kompilacja JIT)...")
-    D = load_tsp_matrix(TSP_FILES[0])
-    _ = solve_tsp(D, {"n_starts": 2})
-    print("Kompilacja zakończona.\n")
-
-
-    # GŁÓWNA PĘTLA
-    # Obliczamy łączną liczbę kombinacji
-    all_combos = list(itertools.product(
-        PARAM_GRID["n_starts"],
-        PARAM_GRID["max_iter"],
-        PARAM_GRID["stop_no_improve"],
-        PARAM_GRID["neighborhood_type"]
-    ))
-    total = len(all_combos) * len(TSP_FILES)
-    counter = 0
-
-    start_total = time.perf_counter()
-
-    for tsp_file in TSP_FILES:
-        print(f"\nInstancja: {tsp_file}")
-        D = load_tsp_matrix(tsp_file)
-
-        for n_starts in PARAM_GRID["n_starts"]:
-            for max_iter in PARAM_GRID["max_iter"]:
-                for stop_no_improve in PARAM_GRID["stop_no_improve"]:
-                    for neighborhood_type in PARAM_GRID["neighborhood_type"]:
-                        counter += 1
+# powtórzenia adaptacyjne: co najmniej MIN_REPEATS; dopóki pstdev / mean
+# kosztu >= REPEATS_CV_TOL, kolejne powtórzenia aż do MAX_REPEATS
+# (REPEATS_CV_TOL = None -> zawsze dokładnie MIN_REPEATS powtórzeń)
+MIN_REPEATS = 3
+MAX_REPEATS = 10
+REPEATS_CV_TOL = 0.01
 
-                        print(
-                            f"[{counter}/{total}] "
-                            f"n_starts={n_starts}, "
-                            f"max_iter={max_iter}, "
-                            f"stop_no_improve={stop_no_improve}, "
-                            f"neigh={neighborhood_type}"
-                        )
+# część siatki zachowywana po przesiewie wg kosztu (+ front Pareto czas/koszt);
+# None wyłącza przesiew i uruchamia pełną siatkę
+SCREEN_KEEP = 0.5
 
-                        params = {
-                            "n_starts": n_starts,
-                            "max_iter": max_iter,
-                            "stop_no_improve": stop_no_improve,
-                            "neighborhood_type": neighborhood_type,
-                            "use_delta": False,
-                        }
+# ziarno eksperymentu (powtarzalne przebiegi); None = przebiegi losowe
+SEED = 0
 
-                        # multiprocessing — równoległe powtórzenia
-                        with Pool(processes=cpu_count()) as pool:
-                            parallel_jobs = [
-                                (solve_tsp, D, params) for _ in range(REPEATS)
-                            ]
+# krótki przebieg rozgrzewający kernele (proces główny i każdy proces puli)
+WARMUP_PARAMS = {"n_starts": 2}
 
-                            results_parallel = pool.map(run_single_repeat, parallel_jobs)
 
-                        costs = [c for c, _, _ in results_parallel]
-                        routes = [r for _, r, _ in results_parallel]
-                        runtimes = [t for _, _, t in results_parallel]
-
-                        # wybór najlepszej trasy
-                        min_cost = min(costs)
-                        best_route_overall = routes[costs.index(min_cost)]
-                        route_str = "-".join(map(str, best_route_overall))
-
-                        # zapis danych
-                        results.append({
-                            "instance": tsp_file,
-                            "n_starts": n_starts,
-                            "max_iter": max_iter,
-                            "stop_no_improve": stop_no_improve,
-                            "neighborhood_type": neighborhood_type,
-                            "mean_cost": round(np.mean(costs), 3),
-                            "mean_runtime": np.mean(runtimes),
-                            "min_cost": round(min_cost, 3),
-                            "min_route": route_str,
-                        })
-
-
-    # PODSUMOWANIE I ZAPIS WYNIKÓW
-    end_total = time.perf_counter()
-    elapsed = end_total - start_total
-
-    print(f"\nŁączny czas eksperymentów: {elapsed/60:.2f} min ({elapsed:.2f} sek)")
-
-    df = pd.DataFrame(results)
-    save_experiment_results(df, filename="no_delta__results.csv", time_seconds=int(elapsed), subfolder="IHC")
-
-
-    # RAPORT
-    print("\nNajlepsze parametry dla każdej instancji:")
-
-    instances = df["instance"].unique()
-
-    for inst in instances:
-        sub = df[df["instance"] == inst]
-        best_row = sub.loc[sub["mean_cost"].idxmin()]
-        print(f"\n{inst}")
-        # print(best_row["min_cost"], best_row.to_dict())
-        print(f"odległość {best_row["min_cost"]} = {best_row.to_dict()}")
\ No newline at end of file
+if __name__ == "__main__":
+    run_grid(
+        SOLVER,
+        PARAM_GRID,
+        TSP_FILES,
+        subfolder="IHC",
+        filename="no_delta__results.csv",
+        warmup_params=WARMUP_PARAMS,
+        fixed_params={"use_delta": False},
+        min_repeats=MIN_REPEATS,
+        max_repeats=MAX_REPEATS,
+        cv_tol=REPEATS_CV_TOL,
+        screen_keep=SCREEN_KEEP,
+        seed=SEED,
+    )
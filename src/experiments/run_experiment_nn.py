@@ -1,80 +1,57 @@
 # %%
-# GRASP – SKRYPT EKSPERYMENTALNY
-# Uruchamia serię eksperymentów dla algorytmu GRASP z różnymi
-# parametrami. Struktura analogiczna do IHC, TS, SA itd.
+# NN – SKRYPT EKSPERYMENTALNY
+# Uruchamia algorytm Najbliższego Sąsiada (NN) dla każdego miasta
+# startowego każdej instancji. Algorytm jest deterministyczny, więc
+# jedno uruchomienie na miasto startowe wystarcza; wyniki (koszt, czas,
+# trasa) trafiają do pliku CSV.
+#
+# Uruchomienia dla różnych miast startowych są niezależne — wykonują
+# się równolegle w puli procesów (jak powtórzenia w pozostałych
+# skryptach).
 #
 # Wymagane:
-#   - solve_tsp() z grasp_numba
-#   - run_single_repeat()
-#   - save_experiment_results()
-#   - load_tsp_matrix()
+#   - solve_tsp() z nn
+#   - run_indexed_repeat(), warmup_worker()
+#   - IncrementalResultWriter, save_experiment_results()
+#   - load_tsp_matrix_cached()
+#
+# Liczba procesów puli: zmienna środowiskowa TSP_NWORKERS (domyślnie
+# liczba rdzeni fizycznych, zob. src/utils/workers.py).
+# Komunikaty o postępie: TSP_LOGLEVEL=INFO (zob. src/utils/log.py).
 
 import time
-import pandas as pd
-import numpy as np
-import itertools
-from multiprocessing import Pool, cpu_count
+from multiprocessing import get_context
 
-from src.utils.tsp_loader import load_tsp_matrix
-from src.algorithms.grasp_numba import solve_tsp
-from src.utils.run_single_repeat import run_single_repeat
-from src.utils.result_saver import save_experiment_results
+from src.utils.tsp_loader import load_tsp_matrix_cached
+from src.utils.run_single_repeat import get_solver, main_warmup_needed, run_indexed_repeat, warmup_worker
+from src.utils.shared_matrix import release_matrix, share_matrix
+from src.utils.result_saver import IncrementalResultWriter, format_route, save_experiment_results
+from src.utils.workers import N_WORKERS
+from src.utils.log import flush_log, get_logger
 
+log = get_logger()
 
-# USTAWIENIA EKSPERYMENTU
 
-TSP_FILES = ["Dane_TSP_48.xlsx", "Dane_TSP_76.xlsx", "Dane_TSP_127.xlsx"]
-# TSP_FILES = ["Dane_TSP_48.xlsx"]
+# USTAWIENIA EKSPERYMENTU
 
-PARAM_GRID_GRASP = {
-    "alpha": [0.2, 0.4, 0.6, 0.8],
-    "iterations": [3_000, 5_000, 8_000, 10_000],
-    "neighborhood_type": ["swap", "insert", "two_opt"],
-    # parametry local-search (IHC-light)
-    "ihc_max_iter": [4_000, 6_000, 8_000],
-    "ihc_stop_no_improve": [400, 800, 1_500],
-    # "use_delta": [True], # zawsze delta
-    "use_delta": [False], # bez delta
-}
+# algorytm (klucz z SOLVER_MODULES w run_single_repeat)
+SOLVER = "nn"
+solve_tsp = get_solver(SOLVER)
 
-REPEATS = 5
+TSP_FILES = ["Dane_TSP_48.xlsx", "Dane_TSP_76.xlsx", "Dane_TSP_127.xlsx"]
 
 
 if __name__ == "__main__":
-    results = []
-
-    # ROZGRZANIE
-
-    print("Rozgrzewanie Numba (kompilacja GRASP + IHC-light)...")
+    # ROZGRZANIE — w procesie głównym tylko przy nieaktualnym cache Numba
+    # (procesy puli rozgrzewają się zawsze w initializerze)
 
-    D_tmp = load_tsp_matrix(TSP_FILES[0])
+    D_tmp = load_tsp_matrix_cached(TSP_FILES[0])
+    warmup_params = {"start_city": 0}
 
-    # poprawna rozgrzewka: solve_tsp wymaga neighborhood_type jako string
-    _ = solve_tsp(D_tmp, {
-        "alpha": 0.3,
-        "iterations": 2,
-        "neighborhood_type": "swap",
-        "ihc_max_iter": 50,
-        "ihc_stop_no_improve": 10,
-        "use_delta": False,
-    })
-
-    print("Rozgrzewanie zakończone.\n")
-
-
-    # LISTA KOMBINACJI PARAMETRÓW
-
-    all_combos = list(itertools.product(
-        PARAM_GRID_GRASP["alpha"],
-        PARAM_GRID_GRASP["iterations"],
-        PARAM_GRID_GRASP["neighborhood_type"],
-        PARAM_GRID_GRASP["ihc_max_iter"],
-        PARAM_GRID_GRASP["ihc_stop_no_improve"],
-        PARAM_GRID_GRASP["use_delta"],
-    ))
-
-    total = len(all_combos) * len(TSP_FILES)
-    counter = 0
+    if main_warmup_needed(SOLVER):
+        log.info("Rozgrzewanie Numba (kompilacja NN)...")
+        _ = solve_tsp(D_tmp, warmup_params)
+        log.info("Rozgrzewanie zakończone.\n")
 
     start_total = time.perf_counter()
 
@@ -83,59 +60,52 @@ if __name__ == "__main__":
     # GŁÓWNA PĘTLA
     # ============================================
 
-    for tsp_file in TSP_FILES:
-        print(f"\nInstancja: {tsp_file}")
-        D = load_tsp_matrix(tsp_file)
-
-        for alpha, iterations, neigh_type, ihc_iter, ihc_noimp, use_delta in all_combos:
-
-            counter += 1
-            print(
-                f"[{counter}/{total}] "
-                f"alpha={alpha}, iter={iterations}, neigh={neigh_type}, "
-                f"ihc_iter={ihc_iter}, ihc_noimp={ihc_noimp}, delta={use_delta}"
-            )
-
-            params = {
-                "alpha": alpha,
-                "iterations": iterations,
-                "neighborhood_type": neigh_type,
-                "ihc_max_iter": ihc_iter,
-                "ihc_stop_no_improve": ihc_noimp,
-                "use_delta": use_delta,
-            }
-
-            # multiprocessing – równolegle REPEATS razy
-            with Pool(processes=cpu_count()) as pool:
-                parallel_jobs = [
-                    (solve_tsp, D, params) for _ in range(REPEATS)
+    # jedna pula procesów na cały eksperyment, rozgrzana w initializerze;
+    # procesy startują przez "spawn" (fork po kernelach parallel=True
+    # z warstwą wątków TBB potrafi się zawiesić)
+    with (
+        IncrementalResultWriter(subfolder="NN") as writer,
+        get_context("spawn").Pool(
+            processes=N_WORKERS,
+            initializer=warmup_worker,
+            initargs=(SOLVER, D_tmp, [warmup_params]),
+        ) as pool,
+    ):
+        for tsp_file in TSP_FILES:
+            log.info("\nInstancja: %s", tsp_file)
+            D = load_tsp_matrix_cached(tsp_file)
+            n = D.shape[0]
+
+            # macierz instancji raz w pamięci współdzielonej — zadania niosą
+            # tylko uchwyt (nazwa, kształt, dtype), nie całą macierz
+            shm, D_handle = share_matrix(D)
+            try:
+                # jedno zadanie na miasto startowe (combo_id = start_city);
+                # pojedynczy przebieg NN trwa ułamek milisekundy, więc zadania
+                # idą do procesów paczkami, żeby narzut wysyłki nie dominował
+                jobs = [
+                    (start_city, 0, SOLVER, D_handle, {"start_city": start_city})
+                    for start_city in range(n)
                 ]
-                results_parallel = pool.map(run_single_repeat, parallel_jobs)
-
-            # rozpakowanie wyników
-            costs = [c for c, _, _ in results_parallel]
-            routes = [r for _, r, _ in results_parallel]
-            runtimes = [t for _, _, t in results_parallel]
-
-            # najlepsza trasa
-            min_cost = min(costs)
-            best_route = routes[costs.index(min_cost)]
-            route_str = "-".join(map(str, best_route))
-
-            results.append({
-                "instance": tsp_file,
-                "alpha": alpha,
-                "iterations": iterations,
-                "neighborhood_type": neigh_type,
-                "ihc_max_iter": ihc_iter,
-                "ihc_stop_no_improve": ihc_noimp,
-                "use_delta": use_delta,
-
-                "mean_cost": round(np.mean(costs), 3),
-                "mean_runtime": np.mean(runtimes),
-                "min_cost": round(min_cost, 3),
-                "min_route": route_str,
-            })
+                chunksize = max(1, len(jobs) // (N_WORKERS * 4))
+
+                rows = sorted(
+                    pool.imap_unordered(run_indexed_repeat, jobs, chunksize=chunksize),
+                    key=lambda r: r[0],
+                )
+            finally:
+                release_matrix(shm)
+
+            for start_city, _, cost, route, runtime in rows:
+                writer.write({
+                    "instance": tsp_file,
+                    "start_city": start_city,
+                    "cost": round(cost, 3),
+                    "runtime": runtime,
+                    "min_route": format_route(route),
+                })
+
+            log.info("Uruchomiono NN dla %d miast startowych", n)
 
 
     # PODSUMOWANIE
@@ -143,18 +113,19 @@ if __name__ == "__main__":
     end_total = time.perf_counter()
     elapsed = end_total - start_total
 
+    flush_log()
     print(f"\nŁączny czas eksperymentów: {elapsed/60:.2f} min ({elapsed:.2f} sek)\n")
 
-    df = pd.DataFrame(results)
-    save_experiment_results(df, time_seconds=int(elapsed), subfolder="GRASP")
+    df = writer.to_dataframe()
+    save_experiment_results(df, time_seconds=int(elapsed), subfolder="NN", show_summary=True)
+    writer.remove()
 
-    print("\nNajlepsze parametry dla każdej instancji:")
+    print("\nNajlepsze miasto startowe dla każdej instancji:")
 
     instances = df["instance"].unique()
 
     for inst in instances:
         sub = df[df["instance"] == inst]
-        best_row = sub.loc[sub["mean_cost"].idxmin()]
+        best_row = sub.loc[sub["cost"].idxmin()]
         print(f"\n{inst}")
-        # print(best_row["min_cost"], best_row.to_dict())
-        print(f"odległość {best_row['min_cost']} = {best_row.to_dict()}")
+        print(f"odległość {best_row['cost']} = {best_row.to_dict()}")
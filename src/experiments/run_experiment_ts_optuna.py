@@ -1,17 +1,40 @@
 # %%
+import os
 import optuna
 import pandas as pd
 import numpy as np
-from multiprocessing import Pool, cpu_count
+from datetime import datetime
+from multiprocessing import get_context
 
 # Import algorytmu Tabu Search i narzędzi pomocniczych
-from src.algorithms.tabu_full_path import solve_tsp
-from src.utils.tsp_loader import load_tsp_matrix
-from src.utils.result_saver import save_experiment_results
-from src.utils.run_single_repeat import run_single_repeat
+from src.utils.tsp_loader import load_tsp_matrix_cached
+from src.utils.result_saver import format_route, results_dir, save_experiment_results
+from src.utils.run_single_repeat import get_solver, warmup_worker
+from src.utils.shared_matrix import attach_matrix, release_matrix, share_matrix
+from src.utils.workers import N_WORKERS
+
+try:  # optuna >= 4.0
+    from optuna.storages.journal import JournalFileBackend
+except ImportError:  # optuna 3.x
+    from optuna.storages import JournalFileStorage as JournalFileBackend
+
+# RÓWNOLEGŁOŚĆ: WIELE PROCESÓW OPTUNY NA WSPÓLNYM MAGAZYNIE
+# ---------------------------------------------
+# Zamiast równoległych powtórzeń w obrębie jednego triala (REPEATS zadań,
+# a między trialami rdzenie czekają na sampler) uruchamiamy N_WORKERS
+# procesów, z których każdy wykonuje własne study.optimize() na tym samym
+# badaniu w JournalStorage (plik dziennika). Powtórzenia triala liczą się
+# szeregowo w jego procesie, a wszystkie rdzenie pracują także na
+# granicach triali. TPESampler(constant_liar=True) traktuje triale
+# w toku jako "wstępnie ocenione", żeby procesy nie losowały tych samych
+# parametrów.
+# ---------------------------------------------
 
 # %%
 # Konfiguracja eksperymentu
+# algorytm (klucz z SOLVER_MODULES w run_single_repeat) — tabu_full_path
+SOLVER = "ts_path"
+
 INSTANCES = [
     'Dane_TSP_48.xlsx',
     'Dane_TSP_76.xlsx',
@@ -24,12 +47,60 @@ N_TRIALS = 100
 # Liczba powtórzeń dla każdego zestawu parametrów
 REPEATS = 5
 
+# PRZYCINANIE (PRUNING) TRIALI
+# Po każdym powtórzeniu trial raportuje najlepszy koszt dotychczasowych
+# powtórzeń (krok = numer powtórzenia). MedianPruner przerywa trial, gdy
+# ten koszt jest gorszy od mediany innych triali w tym samym kroku —
+# słabe zestawy parametrów nie wykonują wtedy wszystkich REPEATS
+# przebiegów. Przez pierwsze PRUNE_STARTUP_TRIALS triali nic nie jest
+# przycinane (mediana z kilku wyników jest niewiarygodna).
+PRUNE_STARTUP_TRIALS = 10
+
+# krótki przebieg rozgrzewający kernele w każdym procesie roboczym
+WARMUP_PARAMS = [
+    {"max_iter": 5, "tabu_tenure": 3, "n_neighbors": 5, "neighborhood_type": nt}
+    for nt in ("swap", "insert", "two_opt")
+]
+
 # %%
+def find_duplicate_trial(trial, params):
+    """
+    Zakończony trial tego samego badania z identycznymi parametrami (albo None).
+    Przestrzeń jest dyskretna (step= i 3 operatory), więc TPE potrafi
+    zaproponować ten sam zestaw ponownie — historia jest wspólna (magazyn
+    badania), więc duplikat wykryjemy także po trialu z innego procesu.
+    """
+    for past in trial.study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)):
+        if past.params == params:
+            return past
+    return None
+
+
+def set_repeat_attrs(trial, costs, runtimes, routes):
+    """
+    Agregacja powtórzeń (najlepsze przez argmin) do atrybutów triala:
+    min_route, mean_cost, mean_runtime. Zwraca minimalny koszt.
+    """
+    best_idx = int(costs.argmin())
+    trial.set_user_attr("min_route", format_route(routes[best_idx]))
+    trial.set_user_attr("mean_cost", float(costs.mean()))
+    trial.set_user_attr("mean_runtime", float(runtimes.mean()))
+    return float(costs[best_idx])
+
+
+def make_pruner():
+    """Pruner badań (nie jest zapisywany w magazynie — każdy proces tworzy własny)."""
+    return optuna.pruners.MedianPruner(n_startup_trials=PRUNE_STARTUP_TRIALS, n_warmup_steps=0)
+
+
 def objective(trial, distance_matrix):
     """
     Funkcja celu dla Optuny.
     Optuna dobiera parametry, my uruchamiamy algorytm wielokrotnie (REPEATS) 
     i zwracamy wynik (minimalny koszt z powtórzeń).
+    Powtórzenia wykonują się szeregowo — równolegle działają całe triale
+    (osobne procesy optimize_worker). Po każdym powtórzeniu trial może
+    zostać przycięty (zob. PRUNE_STARTUP_TRIALS).
     """
     # Definiujemy zakresy, z których Optuna może losować wartości.
     max_iter = trial.suggest_int("max_iter", 5_000, 100_000, step=5_000)
@@ -48,83 +119,150 @@ def objective(trial, distance_matrix):
         "neighborhood_type": neighborhood_type
     }
     
-    # Uruchomienie Algorytmu Tabu Search wielokrotnie (równolegle)
-    with Pool(processes=cpu_count()) as pool:
-        parallel_jobs = [
-            (solve_tsp, distance_matrix, params) for _ in range(REPEATS)
-        ]
-        # run_single_repeat zwraca (cost, route, runtime)
-        results_parallel = pool.map(run_single_repeat, parallel_jobs)
-    
-    # Agregacja wyników
-    costs = [res[0] for res in results_parallel]
-    routes = [res[1] for res in results_parallel]
-    runtimes = [res[2] for res in results_parallel]
-    
-    min_cost = min(costs)
-    mean_cost = np.mean(costs)
-    mean_runtime = np.mean(runtimes)
-    
-    # Znalezienie trasy odpowiadającej minimalnemu kosztowi
-    best_idx = costs.index(min_cost)
-    best_route = routes[best_idx]
+    # Ten sam zestaw parametrów był już oceniony — przepisujemy wynik
+    # i statystyki zamiast ponownie wykonywać REPEATS przebiegów
+    duplicate = find_duplicate_trial(trial, params)
+    if duplicate is not None:
+        for key in ("min_route", "mean_cost", "mean_runtime"):
+            trial.set_user_attr(key, duplicate.user_attrs.get(key))
+        trial.set_user_attr("duplicate_of", duplicate.number)
+        return duplicate.value
+
+    # Uruchomienie Algorytmu Tabu Search wielokrotnie — koszty i czasy
+    # od razu do tablic NumPy, trasy do listy
+    solve_tsp = get_solver(SOLVER)
+    costs = np.empty(REPEATS)
+    runtimes = np.empty(REPEATS)
+    routes = []
+    for r in range(REPEATS):
+        route, costs[r], runtimes[r], _ = solve_tsp(distance_matrix, params)
+        routes.append(route)
+
+        # raport pośredni: najlepszy koszt po r + 1 powtórzeniach
+        trial.report(float(costs[: r + 1].min()), r)
+        if r + 1 < REPEATS and trial.should_prune():
+            # statystyki z wykonanych powtórzeń zostają w atrybutach triala
+            set_repeat_attrs(trial, costs[: r + 1], runtimes[: r + 1], routes)
+            raise optuna.TrialPruned()
     
-    # Zapisanie dodatkowych statystyk w atrybutach triala
-    route_str = "-".join(map(str, best_route))
-    trial.set_user_attr("min_route", route_str)
-    trial.set_user_attr("mean_cost", mean_cost)
-    trial.set_user_attr("mean_runtime", mean_runtime)
+    min_cost = set_repeat_attrs(trial, costs, runtimes, routes)
     
     # Optuna minimalizuje wartość zwracaną. 
     # Zwracamy min_cost (najlepszy wynik z serii), aby znaleźć parametry dające szansę na najlepszy wynik.
     # Można by też zwracać mean_cost, jeśli zależy nam na stabilności.
     return min_cost
 
+
+def journal_storage(path):
+    """Magazyn Optuny w pliku dziennika — współdzielony przez procesy."""
+    return optuna.storages.JournalStorage(JournalFileBackend(path))
+
+
+def optimize_worker(args):
+    """
+    Proces roboczy: dołącza do badania w magazynie i wykonuje n_trials triali.
+
+    Parametry:
+        args : tuple
+            (matrix_handle, storage_path, study_name, n_trials, worker_id)
+            matrix_handle to uchwyt macierzy instancji z share_matrix()
+    """
+    matrix_handle, storage_path, study_name, n_trials, worker_id = args
+    if n_trials == 0:
+        return
+
+    # macierz z pamięci współdzielonej (kopiowana raz na instancję w procesie)
+    distance_matrix = attach_matrix(matrix_handle)
+
+    # każdy proces ma własny sampler (inne ziarno), wspólna jest historia triali
+    sampler = optuna.samplers.TPESampler(seed=42 + worker_id, constant_liar=True)
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=journal_storage(storage_path),
+        sampler=sampler,
+        pruner=make_pruner(),
+    )
+    study.optimize(lambda trial: objective(trial, distance_matrix), n_trials=n_trials)
+
 # %%
 if __name__ == "__main__":
     experiment_results = []
 
-    for instance_file in INSTANCES:
-        print(f"\nOptymalizacja dla instancji: {instance_file}")
-
-        distance_matrix = load_tsp_matrix(instance_file)
-
-        sampler = optuna.samplers.TPESampler(seed=42)
-        study = optuna.create_study(direction="minimize", sampler=sampler)
-
-        # Parametry startowe (warm start)
-        study.enqueue_trial({
-            "max_iter": 5_000,
-            "stop_no_improve": 500,
-            "tabu_tenure": 10,
-            "n_neighbors": 30,
-            "neighborhood_type": "two_opt"
-        })
-
-        study.optimize(lambda trial: objective(trial, distance_matrix), n_trials=N_TRIALS)
-
-        print(f"Najlepsze parametry dla {instance_file}: {study.best_params}")
-        print(f"Najlepszy koszt dla {instance_file}: {study.best_value}")
-
-        df_trials = study.trials_dataframe()
-
-        for _, row in df_trials.iterrows():
-            record = {
-                "instance": instance_file,
-                "max_iter": row.get("params_max_iter"),
-                "tabu_tenure": row.get("params_tabu_tenure"),
-                "n_neighbors": row.get("params_n_neighbors"),
-                "neighborhood_type": row.get("params_neighborhood_type"),
-                "stop_no_improve": row.get("params_stop_no_improve"),
-                # Statystyki z powtórzeń
-                "min_cost": row.get("value"),
-                "mean_cost": row.get("user_attrs_mean_cost"),
-                "mean_runtime": row.get("user_attrs_mean_runtime"),
-                "min_route": row.get("user_attrs_min_route"),
-                "state": row.get("state"),
-                "trial_number": row.get("number")
-            }
-            experiment_results.append(record)
+    # plik dziennika badań (jeden na uruchomienie skryptu)
+    timestamp = datetime.now().strftime("%Y-%m-%d__%H-%M")
+    storage_path = os.path.join(results_dir("TS_Optuna"), f"{timestamp}__optuna_journal.log")
+    storage = journal_storage(storage_path)
+
+    # podział N_TRIALS między procesy (pierwsze procesy biorą resztę z dzielenia)
+    base, extra = divmod(N_TRIALS, N_WORKERS)
+    trials_per_worker = [base + (1 if w < extra else 0) for w in range(N_WORKERS)]
+
+    # jedna pula na wszystkie instancje; procesy rozgrzewają kernele raz
+    # w initializerze ("spawn" jak w pozostałych skryptach: fork po
+    # kernelach parallel=True z TBB potrafi się zawiesić)
+    with get_context("spawn").Pool(
+        processes=N_WORKERS,
+        initializer=warmup_worker,
+        initargs=(SOLVER, load_tsp_matrix_cached(INSTANCES[0]), WARMUP_PARAMS),
+    ) as pool:
+        for instance_file in INSTANCES:
+            print(f"\nOptymalizacja dla instancji: {instance_file}")
+
+            study_name = f"{SOLVER}__{instance_file}"
+            study = optuna.create_study(
+                direction="minimize", storage=storage, study_name=study_name, pruner=make_pruner()
+            )
+
+            # Parametry startowe (warm start)
+            study.enqueue_trial({
+                "max_iter": 5_000,
+                "stop_no_improve": 500,
+                "tabu_tenure": 10,
+                "n_neighbors": 30,
+                "neighborhood_type": "two_opt"
+            })
+
+            # macierz instancji raz w pamięci współdzielonej — procesy dostają
+            # tylko uchwyt, zamiast każdy wczytywać plik instancji osobno
+            shm, D_handle = share_matrix(load_tsp_matrix_cached(instance_file))
+            try:
+                pool.map(
+                    optimize_worker,
+                    [
+                        (D_handle, storage_path, study_name, n_trials, worker_id)
+                        for worker_id, n_trials in enumerate(trials_per_worker)
+                    ],
+                    chunksize=1,
+                )
+            finally:
+                release_matrix(shm)
+
+            study = optuna.load_study(study_name=study_name, storage=storage)
+
+            print(f"Najlepsze parametry dla {instance_file}: {study.best_params}")
+            print(f"Najlepszy koszt dla {instance_file}: {study.best_value}")
+
+            df_trials = study.trials_dataframe()
+
+            for _, row in df_trials.iterrows():
+                record = {
+                    "instance": instance_file,
+                    "max_iter": row.get("params_max_iter"),
+                    "tabu_tenure": row.get("params_tabu_tenure"),
+                    "n_neighbors": row.get("params_n_neighbors"),
+                    "neighborhood_type": row.get("params_neighborhood_type"),
+                    "stop_no_improve": row.get("params_stop_no_improve"),
+                    # Statystyki z powtórzeń
+                    "min_cost": row.get("value"),
+                    "mean_cost": row.get("user_attrs_mean_cost"),
+                    "mean_runtime": row.get("user_attrs_mean_runtime"),
+                    "min_route": row.get("user_attrs_min_route"),
+                    "state": row.get("state"),
+                    "duplicate_of": row.get("user_attrs_duplicate_of"),
+                    "trial_number": row.get("number")
+                }
+                experiment_results.append(record)
+
 
     # %%
     if experiment_results:
@@ -133,7 +271,9 @@ if __name__ == "__main__":
         # Sortowanie wyników: najpierw po instancji, potem po numerze triala
         df_final = df_final.sort_values(by=["instance", "trial_number"])
 
-        save_experiment_results(df_final, time_seconds=0, subfolder="TS_Optuna", sort_by_cost=False)
+        save_experiment_results(
+            df_final, time_seconds=0, subfolder="TS_Optuna", sort_by_cost=False, show_summary=True
+        )
 
         print("\nWyniki zostały zapisane pomyślnie w folderze project/results/TS_Optuna/")
         print(df_final[["instance", "trial_number", "min_cost", "mean_cost", "mean_runtime"]].head())
\ No newline at end of file
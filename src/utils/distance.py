@@ -7,7 +7,13 @@ from numba import njit
 #   • route_length_fast – wariant zoptymalizowany, kompilowany
 #                         przez Numba (szybki, używany we wszystkich algorytmach)
 #
-# Obie funkcje obliczają pełną długość cyklu Hamiltona, tzn.
+#   • route_length_batch – wariant NumPy liczący długości wielu tras
+#                          naraz (np. całej populacji w GA)
+#
+#   • compact_distance_matrix – zamiana macierzy o całkowitych wartościach
+#                               (np. TSPLIB EUC_2D / ATT) na int32
+#
+# Wszystkie funkcje obliczają pełną długość cyklu Hamiltona, tzn.
 # sumują koszty kolejnych przejść route[i] -> route[i+1],
 # a na końcu dodają powrót z ostatniego miasta do pierwszego.
 # ------------------------------------------------------------
@@ -30,11 +36,65 @@ def route_length_np(distance_matrix, route):
     Zwraca:
         float : całkowita długość trasy.
     """
-    return (
-        np.sum(distance_matrix[route[:-1], route[1:]])
-        + distance_matrix[route[-1], route[0]]
-    )
+    # metoda .sum() tablicy zamiast np.sum(): bez warstwy dispatchu
+    # np.sum (przy n ~ 100 to ona, a nie samo sumowanie, dominuje czas)
+    return distance_matrix[route[:-1], route[1:]].sum() + distance_matrix[route[-1], route[0]]
+
+
+def route_length_batch(distance_matrix, routes):
+    """
+    Obliczanie długości wielu tras naraz (wersja NumPy)
+    ---------------------------------------------------
+    Wariant wektorowy dla macierzy tras (jeden wiersz = jedna trasa).
+    Zamiast wywoływać route_length_fast osobno dla każdej trasy
+    (narzut wywołania z Pythona), wszystkie krawędzie są pobierane
+    z macierzy odległości jedną operacją indeksowania.
+
+    Parametry:
+        distance_matrix : np.ndarray (n x n)
+            Macierz odległości pomiędzy miastami.
+        routes : np.ndarray (m x n)
+            Macierz tras — każdy wiersz to permutacja miast.
+
+    Zwraca:
+        np.ndarray (m) : długości kolejnych tras.
+    """
+    return distance_matrix[routes[:, :-1], routes[:, 1:]].sum(axis=1) + distance_matrix[
+        routes[:, -1], routes[:, 0]
+    ]
+
+
+def compact_distance_matrix(distance_matrix):
+    """
+    Zmniejszenie typu macierzy odległości
+    -------------------------------------
+    Jeśli wszystkie odległości są liczbami całkowitymi mieszczącymi się
+    w int32 (typowe instancje TSPLIB), zwraca kopię macierzy jako int32
+    (C-contiguous). Każdy odczyt wiersza / krawędzi w kernelach Numba
+    przenosi wtedy połowę bajtów względem float64. W przeciwnym razie
+    zwracana jest oryginalna macierz, w razie potrzeby skopiowana do
+    układu C-contiguous (np. gdy przekazano transpozycję lub wycinek) —
+    kernele zakładają układ wierszowy i czytają wiersze z krokiem 1.
+
+    Kernele liczą koszty w float64 niezależnie od typu macierzy, więc
+    wyniki są identyczne jak dla oryginalnej macierzy.
+
+    Parametry:
+        distance_matrix : np.ndarray (n x n)
+
+    Zwraca:
+        np.ndarray (n x n) : macierz int32 albo oryginalna macierz (C-contiguous).
+    """
+    if distance_matrix.dtype == np.int32 or distance_matrix.dtype.kind != "f":
+        return np.ascontiguousarray(distance_matrix)
+
+    limit = np.iinfo(np.int32).max
+    if not np.all(np.isfinite(distance_matrix)) or np.abs(distance_matrix).max() > limit:
+        return np.ascontiguousarray(distance_matrix)
+    if not np.array_equal(distance_matrix, np.rint(distance_matrix)):
+        return np.ascontiguousarray(distance_matrix)
 
+    return distance_matrix.astype(np.int32, order="C")
 
 
 @njit(cache=True)
@@ -0,0 +1,84 @@
+import math
+import numpy as np
+
+from src.utils.rng import with_repeat_seed
+from src.utils.run_single_repeat import run_indexed_repeat
+from src.utils.workers import N_WORKERS
+from src.utils.shared_matrix import release_matrix, share_matrix
+
+# PRZESIEW SIATKI PARAMETRÓW (ETAP 1)
+# ---------------------------------------------
+# Przed pełnym eksperymentem (wszystkie instancje × REPEATS) każda
+# kombinacja parametrów jest uruchamiana raz na małej instancji. Do
+# etapu 2 przechodzą tylko kombinacje, które nie są zdominowane:
+#   • front Pareto w płaszczyźnie (czas, koszt) — żadna inna kombinacja
+#     nie jest jednocześnie szybsza i lepsza,
+#   • oraz keep_fraction najlepszych kombinacji wg kosztu.
+# Odrzucane są więc kombinacje i wolne, i słabe jakościowo — zwykle
+# duża część siatki (np. ogromne populacje GA dla 48 miast).
+# ---------------------------------------------
+
+
+def pareto_front(costs, runtimes):
+    """
+    Indeksy punktów niezdominowanych w (runtime, cost) — minimalizujemy oba.
+    """
+    order = np.lexsort((costs, runtimes))  # rosnąco po czasie, remis po koszcie
+    front = []
+    best_cost = math.inf
+    for idx in order:
+        if costs[idx] < best_cost:
+            front.append(int(idx))
+            best_cost = costs[idx]
+    return front
+
+
+def select_combos(costs, runtimes, keep_fraction):
+    """
+    Zwraca posortowane indeksy kombinacji przechodzących do etapu 2:
+    front Pareto (czas, koszt) ∪ ceil(keep_fraction · m) najlepszych wg kosztu.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    runtimes = np.asarray(runtimes, dtype=np.float64)
+
+    k = max(1, math.ceil(keep_fraction * costs.shape[0]))
+    kept = set(np.argsort(costs, kind="stable")[:k].tolist())
+    kept.update(pareto_front(costs, runtimes))
+    return sorted(kept)
+
+
+def screen_grid(pool, solver, distance_matrix, combo_params, keep_fraction, seed=None):
+    """
+    Etap 1: jedno uruchomienie każdej kombinacji na podanej instancji
+    (w puli procesów) i wybór kombinacji do pełnego eksperymentu.
+
+    Parametry:
+        pool : multiprocessing.Pool - pula procesów eksperymentu
+        solver : klucz algorytmu z SOLVER_MODULES (albo funkcja solve_tsp)
+        distance_matrix : np.ndarray - mała instancja do przesiewu
+        combo_params : list[dict] - parametry kolejnych kombinacji
+        keep_fraction : float - część kombinacji zachowywana wg kosztu
+        seed : int | None - ziarno eksperymentu (zob. rng.repeat_seed())
+
+    Zwraca:
+        list[int] : indeksy zachowanych kombinacji (rosnąco)
+    """
+    m = len(combo_params)
+    costs = np.empty(m, dtype=np.float64)
+    runtimes = np.empty(m, dtype=np.float64)
+
+    shm, handle = share_matrix(distance_matrix)
+    try:
+        jobs = [
+            (combo_id, 0, solver, handle, with_repeat_seed(params, seed, combo_id, 0))
+            for combo_id, params in enumerate(combo_params)
+        ]
+        chunksize = max(1, m // (N_WORKERS * 8))
+
+        for combo_id, _, cost, _, runtime in pool.imap_unordered(run_indexed_repeat, jobs, chunksize=chunksize):
+            costs[combo_id] = cost
+            runtimes[combo_id] = runtime
+    finally:
+        release_matrix(shm)
+
+    return select_combos(costs, runtimes, keep_fraction)
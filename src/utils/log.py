@@ -0,0 +1,39 @@
+import logging
+import logging.handlers
+import os
+import sys
+
+# LOGOWANIE POSTĘPU EKSPERYMENTÓW
+# ---------------------------------------------
+# Komunikaty o postępie (rozgrzewka, przesiew, kolejne kombinacje) idą
+# przez logger "tsp" zamiast print(). Poziom ustawia zmienna środowiskowa
+# TSP_LOGLEVEL (domyślnie WARNING — postęp jest wyciszony), np.:
+#   TSP_LOGLEVEL=INFO python -m src.experiments.run_experiment_ts
+#
+# Wpisy są buforowane (MemoryHandler) i wypisywane paczkami po BUFFER
+# wpisów, przy ostrzeżeniu / błędzie albo przez flush_log() — zamiast
+# opróżniania stdout po każdej z tysięcy kombinacji.
+# Podsumowanie i raport na końcu skryptów nadal używają print().
+# ---------------------------------------------
+
+BUFFER = 64
+
+
+def get_logger():
+    """Logger "tsp" (konfigurowany przy pierwszym wywołaniu)."""
+    logger = logging.getLogger("tsp")
+    if not logger.handlers:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(
+            logging.handlers.MemoryHandler(BUFFER, flushLevel=logging.WARNING, target=stream)
+        )
+        logger.setLevel(os.environ.get("TSP_LOGLEVEL", "WARNING").upper())
+        logger.propagate = False
+    return logger
+
+
+def flush_log():
+    """Wypisuje zbuforowane wpisy (np. przed podsumowaniem wypisywanym przez print)."""
+    for handler in get_logger().handlers:
+        handler.flush()
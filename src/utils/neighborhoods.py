@@ -11,9 +11,24 @@ import numpy as np
 #   - tworzą nową trasę (route.copy()), nie modyfikują oryginału
 #   - działają w czystym Pythonie / NumPy
 #   - są używane m.in. w Tabu Search (wersja bez Numba)
+#   - losują pozycje dokładnie dwoma wywołaniami randint (jak wersje
+#     Numba), a nie np.random.choice(n, 2, replace=False), które przy
+#     każdym ruchu alokuje i tasuje tablicę n indeksów
 # ------------------------------------------------
 
 
+def _two_positions(n: int) -> tuple[int, int]:
+    """
+    Dwie różne losowe pozycje z zakresu 0..n-1: j losowane z n - 1
+    pozycji i przesuwane o jeden, gdy j >= i (bez pętli odrzucania).
+    """
+    i = np.random.randint(n)
+    j = np.random.randint(n - 1)
+    if j >= i:
+        j += 1
+    return i, j
+
+
 def swap(route: np.ndarray) -> np.ndarray:
     """
     Operator sąsiedztwa: SWAP
@@ -29,7 +44,7 @@ def swap(route: np.ndarray) -> np.ndarray:
             Nowa trasa po wykonaniu ruchu swap.
     """
     new_route = route.copy()
-    i, j = np.random.choice(len(route), 2, replace=False)
+    i, j = _two_positions(len(route))
     new_route[i], new_route[j] = new_route[j], new_route[i]
     return new_route
 
@@ -50,11 +65,17 @@ def insert(route: np.ndarray) -> np.ndarray:
             Nowa trasa po wykonaniu ruchu insert.
     """
     new_route = route.copy()
-    i, j = np.random.choice(len(route), 2, replace=False)
-    city = new_route[i]
-
-    new_route = np.delete(new_route, i)
-    new_route = np.insert(new_route, j, city)
+    i, j = _two_positions(len(route))
+    city = route[i]
+
+    # przesunięcie fragmentu między i a j o jedną pozycję (jedna kopia
+    # wycinka z oryginału zamiast np.delete + np.insert, które alokują
+    # dwie nowe tablice)
+    if i < j:
+        new_route[i:j] = route[i + 1:j + 1]
+    else:
+        new_route[j + 1:i + 1] = route[j:i]
+    new_route[j] = city
 
     return new_route
 
@@ -75,8 +96,13 @@ def two_opt(route: np.ndarray) -> np.ndarray:
             Nowa trasa po zastosowaniu ruchu two-opt.
     """
     new_route = route.copy()
-    i, j = sorted(np.random.choice(len(route), 2, replace=False))
-    new_route[i:j] = new_route[i:j][::-1]
+    i, j = _two_positions(len(route))
+    if i > j:
+        i, j = j, i
+    # odwrócony widok fragmentu oryginału — route i new_route to różne
+    # tablice, więc NumPy przypisuje bez bufora pośredniego (w przeciwieństwie
+    # do new_route[i:j] = new_route[i:j][::-1])
+    new_route[i:j] = route[i:j][::-1]
     return new_route
 
 
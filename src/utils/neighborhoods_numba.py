@@ -15,12 +15,25 @@ from src.utils.distance import route_length_fast
 #
 # Operator neighbor_cost pozwala szybko wyliczać koszt
 # wygenerowanego sąsiada i wybiera operator na podstawie
-# identyfikatora liczbowego (0, 1, 2).
+# identyfikatora liczbowego (0, 1, 2). neighbor_cost_into robi to samo,
+# ale zapisuje sąsiada do podanego bufora (bez alokacji).
 # ------------------------------------
 
 
 @njit(cache=True)
-def neighbor_swap(route):
+def _copy_into(route, out):
+    """
+    Kopia trasy do bufora out (lub nowa tablica, gdy out jest None —
+    gałąź rozstrzygana przy kompilacji).
+    """
+    if out is None:
+        return route.copy()
+    out[:] = route
+    return out
+
+
+@njit(cache=True)
+def neighbor_swap(route, out=None):
     """
     Operator sąsiedztwa: SWAP
     -------------------------
@@ -30,17 +43,21 @@ def neighbor_swap(route):
     Parametry:
         route : 1D array
             Bieżąca trasa TSP (permutacja).
+        out : 1D array lub None
+            Bufor na nową trasę (ten sam rozmiar co route). Gdy podany,
+            ruch zapisywany jest do niego zamiast do nowej tablicy.
 
     Zwraca:
         new_route : 1D array
-            Nowa trasa po wykonaniu ruchu.
+            Nowa trasa po wykonaniu ruchu (out, jeśli podano).
     """
     n = len(route)
-    i, j = np.random.randint(0, n), np.random.randint(0, n)
-    while i == j:
-        j = np.random.randint(0, n)
+    # j jednostajnie z n - 1 pozycji różnych od i (bez pętli odrzucania)
+    i = np.random.randint(0, n)
+    j = np.random.randint(0, n - 1)
+    j += j >= i
 
-    new_route = route.copy()
+    new_route = _copy_into(route, out)
     tmp = new_route[i]
     new_route[i] = new_route[j]
     new_route[j] = tmp
@@ -49,7 +66,7 @@ def neighbor_swap(route):
 
 
 @njit(cache=True)
-def neighbor_two_opt(route):
+def neighbor_two_opt(route, out=None):
     """
     Operator sąsiedztwa: TWO-OPT
     ----------------------------
@@ -59,6 +76,8 @@ def neighbor_two_opt(route):
     Parametry:
         route : 1D array
             Bieżąca trasa TSP.
+        out : 1D array lub None
+            Opcjonalny bufor na nową trasę (jak w neighbor_swap).
 
     Zwraca:
         new_route : 1D array
@@ -69,17 +88,22 @@ def neighbor_two_opt(route):
 
     if i > j:
         i, j = j, i
-    if i == j:
-        return route.copy()
 
-    new_route = route.copy()
-    new_route[i:j] = new_route[i:j][::-1]
+    new_route = _copy_into(route, out)
+
+    # odwrócenie new_route[i:j] w miejscu (dla i == j nic się nie zmienia)
+    lo = i
+    hi = j - 1
+    while lo < hi:
+        new_route[lo], new_route[hi] = new_route[hi], new_route[lo]
+        lo += 1
+        hi -= 1
 
     return new_route
 
 
 @njit(cache=True)
-def neighbor_insert(route):
+def neighbor_insert(route, out=None):
     """
     Operator sąsiedztwa: INSERT
     ---------------------------
@@ -89,17 +113,20 @@ def neighbor_insert(route):
     Parametry:
         route : 1D array
             Bieżąca trasa TSP.
+        out : 1D array lub None
+            Opcjonalny bufor na nową trasę (jak w neighbor_swap).
 
     Zwraca:
         new_route : 1D array
             Trasa po wykonaniu ruchu insert.
     """
     n = len(route)
-    i, j = np.random.randint(0, n), np.random.randint(0, n)
-    while i == j:
-        j = np.random.randint(0, n)
+    # j jednostajnie z n - 1 pozycji różnych od i (bez pętli odrzucania)
+    i = np.random.randint(0, n)
+    j = np.random.randint(0, n - 1)
+    j += j >= i
 
-    new_route = route.copy()
+    new_route = _copy_into(route, out)
     city = new_route[i]
 
     if i < j:
@@ -151,6 +178,38 @@ def neighbor_cost_numba(distance_matrix, route, neighbor_fn_id):
     return new_route, cost
 
 
+@njit(cache=True)
+def neighbor_cost_into(distance_matrix, src, dst, neighbor_fn_id):
+    """
+    Generator sąsiada do gotowego bufora + obliczanie kosztu
+    --------------------------------------------------------
+    Działa jak neighbor_cost_numba, ale sąsiada zapisuje do
+    przekazanej tablicy dst (operatory neighbor_* z argumentem out),
+    zamiast alokować nową trasę w każdej iteracji.
+
+    Parametry:
+        distance_matrix : 2D array (n x n)
+        src : 1D array - bieżąca trasa (nie jest modyfikowana)
+        dst : 1D array - bufor na sąsiada (ten sam rozmiar co src)
+        neighbor_fn_id : int
+            0 - swap
+            1 - two_opt
+            2 - insert
+
+    Zwraca:
+        cost : float
+            Długość trasy zapisanej w dst.
+    """
+    if neighbor_fn_id == 1:
+        neighbor_two_opt(src, dst)
+    elif neighbor_fn_id == 2:
+        neighbor_insert(src, dst)
+    else:
+        neighbor_swap(src, dst)
+
+    return route_length_fast(distance_matrix, dst)
+
+
 def get_neighbor_function(neighborhood_type):
     """
     Wybór operatora sąsiedztwa po nazwie (wersja Pythonowa)
@@ -14,143 +14,239 @@ from numba import njit
 # co jest o wiele szybsze niż przeliczanie całej trasy od nowa.
 
 
+@njit(cache=True, fastmath=True, boundscheck=False, error_model="numpy")
+def neighbor_cost_delta_numba(distance_matrix, route, current_cost, fn_id, out=None):
+    """
+    Losuje ruch operatora fn_id i zwraca nową trasę z kosztem
+    current_cost + delta.
+
+    Wersja dla wywołań, które potrzebują sąsiada jako osobnej tablicy.
+    Gdy podano bufor out (ten sam rozmiar co route, wielokrotnie używany
+    przez wywołującego), sąsiad zapisywany jest do niego zamiast do nowej
+    tablicy — jak w neighbor_* z neighborhoods_numba.
+    Pętle algorytmów korzystają z propose_move_delta / apply_move_inplace
+    bezpośrednio: oceniają sam ruch (i, j) i zmieniają trasę w miejscu
+    dopiero po akceptacji, bez kopii trasy na każdego kandydata.
+    """
+    no_cand = np.empty((0, 0), dtype=np.int32)
+    no_pos = np.empty(0, dtype=np.int32)
+
+    i, j, delta = propose_move_delta(distance_matrix, route, fn_id, no_cand, no_pos)
+
+    # gałąź rozstrzygana przy kompilacji (out jest None albo tablicą)
+    if out is None:
+        new_route = route.copy()
+    else:
+        out[:] = route
+        new_route = out
+    apply_move_inplace(new_route, i, j, fn_id, no_pos)
+
+    return new_route, current_cost + delta
+
+
+def nearest_candidates(distance_matrix, k):
+    """
+    Lista kandydatów (neighbor list): cand[c] to k najbliższych miast
+    dla miasta c (bez samego c), posortowanych rosnąco po odległości.
+    Liczona raz na instancję. k <= 0 zwraca pustą tablicę (n x 0),
+    co oznacza losowanie ruchów z całej trasy.
+    """
+    n = distance_matrix.shape[0]
+    k = min(int(k), n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int32)
+
+    d = np.array(distance_matrix, dtype=np.float64)
+    np.fill_diagonal(d, np.inf)
+    return np.argsort(d, axis=1, kind="stable")[:, :k].astype(np.int32)
+
+
 @njit(cache=True)
-def neighbor_cost_delta_numba(distance_matrix, route, current_cost, fn_id):
+def propose_move_delta(distance_matrix, route, fn_id, cand, pos):
     """
-    Wersja zoptymalizowana - używa NumPy slicing zamiast pętli.
+    Losuje ruch (i, j) dla operatora fn_id i zwraca tylko jego deltę.
+    Trasa nie jest kopiowana – ruch wykonujemy dopiero po akceptacji
+    (apply_move_inplace), więc odrzucony sąsiad kosztuje O(1).
+
+    Jeśli lista kandydatów cand (n x k) jest niepusta, j nie jest
+    losowane jednostajnie: wybieramy jednego z k najbliższych sąsiadów
+    miasta route[i] i bierzemy jego pozycję z pos (odwrotna permutacja
+    trasy). Ruch łączy wtedy route[i] z bliskim miastem.
     """
     n = len(route)
+    k = cand.shape[1]
 
     i = np.random.randint(0, n)
-    j = np.random.randint(0, n)
-    while i == j:
-        j = np.random.randint(0, n)
+    if k == 0:
+        # j jednostajnie z n - 1 pozycji różnych od i (bez pętli odrzucania)
+        j = np.random.randint(0, n - 1)
+        j += j >= i
+    else:
+        j = pos[cand[route[i], np.random.randint(0, k)]]
+
+    return move_delta(distance_matrix, route, fn_id, i, j)
 
-    new_route = route.copy()
 
+@njit(cache=True, fastmath=True, error_model="numpy")
+def move_delta(distance_matrix, route, fn_id, i, j):
+    """
+    Delta kosztu ruchu (i, j) operatora fn_id dla już wylosowanych
+    pozycji (np. z paczki losowań przygotowanej przed pętlą kandydatów).
+    Dla two-opt para jest porządkowana (i < j), tak jak oczekuje tego
+    apply_move_inplace. Zwraca (i, j, delta).
+    """
     if fn_id == 0:  # SWAP
-        new_route[i], new_route[j] = new_route[j], new_route[i]
         delta = delta_swap(distance_matrix, route, i, j)
-
     elif fn_id == 1:  # TWO-OPT
         if i > j:
             i, j = j, i
-        # NumPy slicing jest szybsze niż [::-1] dla Numby
-        new_route[i:j] = route[i:j][::-1]
         delta = delta_two_opt(distance_matrix, route, i, j)
+    else:  # INSERT
+        delta = delta_insert(distance_matrix, route, i, j)
+
+    return i, j, delta
+
+
+@njit(cache=True)
+def apply_move_inplace(route, i, j, fn_id, pos):
+    """
+    Wykonuje ruch (i, j) operatora fn_id bezpośrednio na trasie,
+    z tą samą semantyką co neighbor_cost_delta_numba.
+    Jeśli pos jest niepuste, aktualizuje też odwrotną permutację
+    (tylko na zmienionym fragmencie trasy).
+    """
+    if fn_id == 0:  # SWAP
+        route[i], route[j] = route[j], route[i]
+        lo = min(i, j)
+        hi = max(i, j)
+        if pos.shape[0] > 0:
+            pos[route[lo]] = lo
+            pos[route[hi]] = hi
+        return
+
+    if fn_id == 1:  # TWO-OPT (i < j, odwracamy route[i:j])
+        lo = i
+        hi = j - 1
+        while lo < hi:
+            route[lo], route[hi] = route[hi], route[lo]
+            lo += 1
+            hi -= 1
+        lo = i
+        hi = j - 1
 
     else:  # INSERT
-        # To jest najtrudniejsze do optymalizacji bez pętli
-        # Ale możemy zminimalizować liczbę operacji
         a = route[i]
-        
         if i < j:
-            # Zamiast pętli, użyj slicing (Numba to dobrze optymalizuje)
-            new_route[i:j] = route[i+1:j+1]
-            new_route[j] = a
+            for k in range(i, j):
+                route[k] = route[k + 1]
         else:
-            # Analogicznie
-            new_route[j+1:i+1] = route[j:i]
-            new_route[j] = a
-            
-        delta = delta_insert(distance_matrix, route, i, j)
+            for k in range(i, j, -1):
+                route[k] = route[k - 1]
+        route[j] = a
+        lo = min(i, j)
+        hi = max(i, j)
 
-    return new_route, current_cost + delta
+    if pos.shape[0] > 0:
+        for k in range(lo, hi + 1):
+            pos[route[k]] = k
 
 
-# Funkcje delta z poprzedniego kodu (bez zmian)
-@njit(cache=True)
+# Funkcje delta
+# Krawędzie dodawane i usuwane przez ruch sumowane są osobno (add - sub),
+# a nie przez łańcuch delta -= ... / delta += ... — niezależne sumy
+# częściowe nie czekają na siebie, więc odczyty macierzy i dodawania
+# mogą się wykonywać równolegle (dla macierzy int32 sumy są całkowite).
+# Sąsiednie pozycje na cyklu liczone są arytmetycznie (idx + n * (idx < 0),
+# idx - n * (idx == n)) zamiast przez % n albo warunek — bez dzielenia
+# i bez trudnych do przewidzenia skoków dla losowych (i, j). Ujemnych
+# indeksów celowo nie używamy: te same funkcje kompiluje też Numba CUDA
+# (tabu_cuda.py).
+# Dekorator: inline="always" wkleja funkcje delta do wywołujących już na
+# poziomie IR Numby, więc kompilują się one z flagami WYWOŁUJĄCEGO —
+# własne fastmath / error_model funkcji delta nie miałyby znaczenia.
+# Dlatego fastmath=True i error_model="numpy" mają funkcje, do których
+# delty są wklejane: move_delta (a przez nią propose_move_delta)
+# oraz evaluate_candidates_cpu i two_opt_scan_cpu w tabu_cuda.py.
+# Nowe miejsce wywołania delta_* powinno mieć te same flagi.
+# Sprawdzanie zakresu indeksów jest domyślnie wyłączone; NUMBA_BOUNDSCHECK=1
+# włącza je (dla debugowania) niezależnie od dekoratora.
+@njit(cache=True, inline="always")
 def delta_swap(distance_matrix, route, i, j):
     if i == j:
         return 0.0
     n = len(route)
     if i > j:
         i, j = j, i
+    # po uporządkowaniu 0 <= i < j <= n - 1: zawijać mogą się tylko
+    # poprzednik i (i == 0) oraz następnik j (j == n - 1)
+    ip = i - 1
+    ip += n * (ip < 0)
+    jn = j + 1
+    jn -= n * (jn == n)
     a = route[i]
     b = route[j]
-    a_prev = route[i - 1] if i > 0 else route[n - 1]
-    a_next = route[i + 1] if i < n - 1 else route[0]
-    b_prev = route[j - 1] if j > 0 else route[n - 1]
-    b_next = route[j + 1] if j < n - 1 else route[0]
-    delta = 0.0
+    a_prev = route[ip]
+    a_next = route[i + 1]
+    b_prev = route[j - 1]
+    b_next = route[jn]
+    dm = distance_matrix
     if j == i + 1:
-        delta -= distance_matrix[a_prev, a]
-        delta -= distance_matrix[a, b]
-        delta -= distance_matrix[b, b_next]
-        delta += distance_matrix[a_prev, b]
-        delta += distance_matrix[b, a]
-        delta += distance_matrix[a, b_next]
-        return delta
+        add = dm[a_prev, b] + dm[b, a] + dm[a, b_next]
+        sub = dm[a_prev, a] + dm[a, b] + dm[b, b_next]
+        return add - sub
     if i == 0 and j == n - 1:
-        delta -= distance_matrix[b_prev, b]
-        delta -= distance_matrix[b, a]
-        delta -= distance_matrix[a, a_next]
-        delta += distance_matrix[b_prev, a]
-        delta += distance_matrix[a, b]
-        delta += distance_matrix[b, a_next]
-        return delta
-    delta -= distance_matrix[a_prev, a]
-    delta -= distance_matrix[a, a_next]
-    delta -= distance_matrix[b_prev, b]
-    delta -= distance_matrix[b, b_next]
-    delta += distance_matrix[a_prev, b]
-    delta += distance_matrix[b, a_next]
-    delta += distance_matrix[b_prev, a]
-    delta += distance_matrix[a, b_next]
-    return delta
+        add = dm[b_prev, a] + dm[a, b] + dm[b, a_next]
+        sub = dm[b_prev, b] + dm[b, a] + dm[a, a_next]
+        return add - sub
+    add = (dm[a_prev, b] + dm[b, a_next]) + (dm[b_prev, a] + dm[a, b_next])
+    sub = (dm[a_prev, a] + dm[a, a_next]) + (dm[b_prev, b] + dm[b, b_next])
+    return add - sub
 
 
-@njit(cache=True)
+@njit(cache=True, inline="always")
 def delta_two_opt(distance_matrix, route, i, j):
     if i == j:
         return 0.0
     n = len(route)
     if i > j:
         i, j = j, i
-    im1 = route[i - 1] if i > 0 else route[n - 1]
+    ip = i - 1
+    ip += n * (ip < 0)
+    jn = j - n * (j == n)
+    im1 = route[ip]
     ip1 = route[i]
     jm1 = route[j - 1]
-    jp1 = route[j] if j < n else route[0]
-    delta = 0.0
-    delta -= distance_matrix[im1, ip1]
-    delta -= distance_matrix[jm1, jp1]
-    delta += distance_matrix[im1, jm1]
-    delta += distance_matrix[ip1, jp1]
-    return delta
+    jp1 = route[jn]
+    add = distance_matrix[im1, jm1] + distance_matrix[ip1, jp1]
+    sub = distance_matrix[im1, ip1] + distance_matrix[jm1, jp1]
+    return add - sub
 
 
-@njit(cache=True)
+@njit(cache=True, inline="always")
 def delta_insert(distance_matrix, route, i, j):
     if i == j:
         return 0.0
     n = len(route)
     a = route[i]
-    a_prev = route[(i - 1) % n]
-    a_next = route[(i + 1) % n]
-    delta = 0.0
-    delta -= distance_matrix[a_prev, a]
-    delta -= distance_matrix[a, a_next]
-    delta += distance_matrix[a_prev, a_next]
-    
+    ip = i - 1
+    ip += n * (ip < 0)
+    inx = i + 1
+    inx -= n * (inx == n)
+    a_prev = route[ip]
+    a_next = route[inx]
+
     if i < j:
         left = route[j]
-        right_idx = (j + 1) % n
-        if right_idx == i:
-            right = a_next
-        else:
-            right = route[right_idx]
-        delta -= distance_matrix[left, right]
-        delta += distance_matrix[left, a]
-        delta += distance_matrix[a, right]
+        right_idx = j + 1
+        right_idx -= n * (right_idx == n)
+        right = a_next if right_idx == i else route[right_idx]
     else:
-        left_idx = (j - 1) % n
-        if left_idx == i:
-            left = a_prev
-        else:
-            left = route[left_idx]
+        left_idx = j - 1
+        left_idx += n * (left_idx < 0)
+        left = a_prev if left_idx == i else route[left_idx]
         right = route[j]
-        delta -= distance_matrix[left, right]
-        delta += distance_matrix[left, a]
-        delta += distance_matrix[a, right]
-    
-    return delta
\ No newline at end of file
+
+    dm = distance_matrix
+    add = dm[a_prev, a_next] + (dm[left, a] + dm[a, right])
+    sub = (dm[a_prev, a] + dm[a, a_next]) + dm[left, right]
+    return add - sub
@@ -0,0 +1,110 @@
+import queue
+import statistics
+
+from src.utils.rng import with_repeat_seed
+from src.utils.run_single_repeat import run_indexed_repeat
+from src.utils.workers import N_WORKERS
+
+# HARMONOGRAM POWTÓRZEŃ KOMBINACJI
+# ---------------------------------------------
+# Wszystkie powtórzenia wszystkich kombinacji danej instancji trafiają
+# do jednej kolejki zadań puli — wolny proces od razu bierze kolejne
+# zadanie, bez czekania na najwolniejsze powtórzenie każdej kombinacji.
+#
+# Powtórzenia adaptacyjne (cv_tol ustawione): każda kombinacja dostaje
+# najpierw min_repeats zadań. Gdy wrócą wszystkie, a względne odchylenie
+# kosztów pstdev / mean jest >= cv_tol, dokładane jest kolejne
+# powtórzenie (aż do max_repeats). Stabilne kombinacje kończą się po
+# min_repeats, zaszumione dostają więcej prób.
+# ---------------------------------------------
+
+
+def _is_stable(costs, cv_tol):
+    """Czy względne odchylenie kosztów jest poniżej progu cv_tol."""
+    mean = statistics.fmean(costs)
+    if mean == 0:
+        return True
+    return statistics.pstdev(costs) / abs(mean) < cv_tol
+
+
+def run_repeats(pool, solver, matrix_handle, combo_params, min_repeats, max_repeats=None, cv_tol=None, seed=None):
+    """
+    Wykonuje powtórzenia kombinacji w puli i zwraca je w miarę kończenia.
+
+    Parametry:
+        pool : multiprocessing.Pool
+        solver : klucz algorytmu z SOLVER_MODULES (albo funkcja solve_tsp)
+        matrix_handle : uchwyt z shared_matrix.share_matrix()
+        combo_params : list[dict] - parametry kolejnych kombinacji
+        min_repeats : int - liczba powtórzeń (stała, gdy cv_tol is None)
+        max_repeats : int | None - limit powtórzeń adaptacyjnych
+        cv_tol : float | None - próg pstdev / mean kosztu; None = stałe powtórzenia
+        seed : int | None - ziarno eksperymentu; każde powtórzenie dostaje
+            własne ziarno z (seed, combo_id, repeat_id), zob. rng.repeat_seed()
+
+    Zwraca (generator):
+        (combo_id, [(cost, route, runtime), ...]) — powtórzenia w kolejności
+        repeat_id, po jednym elemencie dla każdej zakończonej kombinacji
+    """
+    m = len(combo_params)
+    results = [[] for _ in range(m)]
+
+    def finished(combo_id):
+        return combo_id, [(c, r, t) for _, c, r, t in sorted(results[combo_id], key=lambda x: x[0])]
+
+    # stała liczba powtórzeń: jedna lista zadań przez imap_unordered (w paczkach)
+    if cv_tol is None or max_repeats is None or max_repeats <= min_repeats:
+        jobs = [
+            (combo_id, repeat_id, solver, matrix_handle, with_repeat_seed(params, seed, combo_id, repeat_id))
+            for combo_id, params in enumerate(combo_params)
+            for repeat_id in range(min_repeats)
+        ]
+        chunksize = max(1, len(jobs) // (N_WORKERS * 8))
+
+        for combo_id, repeat_id, cost, route, runtime in pool.imap_unordered(
+            run_indexed_repeat, jobs, chunksize=chunksize
+        ):
+            results[combo_id].append((repeat_id, cost, route, runtime))
+            if len(results[combo_id]) == min_repeats:
+                yield finished(combo_id)
+        return
+
+    # powtórzenia adaptacyjne: zadania dokładane na bieżąco przez apply_async
+    done = queue.SimpleQueue()
+    submitted = [0] * m
+
+    def submit(combo_id):
+        repeat_id = submitted[combo_id]
+        submitted[combo_id] += 1
+        pool.apply_async(
+            run_indexed_repeat,
+            ((combo_id, repeat_id, solver, matrix_handle,
+              with_repeat_seed(combo_params[combo_id], seed, combo_id, repeat_id)),),
+            callback=done.put,
+            error_callback=done.put,
+        )
+
+    for combo_id in range(m):
+        for _ in range(min_repeats):
+            submit(combo_id)
+    pending = m * min_repeats
+
+    while pending:
+        item = done.get()
+        pending -= 1
+        if isinstance(item, BaseException):
+            raise item
+
+        combo_id, repeat_id, cost, route, runtime = item
+        results[combo_id].append((repeat_id, cost, route, runtime))
+
+        # czekamy, aż wrócą wszystkie wysłane powtórzenia kombinacji
+        if len(results[combo_id]) < submitted[combo_id]:
+            continue
+
+        costs = [c for _, c, _, _ in results[combo_id]]
+        if submitted[combo_id] < max_repeats and not _is_stable(costs, cv_tol):
+            submit(combo_id)
+            pending += 1
+        else:
+            yield finished(combo_id)
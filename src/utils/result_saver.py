@@ -1,6 +1,10 @@
+import csv
 import os
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # FUNKCJA ZAPISUJĄCA WYNIKI EKSPERYMENTÓW DO CSV
 # ---------------------------------------------
 # Zapisuje wyniki algorytmów TSP do katalogu /results/, z opcjonalną
@@ -10,14 +14,41 @@ from datetime import datetime
 # ---------------------------------------------
 
 
+# katalog results_new/ w katalogu projektu (wyznaczany raz, przy imporcie)
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+_RESULTS_DIR = os.path.join(_PROJECT_ROOT, "results_new")
+
+
+def results_dir(subfolder=None):
+    """Katalog results_new/[<subfolder>] w katalogu projektu (tworzony w razie potrzeby)."""
+    path = _RESULTS_DIR
+
+    if subfolder:
+        path = os.path.join(path, subfolder)
+
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def format_route(route):
+    """
+    Trasa jako napis "c0-c1-...-cn" do kolumny min_route.
+    tolist() zamienia całą tablicę na int-y Pythona jednym wywołaniem C —
+    szybciej niż map(str, ...) po elementach NumPy i niż astype(str).
+    """
+    return "-".join(map(str, np.asarray(route).tolist()))
+
+
 def save_experiment_results(
     df,
     filename: str = "results.csv",
     time_seconds: int | None = None,
     subfolder: str | None = None,
-    show_summary: bool = True,
+    show_summary: bool = False,
     summary_count: int = 20,
     sort_by_cost: bool = True,
+    append: bool = False,
+    file_format: str = "csv",
 ):
     """
     Zapis wyników eksperymentu do pliku CSV.
@@ -34,24 +65,38 @@ def save_experiment_results(
             Jeśli ustawione, wyniki trafiają do results/<subfolder>.
             Pozwala rozdzielać wyniki algorytmów (IHC, SA, TS, NN).
         show_summary : bool
-            Czy wypisać krótkie podsumowanie po zapisaniu wyników.
+            Czy wypisać krótkie podsumowanie po zapisaniu wyników
+            (domyślnie False — zapis w pętli nie płaci za formatowanie
+            tabeli i groupby; skrypty eksperymentów przekazują True).
         summary_count : int
             Liczba wierszy pokazywanych w podsumowaniu.
         sort_by_cost : bool
             Czy sortować wyniki wg kolumny min_cost (domyślnie True).
+        append : bool
+            Dopisywanie do stałego pliku results/<subfolder>/<filename>
+            (bez znacznika czasu w nazwie; nagłówek tylko w nowym pliku)
+            — dla wielu krótkich zapisów w pętli. Pomija sortowanie
+            i podsumowanie (sort_by_cost / show_summary są ignorowane).
+        file_format : str
+            "csv" (domyślnie — czytają go skrypty z src/analyze) albo
+            "parquet" (binarny zapis kolumnowy z kompresją zstd, szybszy
+            i mniejszy dla dużych wyników; wymaga pyarrow, bez trybu append).
 
     Zwraca:
-        str : pełna ścieżka zapisanego pliku CSV.
+        str : pełna ścieżka zapisanego pliku (CSV albo Parquet).
     """
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Nieznany format pliku: {file_format}")
+    if append and file_format == "parquet":
+        raise ValueError("Tryb append jest dostępny tylko dla formatu csv")
 
-    # lokalizacja katalogu results/
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-    results_dir = os.path.join(project_root, "results_new")
-
-    if subfolder:
-        results_dir = os.path.join(results_dir, subfolder)
+    out_dir = results_dir(subfolder)
 
-    os.makedirs(results_dir, exist_ok=True)
+    # tryb dopisywania: bez sortowania, znacznika czasu i podsumowania
+    if append:
+        csv_path = os.path.join(out_dir, filename)
+        df.to_csv(csv_path, mode="a", header=not os.path.exists(csv_path), index=False)
+        return csv_path
 
     # sortowanie wyników według najlepszego min_cost (jeśli istnieje)
     if sort_by_cost and "min_cost" in df.columns:
@@ -64,10 +109,14 @@ def save_experiment_results(
     if time_seconds is not None:
         filename = f"{time_seconds}_sec__{filename}"
 
-    csv_path = os.path.join(results_dir, f"{timestamp}__{filename}")
+    csv_path = os.path.join(out_dir, f"{timestamp}__{filename}")
 
-    # zapis CSV
-    df.to_csv(csv_path, index=False)
+    # zapis CSV / Parquet
+    if file_format == "parquet":
+        csv_path = os.path.splitext(csv_path)[0] + ".parquet"
+        df.to_parquet(csv_path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(csv_path, index=False)
 
     # wyświetlenie podsumowania
     if show_summary:
@@ -83,3 +132,71 @@ def save_experiment_results(
             )
 
     return csv_path
+
+
+# ZAPIS WYNIKÓW NA BIEŻĄCO
+# ---------------------------------------------
+# Skrypty eksperymentów dopisują wiersz wyniku zaraz po zakończeniu
+# kombinacji do pliku częściowego (<znacznik>__partial__<filename>)
+# obok docelowego CSV. Przerwany eksperyment zostawia więc wszystkie
+# dotychczasowe wyniki na dysku, a proces nie trzyma listy wierszy w
+# pamięci. Po zakończeniu dane są wczytywane (to_dataframe()), trafiają
+# do save_experiment_results(), a plik częściowy jest usuwany.
+# ---------------------------------------------
+
+
+class IncrementalResultWriter:
+    """
+    Dopisywanie wierszy wyników (dict) do częściowego pliku CSV.
+
+    Parametry:
+        filename : str
+            Nazwa pliku, jak w save_experiment_results().
+        subfolder : str | None
+            Podfolder results_new/ (np. "TS", "GA").
+
+    Użycie:
+        with IncrementalResultWriter(subfolder="TS") as writer:
+            writer.write(row)
+        df = writer.to_dataframe()
+    """
+
+    def __init__(self, filename: str = "results.csv", subfolder: str | None = None):
+        timestamp = datetime.now().strftime("%Y-%m-%d__%H-%M")
+        self.path = os.path.join(results_dir(subfolder), f"{timestamp}__partial__{filename}")
+        self._file = None
+        self._writer = None
+
+    def write(self, row: dict):
+        """Dopisuje jeden wiersz; kolumny ustala pierwszy zapisany wiersz."""
+        if self._file is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row))
+            self._writer.writeheader()
+
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def to_dataframe(self):
+        """Wczytuje zapisane wiersze jako pd.DataFrame."""
+        self.close()
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        return pd.read_csv(self.path)
+
+    def remove(self):
+        """Usuwa plik częściowy (po zapisaniu docelowego CSV)."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
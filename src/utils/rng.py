@@ -0,0 +1,63 @@
+import numpy as np
+from numba import njit
+
+# ZIARNA GENERATORÓW LOSOWYCH
+# ---------------------------------------------
+# Algorytmy losują z dwóch niezależnych generatorów:
+#   • np.random w Pythonie (permutacje startowe, klucze argsort),
+#   • np.random wewnątrz kerneli Numba — osobny stan dla każdego wątku,
+#     na który np.random.seed() wywołane w Pythonie nie ma wpływu.
+# seed_rng() ustawia oba (Numba przez mały kernel). Kernele z prange
+# (ihc_parallel, sa_ensemble, produce_generation, tabu_multi_path)
+# losują ze stanów wątków roboczych, których seed_rng() nie dotyka —
+# dlatego dostają z hosta tablicę ziaren (kernel_seeds(), po jednym na
+# restart / łańcuch / potomka / ścieżkę) i każda iteracja prange
+# wywołuje np.random.seed(seeds[k]) przed pierwszym losowaniem. Wynik
+# nie zależy wtedy od liczby wątków ani od przydziału iteracji do wątków.
+# (W tabu_multi_path ścieżki dzielą jeszcze próg aspiracji zapisywany
+# bez blokady, więc przy kilku wątkach pełnej powtarzalności nie ma.)
+#
+# repeat_seed() wyznacza ziarno pojedynczego powtórzenia z ziarna
+# eksperymentu — SeedSequence daje niezależne strumienie dla kolejnych
+# (kombinacja, powtórzenie), a ponowne uruchomienie daje te same ziarna.
+# ---------------------------------------------
+
+
+@njit(cache=True)
+def _seed_numba(seed):
+    np.random.seed(seed)
+
+
+def seed_rng(seed):
+    """
+    Ustawia ziarno np.random oraz generatora Numba bieżącego wątku.
+    seed=None nic nie zmienia (przebieg losowy).
+    """
+    if seed is None:
+        return
+    seed = int(seed)
+    np.random.seed(seed)
+    _seed_numba(seed)
+
+
+def kernel_seeds(count):
+    """
+    Ziarna dla iteracji pętli prange, losowane z np.random w Pythonie —
+    po seed_rng(seed) powtarzalne, bez ziarna (seed=None) losowe.
+    """
+    return np.random.randint(0, 2**31 - 1, size=count).astype(np.int64)
+
+
+def repeat_seed(base_seed, combo_id, repeat_id):
+    """Ziarno (uint32) powtórzenia repeat_id kombinacji combo_id."""
+    return int(np.random.SeedSequence((base_seed, combo_id, repeat_id)).generate_state(1)[0])
+
+
+def with_repeat_seed(params, base_seed, combo_id, repeat_id):
+    """
+    Parametry zadania z ziarnem powtórzenia (klucz "seed").
+    base_seed=None zwraca params bez zmian (przebiegi losowe).
+    """
+    if base_seed is None:
+        return params
+    return {**params, "seed": repeat_seed(base_seed, combo_id, repeat_id)}
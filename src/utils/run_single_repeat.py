@@ -1,3 +1,50 @@
+import importlib
+import inspect
+import os
+
+import numba
+import numpy as np
+from numba.core.registry import CPUDispatcher
+
+from src.utils.shared_matrix import attach_matrix
+from src.utils.workers import threads_per_worker
+
+# REJESTR ALGORYTMÓW
+# ---------------------------------------------
+# Zadania puli niosą krótki klucz algorytmu zamiast obiektu funkcji.
+# Proces roboczy importuje moduł algorytmu przy pierwszym użyciu klucza
+# (najpóźniej w warmup_worker) i dalej bierze solve_tsp z pamięci.
+# ---------------------------------------------
+
+SOLVER_MODULES = {
+    "nn": "src.algorithms.nn",
+    "ihc": "src.algorithms.ihc_numba",
+    "sa": "src.algorithms.sa_numba",
+    "ts_move": "src.algorithms.tabu_move",
+    "ts_path": "src.algorithms.tabu_full_path",
+    "ts_cuda": "src.algorithms.tabu_cuda",
+    "grasp": "src.algorithms.grasp_numba",
+    "ga": "src.algorithms.ga",
+}
+
+_SOLVERS = {}
+
+
+def get_solver(solver):
+    """
+    Zwraca funkcję solve_tsp dla klucza z SOLVER_MODULES.
+    Przekazana funkcja (callable) jest zwracana bez zmian.
+    """
+    if callable(solver):
+        return solver
+
+    solve_func = _SOLVERS.get(solver)
+    if solve_func is None:
+        solve_func = importlib.import_module(SOLVER_MODULES[solver]).solve_tsp
+        _SOLVERS[solver] = solve_func
+    return solve_func
+
+
 def run_single_repeat(args):
     """
     Uniwersalne uruchomienie pojedynczego powtórzenia algorytmu TSP.
@@ -5,11 +52,91 @@ def run_single_repeat(args):
 
     Parametry:
         args : tuple
-            (solve_func, distance_matrix, params_dict)
+            (solver, distance_matrix, params_dict)
+            solver to klucz z SOLVER_MODULES albo funkcja solve_tsp
+
+    Zwraca:
+        (cost, route, runtime) — route jako np.ndarray int32: wynik wraca
+        z procesu puli jednym blokiem bajtów (4 B na miasto zamiast 8 B
+        dla int64 albo obiektów int z listy)
+    """
+    solver, D, params = args
+    route, cost, runtime, meta = get_solver(solver)(D, params)
+    return cost, np.asarray(route, dtype=np.int32), runtime
+
+
+def warmup_worker(solver, distance_matrix, params_list):
+    """
+    Inicjalizator procesu puli (Pool(initializer=...)).
+    Ogranicza wątki kerneli prange do threads_per_worker(), żeby N_WORKERS
+    procesów nie uruchamiało łącznie więcej wątków niż jest rdzeni.
+    Następnie uruchamia krótkie wywołania algorytmu w każdym procesie roboczym,
+    zanim trafią do niego właściwe zadania — kompilacja JIT (lub wczytanie
+    kerneli z cache Numba) nie obciąża wtedy czasu pierwszych powtórzeń
+    eksperymentu.
+
+    Parametry:
+        solver : klucz z SOLVER_MODULES (albo funkcja solve_tsp)
+        distance_matrix : np.ndarray - mała instancja do rozgrzewki
+        params_list : list[dict] - parametry rozgrzewki (krótkie przebiegi),
+            po jednym na każdy wariant kerneli używany w eksperymencie
+    """
+    numba.set_num_threads(min(threads_per_worker(), numba.config.NUMBA_NUM_THREADS))
+
+    solve_func = get_solver(solver)
+    for params in params_list:
+        solve_func(distance_matrix, params)
+
+
+def numba_cache_ready(solver):
+    """
+    Czy kernele Numba algorytmu są już w cache na dysku: przynajmniej jeden
+    kernel @njit(cache=True) widoczny w module algorytmu ma indeks cache,
+    który Numba uzna za aktualny (zgodny skrót pliku źródłowego).
+    Korzysta z wewnętrznego indeksu cache Numba — przy innym API zwraca False.
+    """
+    module = inspect.getmodule(get_solver(solver))
+    kernels = [obj for obj in vars(module).values() if isinstance(obj, CPUDispatcher)]
+
+    for kernel in kernels:
+        try:
+            if kernel._cache._cache_file._load_index():
+                return True
+        except AttributeError:
+            continue
+    return False
+
+
+def main_warmup_needed(solver):
+    """
+    Czy wykonać rozgrzewkę w procesie głównym przed startem puli.
+    Służy ona tylko wypełnieniu cache Numba (procesy puli wczytują go zamiast
+    kompilować równolegle), więc przy aktualnym cache jest pomijana.
+    TSP_WARMUP=1 wymusza rozgrzewkę, TSP_WARMUP=0 ją wyłącza.
+    """
+    mode = os.environ.get("TSP_WARMUP", "auto")
+    if mode in ("0", "1"):
+        return mode == "1"
+    return not numba_cache_ready(solver)
+
+
+def run_indexed_repeat(args):
+    """
+    Pojedyncze powtórzenie z identyfikatorami kombinacji i powtórzenia.
+    Używane z Pool.imap_unordered(), gdzie wyniki wracają w dowolnej
+    kolejności i są grupowane po combo_id.
+
+    Parametry:
+        args : tuple
+            (combo_id, repeat_id, solver, matrix_handle, params_dict)
+            solver to klucz z SOLVER_MODULES, a matrix_handle uchwyt
+            z shared_matrix.share_matrix() — ani funkcja, ani macierz
+            nie są serializowane w każdym zadaniu.
 
     Zwraca:
-        (cost, route, runtime)
+        (combo_id, repeat_id, cost, route, runtime)
     """
-    solve_func, D, params = args
-    route, cost, runtime, meta = solve_func(D, params)
-    return cost, route, runtime
+    combo_id, repeat_id, solver, matrix_handle, params = args
+    D = attach_matrix(matrix_handle)
+    cost, route, runtime = run_single_repeat((solver, D, params))
+    return combo_id, repeat_id, cost, route, runtime
@@ -0,0 +1,58 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# MACIERZ ODLEGŁOŚCI WE WSPÓŁDZIELONEJ PAMIĘCI
+# ---------------------------------------------
+# Proces główny umieszcza macierz instancji w SharedMemory raz, a do
+# zadań puli trafia tylko mały uchwyt (nazwa, kształt, dtype) zamiast
+# pełnej macierzy serializowanej osobno dla każdego zadania.
+#
+# Proces roboczy przy pierwszym zadaniu danej instancji kopiuje macierz
+# z pamięci współdzielonej do własnej tablicy i od razu zamyka segment —
+# kolejne zadania tej instancji używają lokalnej kopii (kernele Numba
+# i cache list kandydatów dostają ten sam obiekt), a proces główny może
+# bezpiecznie zwolnić segment po zakończeniu instancji.
+# ---------------------------------------------
+
+# macierz ostatnio używanej instancji w procesie roboczym: (nazwa, tablica)
+_WORKER_MATRIX = (None, None)
+
+
+def share_matrix(distance_matrix):
+    """
+    Kopiuje macierz do nowego segmentu pamięci współdzielonej.
+
+    Zwraca:
+        shm : SharedMemory - segment (do zamknięcia i unlink() po instancji)
+        handle : tuple - (name, shape, dtype) przekazywany w zadaniach puli
+    """
+    distance_matrix = np.ascontiguousarray(distance_matrix)
+    shm = shared_memory.SharedMemory(create=True, size=distance_matrix.nbytes)
+    view = np.ndarray(distance_matrix.shape, dtype=distance_matrix.dtype, buffer=shm.buf)
+    view[:] = distance_matrix
+    del view
+
+    return shm, (shm.name, distance_matrix.shape, distance_matrix.dtype.str)
+
+
+def release_matrix(shm):
+    """Zamyka i usuwa segment utworzony przez share_matrix()."""
+    shm.close()
+    shm.unlink()
+
+
+def attach_matrix(handle):
+    """
+    Zwraca macierz instancji w procesie roboczym na podstawie uchwytu.
+    Segment jest czytany tylko przy pierwszym zadaniu nowej instancji.
+    """
+    global _WORKER_MATRIX
+
+    name, shape, dtype = handle
+    if _WORKER_MATRIX[0] != name:
+        shm = shared_memory.SharedMemory(name=name)
+        matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+        shm.close()
+        _WORKER_MATRIX = (name, matrix)
+
+    return _WORKER_MATRIX[1]
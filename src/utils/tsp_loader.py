@@ -1,7 +1,17 @@
+import csv
 import os
 import re
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+from openpyxl import load_workbook
+
+# opcjonalnie python-calamine (parser xlsx w Rust, kilkukrotnie szybszy
+# od openpyxl); bez niego arkusz czyta openpyxl w trybie read_only
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
 
 
 def _expected_size_from_filename(filename: str):
@@ -11,6 +21,20 @@ def _expected_size_from_filename(filename: str):
     return int(match.group(1)) if match else None
 
 
+# katalog src/data w głównym katalogu projektu (tam, gdzie jest folder src),
+# wyznaczany raz, przy imporcie
+_DATA_DIR = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")), "src/data")
+
+
+def _is_symmetric(matrix: np.ndarray):
+    """
+    Symetria macierzy z tolerancją 1e-8. Najpierw dokładne porównanie
+    (array_equal, ~10x szybsze) — macierze symetryczne, w tym całkowite
+    TSPLIB, kończą na nim; allclose liczymy tylko przy niezgodności.
+    """
+    return np.array_equal(matrix, matrix.T) or np.allclose(matrix, matrix.T, atol=1e-8)
+
+
 def _validate_matrix_shape(matrix: np.ndarray, filename: str):
     expected_size = _expected_size_from_filename(filename)
     if expected_size is None:
@@ -25,15 +49,32 @@ def _validate_matrix_shape(matrix: np.ndarray, filename: str):
         )
 
 
+def _postprocess(matrix: np.ndarray, filename: str):
+    """
+    Wspólna końcówka loaderów: nan -> 0 (w miejscu, jeśli macierz jest
+    zapisywalna), walidacja kształtu i ostrzeżenie o braku symetrii.
+    """
+    # Usunięcie ewentualnych nanów / błędnych wartości
+    if np.isnan(matrix).any():
+        matrix = np.nan_to_num(matrix, copy=not matrix.flags.writeable, nan=0.0)
+
+    # Walidacja kształtu na podstawie liczby w nazwie pliku (np. 48 -> (48, 48))
+    _validate_matrix_shape(matrix, filename)
+
+    # Ostrzeżenie jeśli macierz nie jest idealnie symetryczna
+    if not _is_symmetric(matrix):
+        print("⚠️ Uwaga: macierz nie jest idealnie symetryczna — może zawierać błędy danych.")
+
+    return matrix
+
+
 def load_tsp_matrix_broken(filename):
     """
-    Wczytuje macierz odległości TSP z pliku .xlsx.
-    Obsługuje ścieżki względne względem głównego katalogu projektu.
+    Wczytuje macierz odległości TSP z pliku .xlsx BEZ pomijania nagłówków
+    (dawny, błędny odczyt). Zostawiony dla src/analyze/verify_data_fix.ipynb,
+    który porównuje go z load_tsp_matrix().
     """
-    # Ścieżka do głównego katalogu projektu (tam, gdzie jest folder src)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-    data_dir = os.path.join(project_root, "src/data")
-    filepath = os.path.join(data_dir, filename)
+    filepath = os.path.join(_DATA_DIR, filename)
 
     # Sprawdzenie czy plik istnieje
     if not os.path.exists(filepath):
@@ -41,58 +82,176 @@ def load_tsp_matrix_broken(filename):
 
     # Wczytanie arkusza i konwersja do macierzy numpy
     df = pd.read_excel(filepath, header=None)
-    matrix = df.to_numpy(dtype=float)
+    return _postprocess(df.to_numpy(dtype=float), filename)
 
-    # Usunięcie ewentualnych nanów / błędnych wartości
-    if np.isnan(matrix).any():
-        matrix = np.nan_to_num(matrix, nan=0.0)
 
-    # Walidacja kształtu na podstawie liczby w nazwie pliku (np. 48 -> (48, 48))
-    _validate_matrix_shape(matrix, filename)
+def _is_empty_cell(value):
+    # pusta komórka: None w openpyxl, "" w calamine
+    return value is None or value == ""
 
-    # Ostrzeżenie jeśli macierz nie jest idealnie symetryczna
-    if not np.allclose(matrix, matrix.T, atol=1e-8):
-        print("⚠️ Uwaga: macierz nie jest idealnie symetryczna — może zawierać błędy danych.")
 
+def _matrix_from_rows(rows, filepath):
+    """
+    Macierz (n x n) z iteratora wierszy arkusza (bez wiersza i kolumny nagłówków).
+    Puste komórki -> nan. Arkusz, w którym liczba niepustych wierszy danych
+    różni się od liczby kolumn nagłówka, zgłasza ValueError.
+    """
+    header = next(rows, ())
+
+    # liczba kolumn danych: nagłówek bez narożnika i pustych komórek na końcu
+    n = len(header) - 1
+    while n > 0 and _is_empty_cell(header[n]):
+        n -= 1
+
+    matrix = np.full((n, n), np.nan)
+    n_rows = 0
+    for row in rows:
+        if all(_is_empty_cell(v) for v in row):
+            continue
+        if n_rows < n:
+            values = row[1 : n + 1]
+            matrix[n_rows, : len(values)] = [np.nan if _is_empty_cell(v) else v for v in values]
+        n_rows += 1
+
+    if n_rows != n:
+        raise ValueError(
+            f"Niepoprawny kształt macierzy w pliku {filepath}: "
+            f"{n_rows} wierszy danych, {n} kolumn nagłówka."
+        )
     return matrix
 
 
+def _read_matrix_xlsx(filepath):
+    """Macierz z pierwszego arkusza pliku .xlsx (calamine, a bez niego openpyxl)."""
+    if CalamineWorkbook is not None:
+        sheet = CalamineWorkbook.from_path(filepath).get_sheet_by_index(0)
+        return _matrix_from_rows(iter(sheet.to_python(skip_empty_area=True)), filepath)
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        return _matrix_from_rows(wb.worksheets[0].iter_rows(values_only=True), filepath)
+    finally:
+        wb.close()
+
+
+def _read_matrix_csv(filepath):
+    """
+    Macierz z pliku .csv (nagłówki jak w .xlsx: pierwszy wiersz i pierwsza kolumna).
+    Liczby czyta np.loadtxt (parser w C) z pominięciem wiersza nagłówka
+    i kolumny indeksów; plik z pustymi komórkami albo nierównymi wierszami,
+    którego loadtxt nie przyjmie, czytamy ogólną ścieżką _matrix_from_rows.
+    """
+    with open(filepath, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+
+    # liczba kolumn danych: nagłówek bez narożnika i pustych komórek na końcu
+    n = len(header) - 1
+    while n > 0 and _is_empty_cell(header[n]):
+        n -= 1
+
+    try:
+        matrix = np.loadtxt(
+            filepath, delimiter=",", skiprows=1, usecols=range(1, n + 1), dtype=np.float64, ndmin=2
+        )
+    except ValueError:
+        with open(filepath, newline="", encoding="utf-8") as f:
+            return _matrix_from_rows(csv.reader(f), filepath)
+
+    if matrix.shape != (n, n):
+        raise ValueError(
+            f"Niepoprawny kształt macierzy w pliku {filepath}: "
+            f"{matrix.shape[0]} wierszy danych, {n} kolumn nagłówka."
+        )
+    return matrix
+
+
+def _read_matrix_npy(filepath):
+    """Macierz z pliku .npy (sama macierz, bez nagłówków), float64 w układzie C."""
+    return np.ascontiguousarray(np.load(filepath), dtype=np.float64)
+
+
+# czytnik wg rozszerzenia pliku; każdy zwraca nową, zapisywalną macierz
+_MATRIX_READERS = {
+    ".xlsx": _read_matrix_xlsx,
+    ".csv": _read_matrix_csv,
+    ".npy": _read_matrix_npy,
+}
+
+
 def load_tsp_matrix(filename):
     """
-    Wczytuje macierz odległości TSP z pliku .xlsx.
+    Wczytuje macierz odległości TSP z pliku .xlsx (także .csv / .npy,
+    zob. _MATRIX_READERS).
     Obsługuje ścieżki względne względem głównego katalogu projektu.
+
+    Sparsowana macierz jest pamiętana w procesie (klucz: ścieżka i czas
+    modyfikacji pliku), więc kolejne wywołania dla niezmienionego pliku nie
+    czytają arkusza ponownie, a po zmianie pliku jest on czytany od nowa.
+    Każde wywołanie zwraca własną, zapisywalną kopię — tablica w cache
+    jest tylko do odczytu i nie wychodzi poza moduł.
     """
-    # Ścieżka do głównego katalogu projektu (tam, gdzie jest folder src)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-    data_dir = os.path.join(project_root, "src/data")
-    filepath = os.path.join(data_dir, filename)
+    filepath = os.path.join(_DATA_DIR, filename)
 
     # Sprawdzenie czy plik istnieje
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Nie znaleziono pliku: {filepath}")
 
-    # Wczytanie arkusza
-    # Zakładamy, że plik ma nagłówki (miasta/indeksy) w pierwszym wierszu i pierwszej kolumnie
-    try:
-        df = pd.read_excel(filepath, index_col=0)
-    except Exception:
-        # Fallback jeśli coś pójdzie nie tak (np. brak nagłówków) - czytamy raw
-        df = pd.read_excel(filepath, header=None)
+    return _parse_tsp_matrix(filepath, os.path.getmtime(filepath)).copy()
 
-    # Konwersja do macierzy numpy
-    matrix = df.to_numpy(dtype=float)
 
-    # Usunięcie ewentualnych nanów / błędnych wartości
-    if np.isnan(matrix).any():
-        matrix = np.nan_to_num(matrix, nan=0.0)
-
-    # Walidacja kształtu na podstawie liczby w nazwie pliku (np. 48 -> (48, 48))
-    _validate_matrix_shape(matrix, filename)
+@lru_cache(maxsize=16)
+def _parse_tsp_matrix(filepath, mtime):
+    """Parsowanie i walidacja macierzy (mtime w kluczu: zmieniony plik jest czytany od nowa)."""
+    ext = os.path.splitext(filepath)[1].lower()
+    reader = _MATRIX_READERS.get(ext)
+    if reader is None:
+        raise ValueError(f"Nieobsługiwany format pliku: {filepath} (obsługiwane: {', '.join(_MATRIX_READERS)})")
 
-    # Ostrzeżenie jeśli macierz nie jest idealnie symetryczna
-    if not np.allclose(matrix, matrix.T, atol=1e-8):
-        print(
-            "⚠️ Uwaga: macierz nie jest idealnie symetryczna — może zawierać błędy danych."
-        )
+    # Wczytanie arkusza strumieniowo (python-calamine albo openpyxl
+    # read_only) prosto do tablicy NumPy — bez pośredniego DataFrame
+    # i wnioskowania typów kolumn.
+    # Zakładamy, że plik ma nagłówki (miasta/indeksy) w pierwszym wierszu
+    # i pierwszej kolumnie; n wyznacza wiersz nagłówka, macierz (n x n)
+    # w układzie C alokujemy raz i wypełniamy kolejnymi wierszami
+    matrix = _postprocess(reader(filepath), filepath)
 
+    # tablica z cache zostaje tylko do odczytu (load_tsp_matrix oddaje kopie),
+    # więc przypadkowy zapis nie zmieni wyników kolejnych wywołań
+    matrix.setflags(write=False)
     return matrix
+
+
+def load_tsp_matrix_cached(filename):
+    """
+    Wczytuje macierz odległości TSP przez cache .npy.
+
+    Przy pierwszym wywołaniu (lub gdy plik .xlsx jest nowszy niż cache)
+    macierz jest wczytywana z Excela przez load_tsp_matrix() i zapisywana
+    do src/data/cache/<nazwa>.npy. Kolejne wywołania mapują plik .npy
+    do pamięci (mmap, tylko do odczytu) zamiast ponownie parsować arkusz.
+    Zwracana macierz ma układ C (C-contiguous).
+    """
+    data_dir = _DATA_DIR
+    filepath = os.path.join(data_dir, filename)
+    cache_dir = os.path.join(data_dir, "cache")
+    cache_path = os.path.join(cache_dir, os.path.splitext(os.path.basename(filename))[0] + ".npy")
+
+    cache_fresh = os.path.exists(cache_path) and (
+        not os.path.exists(filepath) or os.path.getmtime(cache_path) >= os.path.getmtime(filepath)
+    )
+
+    if not cache_fresh:
+        matrix = load_tsp_matrix(filename)
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(cache_path, matrix.astype(np.float64, copy=False))
+
+    matrix = np.load(cache_path, mmap_mode="r")
+
+    # cache zapisany przed przejściem na układ C (plik .npy w układzie
+    # Fortran) — nadpisujemy go raz wersją C-contiguous
+    if not matrix.flags.c_contiguous:
+        matrix = np.ascontiguousarray(matrix)
+        np.save(cache_path, matrix)
+        return matrix
+
+    return np.asarray(matrix)
@@ -0,0 +1,38 @@
+import os
+
+# LICZBA PROCESÓW PULI
+# ---------------------------------------------
+# Kernele Numba są czysto obliczeniowe, więc dwa procesy na jednym
+# rdzeniu fizycznym (SMT / Hyper-Threading) nie przyspieszają pracy —
+# tylko dzielą się jednostkami i pamięcią L1. Domyślnie pula ma więc
+# tyle procesów, ile rdzeni fizycznych: połowę dostępnych procesorów
+# logicznych (z uwzględnieniem maski affinity na Linuxie), min. 1.
+#
+# Zmienna środowiskowa TSP_NWORKERS nadpisuje wartość domyślną, np.:
+#   TSP_NWORKERS=8 python -m src.experiments.run_experiment_ts
+#
+# Kernele z parallel=True (prange) domyślnie biorą wszystkie rdzenie
+# w każdym procesie — przy N_WORKERS procesach daje to N_WORKERS razy
+# więcej wątków niż rdzeni. Procesy puli ustawiają więc w initializerze
+# (warmup_worker) numba.set_num_threads(threads_per_worker()).
+# ---------------------------------------------
+
+
+def _logical_cpus():
+    """Liczba dostępnych procesorów logicznych (maska affinity na Linuxie)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers():
+    """Domyślna liczba procesów: połowa dostępnych procesorów logicznych (min. 1)."""
+    return max(1, _logical_cpus() // 2)
+
+
+N_WORKERS = int(os.environ.get("TSP_NWORKERS", default_workers()))
+
+
+def threads_per_worker():
+    """Wątki Numba na proces puli: procesory logiczne podzielone na N_WORKERS (min. 1)."""
+    return max(1, _logical_cpus() // N_WORKERS)